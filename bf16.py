@@ -1,53 +1,298 @@
-import os, sys, pygame, argparse
+import time
+STARTUP_BEGIN = time.perf_counter()
+
+import os, sys, json, argparse
+from contextlib import contextmanager
 
 from rich.console import Console
-from rich.traceback import install as rich_traceback_install
-from rich.pretty import install as pretty_install
 from rich.panel import Panel
+from rich.table import Table
 from rich import box
 
-from bf16module.utilities.colors.bf16color import BF16color
-from bf16module.utilities.compile.bf16compile import BF16compile
-from bf16module.runtime.bf16runtime import BF16Runtime
+from bf16module.utilities.compile.bf16compile import BF16compile, OPTIMIZE_LEVELS
+from bf16module.utilities.compile.bf16cache import BF16cache
+from bf16module.utilities.error.bf16error import BF16error
+from bf16module.utilities.options.bf16options import ENGINES, RENDERERS, TAPES, MEMORY_SIZE, POLICIES, FORMATS
+
+# pygame, NumPy and the runtime modules are imported by main() once the command is
+# known, so `compile` never loads them (bf16 --startup-profile shows the cost).
 
 # === Setup ===
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
 
-rich_traceback_install()
-pretty_install()
-
 console = Console()
-console.clear()
 
 WINDOW_SIZE = 512
 PROGRAM_END = False
+FAST_FORWARD_FRAMES = 8  # frames run per display frame while Tab is held
+STARTUP_PHASES: list[tuple[str, float]] = [("core imports (rich, compiler)", time.perf_counter() - STARTUP_BEGIN)]
+
+@contextmanager
+def startup_phase(name: str):
+    """Time a startup step for --startup-profile."""
+    start = time.perf_counter()
+    yield
+    STARTUP_PHASES.append((name, time.perf_counter() - start))
+
+def report_startup():
+    """--startup-profile: time spent in each startup phase and which heavy libraries got loaded."""
+    table = Table(title="🚀 Startup", box=box.ROUNDED)
+    table.add_column("Phase", style="cyan")
+    table.add_column("ms", justify="right", style="green")
+    for name, seconds in STARTUP_PHASES:
+        table.add_row(name, f"{seconds * 1000:.1f}")
+    table.add_row("Total since start", f"{(time.perf_counter() - STARTUP_BEGIN) * 1000:.1f}")
+    loaded = [name for name in ("pygame", "numpy", "scipy") if name in sys.modules]
+    table.add_row("Loaded", ", ".join(loaded) or "none of pygame/numpy/scipy")
+    console.print(table)
+
+def install_rich_handlers():
+    """Pretty tracebacks and reprs for the interactive commands (compile skips their import cost)."""
+    from rich.traceback import install as rich_traceback_install
+    from rich.pretty import install as pretty_install
+    rich_traceback_install()
+    pretty_install()
+
+def resolve_color(name: str, base_dir: str | None = None) -> "BF16palette":
+    """Look up a colour mode or .pal palette file, falling back to rgb332."""
+    from bf16module.utilities.colors.bf16palette import BF16palette
+    try:
+        return BF16palette.get(name, base_dir=base_dir)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]❌ {e}[/]")
+        console.print(f"[yellow]Available modes:[/] {', '.join(BF16palette.modes())} or a palette file")
+        return BF16palette.get("rgb332")
+
+def load_program(filename: str, compiler: BF16compile, optimize: int = 0,
+                 cache: BF16cache | None = None, debug: bool = False) -> tuple[list[int], dict]:
+    """
+    Compile a .b/.bf16 source (through the compile cache if given) or load a .bin/.bf16c binary.
+    Returns (program, meta); meta may hold color_mode, app_name and memory_image, and
+    for binaries always holds the container version (1, 2 or 3).
+    """
+    if filename.endswith((".b", ".bf16")):
+        with open(filename, "rb") as f:
+            source = f.read()
+        if cache is None:
+            console.print(f"🧠 [bold blue]Compiling source[/] '{filename}'")
+            return compiler.compile(source, optimize=optimize), {}
+        program, hit = cache.compile(compiler, source, optimize)
+        if hit:
+            console.print(f"⚡ [bold blue]Loaded cached program[/] for '{filename}'")
+        else:
+            console.print(f"🧠 [bold blue]Compiled source[/] '{filename}'")
+        if debug:
+            console.log(f"[dim]Compile cache {'hit' if hit else 'miss'}: {cache.path(cache.key(source, optimize))} "
+                        f"(hits {cache.hits}, misses {cache.misses}, {cache.size() / 1024:.0f} KB)[/]")
+        return program, {}
+    if filename.endswith((".bin", ".bf16c")):
+        console.print(f"📦 [bold magenta]Loading binary[/] '{filename}'")
+        version = compiler.bin_version(filename)
+        if version == 3:
+            program, meta, memory_image = compiler.read_bin_v3(filename)
+            meta["memory_image"] = memory_image
+        elif version == 2:
+            program, color_mode, app_name = compiler.read_bin_v2(filename)
+            meta = {"color_mode": color_mode, "app_name": app_name}
+        else:
+            return compiler.read_bin(filename), {"version": version}
+        meta["version"] = version
+        console.print(f"📘 App: [green]{meta.get('app_name')}[/], Color: [cyan]{meta.get('color_mode')}[/] (v{version})")
+        return program, meta
+    raise ValueError(f"Unsupported file type: {filename}")
+
+def log_bounds(program: list[int]):
+    """--debug: summarize the pointer-range analysis the compiled engine uses to drop bounds checks."""
+    bounds = BF16compile.analyze_bounds(program)
+    console.log(f"[dim]Bounds analysis: {bounds['balanced']}/{len(bounds['loops'])} loops balanced, "
+                f"{len(bounds['guarded'])} loop and {bounds['block_guards']} block range checks, "
+                f"{bounds['unchecked']}/{bounds['checks']} pointer checks elided[/]")
+
+def prepare_native(runtime: "BF16Runtime"):
+    """--engine native: build the shared object before timing starts, so bench measures native code."""
+    start = time.perf_counter()
+    try:
+        native = runtime.native_engine(wait=True)
+    except BF16error as e:
+        console.print(f"⚠️ Native engine unavailable ({e}), falling back to compiled engine")
+        runtime.engine = "compiled"
+        return
+    source = f"built in {time.perf_counter() - start:.2f} s" if native.built else "cached"
+    console.log(f"[dim]Native code {source}: {native.path}[/]")
+
+def key_states(text: str) -> list[int]:
+    """argparse type for --keys: "0,0,8,0x10" -> one key state per frame."""
+    try:
+        states = [int(part, 0) for part in text.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated key states, got '{text}'")
+    if not all(0 <= state <= 0xFF for state in states):
+        raise argparse.ArgumentTypeError("key states must be between 0 and 0xFF")
+    return states
+
+def install_input(runtime: "BF16Runtime", keys: list[int] | None, keymap: dict[int, int] | None = None) -> "BF16input":
+    """Serve ',' from the --keys sequence (one state per frame) or from keyboard events; returns the source."""
+    from bf16module.utilities.input.bf16input import BF16input
+    source = BF16input.headless(keys, lambda: runtime.frames) if keys else BF16input(keymap)
+    runtime.read_input = source.read
+    return source
+
+def apply_meta(runtime: "BF16Runtime", meta: dict):
+    """Load a binary's initial memory image after runtime.reset()."""
+    if meta.get("memory_image"):
+        runtime.load_memory(meta["memory_image"])
 
 def main():
+    start = time.perf_counter()
     parser = argparse.ArgumentParser(
         prog="bf16",
         description="BF16 Interpreter and Compiler: Visual Brainfuck game runtime",
         epilog="Examples:\n"
                "  bf16 compile game.b\n"
+               "  bf16 compile game.b -O2\n"
+               "  bf16 compile game.b --use_v3_compile --compress\n"
                "  bf16 run game.b --color rgb332 --showfps\n"
-               "  bf16 run demo.bf16c --color grayscale",
+               "  bf16 run demo.bf16c --color grayscale\n"
+               "  bf16 run game.b --color palettes/gameboy.pal\n"
+               "  bf16 run game.b --engine compiled\n"
+               "  bf16 bench game.b --engine native\n"
+               "  bf16 run demo.b --worker --frame-policy drop_oldest\n"
+               "  bf16 run slow.b --scheduler --target-fps 60\n"
+               "  bf16 run snake.b --rewind 10 --checkpoint snake.bf16s\n"
+               "  bf16 bench game.b --frames 600 --json bench.json\n"
+               "  bf16 profile game.b --frames 300 --collapsed game.folded\n"
+               "  bf16 batch examples/ --frames 300 --csv report.csv\n"
+               "  bf16 batch snake.b --inputs sweep.json --lockstep --frames 120\n"
+               "  bf16 export badapple.b -o badapple.gif --scale 8 --audio badapple.wav\n"
+               "  bf16 run snake.b --record snake.bf16r && bf16 replay snake.bf16r snake.b --engine compiled -O2",
         formatter_class=argparse.RawTextHelpFormatter
     )
     parser.add_argument("--debug", action="store_true", help="Enable debug output")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="Report the time spent importing and setting up before the command runs")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     compile_parser = subparsers.add_parser("compile", help="Compile a .b source file to .bf16c")
     compile_parser.add_argument("filename")
     compile_parser.add_argument("--use_v2_compile", action="store_true")
-    compile_parser.add_argument("--color", default="rgb332")
+    compile_parser.add_argument("--use_v3_compile", action="store_true",
+                                help="Write the sectioned v3 format (32-bit operands, bulk loading)")
+    compile_parser.add_argument("--compress", action="store_true", help="v3: store code as zlib-compressed varints")
+    compile_parser.add_argument("--memory-image", metavar="FILE", help="v3: raw bytes copied to memory[0:] at load")
+    compile_parser.add_argument("--color", default="rgb332", help="Colour mode or palette file stored in v2/v3 binaries")
     compile_parser.add_argument("--appname", default="UNNAMED BF16")
     compile_parser.add_argument("-o", "--output", help="Output filename (default: auto .bf16c)")
+    compile_parser.add_argument("-O", "--optimize", type=int, choices=OPTIMIZE_LEVELS, default=0,
+                                help="Optimization level: 0 none, 1 fold +/- runs, 2 also clear/scan/multiply loops. "
+                                     "-O1/-O2 give the same results only while the pointer stays off the tape edges: "
+                                     "fused ops clamp their target cell, not each step of the moves they replace")
+
+    # Options shared by every command that executes a program
+    runtime_options = argparse.ArgumentParser(add_help=False)
+    runtime_options.add_argument("--color", default="rgb332", help="Colour mode or palette file (.pal/.gpl/.act)")
+    runtime_options.add_argument("-O", "--optimize", type=int, choices=OPTIMIZE_LEVELS, default=0,
+                                 help="Optimization level used when compiling .b sources (see compile -h: -O1/-O2 "
+                                      "can differ from -O0 in programs that run the pointer into a tape edge)")
+    runtime_options.add_argument("--engine", choices=ENGINES, default="interpreter",
+                                 help="Execution engine; native builds C with the system compiler (default: interpreter)")
+    runtime_options.add_argument("--tape", choices=TAPES, default="list",
+                                 help="Memory backend: list of ints or compact bytearray (default: list)")
+    runtime_options.add_argument("--memory-size", type=int, default=MEMORY_SIZE,
+                                 help=f"Tape size in cells (default: {MEMORY_SIZE})")
+    runtime_options.add_argument("--no-cache", action="store_true",
+                                 help="Always compile .b sources instead of using the compile cache")
 
-    run_parser = subparsers.add_parser("run", help="Run a .b or .bf16c program")
+    # Input options of the commands that read ',' from a keyboard or a fixed sequence
+    input_options = argparse.ArgumentParser(add_help=False)
+    input_options.add_argument("--keys", type=key_states, metavar="STATES",
+                               help="Headless input: comma-separated key states, one per frame (the last repeats)")
+
+    run_parser = subparsers.add_parser("run", help="Run a .b or .bf16c program", parents=[runtime_options, input_options])
     run_parser.add_argument("filename")
-    run_parser.add_argument("--color", default="rgb332")
     run_parser.add_argument("--showfps", action="store_true")
+    run_parser.add_argument("--keymap", metavar="SPEC",
+                            help="Keys for ',' as pygame key name=bit mask pairs "
+                                 "(default: z=0x80,x=0x40,return=0x20,space=0x10,up=8,down=4,left=2,right=1)")
+    run_parser.add_argument("--prewarm-audio", action="store_true",
+                            help="Start the audio synthesizer at startup instead of on the first note")
+    run_parser.add_argument("--renderer", choices=RENDERERS, default="surfarray",
+                            help="Frame renderer: surfarray (vectorized) or boxes (one rect per cell)")
+    run_parser.add_argument("--record", metavar="PATH",
+                            help="Log every key state read by ',' plus per-frame hashes, for bf16 replay")
+    run_parser.add_argument("--dirty-rects", action="store_true",
+                            help="Redraw and push only the cells that changed since the previous frame")
+    run_parser.add_argument("--worker", action="store_true",
+                            help="Run the interpreter on a persistent thread that queues frames ahead of the display")
+    run_parser.add_argument("--frame-buffer", type=int, default=2,
+                            help="Frames the worker may run ahead (default: 2; keep small for interactive programs)")
+    run_parser.add_argument("--frame-policy", choices=POLICIES, default="block",
+                            help="What the worker does when the frame buffer is full (default: block)")
+    run_parser.add_argument("--scheduler", action="store_true",
+                            help="Time-slice long computations across display frames so the window stays responsive")
+    run_parser.add_argument("--budget", type=int, metavar="N",
+                            help="Scheduler: fixed instructions per display frame (implies --scheduler)")
+    run_parser.add_argument("--time-slice", type=float, metavar="MS",
+                            help="Scheduler: milliseconds of computation per display frame "
+                                 "(implies --scheduler; default: adapts to hold --target-fps)")
+    run_parser.add_argument("--target-fps", type=int, default=60, help="Display frame rate (default: 60)")
+    run_parser.add_argument("--rewind", type=float, default=0, metavar="SECONDS",
+                            help="Keep this many seconds of frames: hold Backspace to rewind, Tab to fast-forward")
+    run_parser.add_argument("--checkpoint", metavar="PATH",
+                            help="Checkpoint file for F5 (save) and F9 (load) (default: <filename>.bf16s)")
+    run_parser.add_argument("--resume", action="store_true", help="Start from the --checkpoint file")
+
+    bench_parser = subparsers.add_parser("bench", help="Run a program headless and uncapped, report throughput",
+                                         parents=[runtime_options, input_options])
+    bench_parser.add_argument("filename")
+    bench_parser.add_argument("--frames", type=int, default=600, help="Frames to run (default: 600, stops early at program end)")
+    bench_parser.add_argument("--render", action="store_true", help="Include drawing to an offscreen surface")
+    bench_parser.add_argument("--renderer", choices=RENDERERS, default="surfarray",
+                              help="Frame renderer used with --render")
+    bench_parser.add_argument("--rewind", action="store_true",
+                              help="Also snapshot every frame into a rewind buffer, then rewind through it, "
+                                   "and report the cost per frame")
+    bench_parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+
+    replay_parser = subparsers.add_parser("replay", help="Replay a --record log headless and uncapped, verify every frame",
+                                          parents=[runtime_options])
+    replay_parser.add_argument("recording", help="Input log written by run --record")
+    replay_parser.add_argument("filename", help="The program that was recorded (any -O level or engine)")
+    replay_parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+
+    export_parser = subparsers.add_parser("export", help="Run a program headless and write its frames as video/images",
+                                          parents=[runtime_options, input_options])
+    export_parser.add_argument("filename")
+    export_parser.add_argument("-o", "--output", required=True,
+                               help="Output: .gif, .rgb/.raw (RGB24 stream) or a directory for PNG frames")
+    export_parser.add_argument("--format", choices=FORMATS, help="Output format (default: from the output name)")
+    export_parser.add_argument("--scale", type=int, default=4, help="Pixels per cell (default: 4, i.e. 64x64)")
+    export_parser.add_argument("--frames", type=int, default=600, help="Frames to export (default: 600, stops early at program end)")
+    export_parser.add_argument("--fps", type=int, default=60, help="Frame rate of the output (default: 60)")
+    export_parser.add_argument("--audio", metavar="WAV", help="Also write bass note changes to a WAV track")
+    export_parser.add_argument("--replay", metavar="PATH", help="Drive ',' from a run --record log")
+
+    batch_parser = subparsers.add_parser("batch", help="Run many programs headless in parallel and report hashes/ticks",
+                                         parents=[runtime_options])
+    batch_parser.add_argument("paths", nargs="+", help="Program files and/or directories of programs")
+    batch_parser.add_argument("--frames", type=int, default=600, help="Frames per run (default: 600, stops early at program end)")
+    batch_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    batch_parser.add_argument("--inputs", metavar="PATH",
+                              help='JSON input sweep: {"name": [key state per frame, ...], ...}; every program runs once per sequence')
+    batch_parser.add_argument("--lockstep", action="store_true",
+                              help="Run all input sequences of a program together on the NumPy lockstep engine")
+    batch_parser.add_argument("--json", metavar="PATH", help="Write all results, including per-frame hashes, as JSON")
+    batch_parser.add_argument("--csv", metavar="PATH", help="Write one row per run as CSV")
+
+    profile_parser = subparsers.add_parser("profile", help="Run a program headless and report where it spends its instructions",
+                                           parents=[runtime_options, input_options])
+    profile_parser.add_argument("filename")
+    profile_parser.add_argument("--frames", type=int, default=300, help="Frames to run (default: 300, stops early at program end)")
+    profile_parser.add_argument("--top", type=int, default=15, help="Rows per report table (default: 15)")
+    profile_parser.add_argument("--collapsed", metavar="PATH",
+                                help="Write collapsed stacks for flamegraph.pl / speedscope")
 
     args = parser.parse_args()
+    STARTUP_PHASES.append(("argument parsing", time.perf_counter() - start))
 
     if args.debug:
         console.print("[bold blue]🛠 Debug mode enabled[/]")
@@ -55,14 +300,70 @@ def main():
         logging.basicConfig(level=logging.DEBUG)
 
     compiler = BF16compile()
-    runtime = BF16Runtime()
+    cache = None if getattr(args, "no_cache", True) else BF16cache()
+
+    if args.command == "compile":
+        if args.startup_profile:
+            report_startup()
+        if not os.path.isfile(args.filename):
+            console.print(f"[bold red]❌ File not found:[/] {args.filename}")
+            return
+        if not args.filename.endswith(".b"):
+            console.print("[bold red]❌ Compile only supports .b files[/]")
+            return
+        try:
+            with open(args.filename, "rb") as f:
+                source = f.read()
+            compiler.compile(source, optimize=args.optimize)
+            bin_filename = args.output or args.filename.rsplit(".", 1)[0] + ".bf16c"
+            if args.use_v3_compile:
+                memory_image = None
+                if args.memory_image:
+                    with open(args.memory_image, "rb") as f:
+                        memory_image = f.read()
+                compiler.write_bin_v3(bin_filename, color_mode=args.color, app_name=args.appname,
+                                      memory_image=memory_image, compress=args.compress,
+                                      meta={"optimize": args.optimize})
+            elif args.use_v2_compile:
+                compiler.write_bin_v2(bin_filename, color_mode=args.color, app_name=args.appname)
+            else:
+                compiler.write_bin(bin_filename)
+            console.print(Panel.fit(
+                f"✅ Compiled [bold cyan]{args.filename}[/] → [green]{bin_filename}[/]\n"
+                f"📏 {compiler.program_size // 2} instructions at -O{args.optimize} "
+                f"({compiler.unoptimized_size} unoptimized)",
+                title="Compile Success", box=box.ROUNDED, style="green"))
+        except Exception as e:
+            console.print(Panel(str(e), title="💥 Compile Failed", style="red"))
+        return
+
+    with startup_phase("rich tracebacks"):
+        install_rich_handlers()
+    console.clear()
+    with startup_phase("pygame (and numpy)"):
+        import pygame
+    with startup_phase("runtime"):
+        from bf16module.runtime.bf16runtime import BF16Runtime
+    # Tools (bench, profiler, export, replay, worker, scheduler, rewind, audio) are imported
+    # by the command or option that uses them, so a plain `run` loads none of them.
+    if args.startup_profile:
+        report_startup()
+
+    try:
+        runtime = BF16Runtime(engine=getattr(args, "engine", "interpreter"),
+                              renderer=getattr(args, "renderer", "surfarray"),
+                              tape=getattr(args, "tape", "list"),
+                              memory_size=getattr(args, "memory_size", MEMORY_SIZE),
+                              track_stats=args.debug,
+                              dirty_rects=getattr(args, "dirty_rects", False))
+    except ValueError as e:
+        console.print(f"[bold red]❌ {e}[/]")
+        return
 
     def on_tick_hook():
         if args.debug and not PROGRAM_END:
-            tol_memory = 0
-            for x in runtime.memory:
-                tol_memory += x
-            console.log(f"[dim]Tick {runtime.tick} | memory size {tol_memory}[/] ({tol_memory / 1024 / 1024:.2f} MB)")
+            console.log(f"[dim]Tick {runtime.tick} | checksum {runtime.checksum} | "
+                        f"nonzero {runtime.nonzero} | max address {runtime.max_address}[/]")
     
     def on_program_end_hook():
         global PROGRAM_END
@@ -72,72 +373,358 @@ def main():
     runtime.register_event("tick", on_tick_hook)
     runtime.register_event("program_end", on_program_end_hook)
 
+    if args.command == "batch":
+        from bf16module.utilities.batch.bf16batch import BF16batch
+        inputs = None
+        if args.inputs:
+            try:
+                with open(args.inputs) as f:
+                    inputs = json.load(f)
+                if isinstance(inputs, list):
+                    inputs = {str(i): keys for i, keys in enumerate(inputs)}
+            except (OSError, ValueError) as e:
+                console.print(f"[bold red]❌ Cannot read input sweep:[/] {e}")
+                return
+        programs = BF16batch.find_programs(args.paths)
+        if not programs:
+            console.print("[bold red]❌ No programs found[/]")
+            return
+        jobs = BF16batch.jobs(programs, args.frames, inputs, engine=args.engine, tape=args.tape,
+                              memory_size=args.memory_size, optimize=args.optimize, cache=not args.no_cache)
+        if args.lockstep:
+            console.print(f"🏭 [bold blue]Running {len(jobs)} jobs[/] in lockstep")
+        else:
+            console.print(f"🏭 [bold blue]Running {len(jobs)} jobs[/] on {args.workers or os.cpu_count()} workers")
+
+        def on_done(result):
+            mark = "❌" if result["error"] else "✅"
+            console.log(f"{mark} {result['program']} [{result['input']}] {result['frames']} frames, "
+                        f"{result['ticks']:,} ticks, {result['seconds']:.2f} s {result['error']}")
+
+        start = time.perf_counter()
+        if args.lockstep:
+            results = BF16batch.run_lockstep(jobs, progress=on_done)
+        else:
+            results = BF16batch.run(jobs, args.workers, progress=on_done)
+        elapsed = time.perf_counter() - start
+
+        table = Table(title=f"🏭 Batch: {len(jobs)} runs in {elapsed:.2f} s", box=box.ROUNDED)
+        for column in ("Program", "Input", "Frames", "Ticks", "Checksum", "Frames hash", "Seconds"):
+            table.add_column(column, justify="left" if column in ("Program", "Input", "Frames hash") else "right")
+        for result in results:
+            table.add_row(result["program"], result["input"], str(result["frames"]), f"{result['ticks']:,}",
+                          str(result["checksum"]), result["frames_hash"][:16] or f"[red]{result['error']}[/]",
+                          f"{result['seconds']:.2f}")
+        console.print(table)
+        total_ticks = sum(result["ticks"] for result in results)
+        console.print(f"⏱️ {total_ticks / elapsed if elapsed else 0:,.0f} instructions/s overall "
+                      f"({sum(result['seconds'] for result in results):.2f} s of run time)")
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"frames": args.frames, "seconds": elapsed, "runs": results}, f, indent=2)
+        if args.csv:
+            BF16batch.write_csv(results, args.csv)
+        return
+
     if not os.path.isfile(args.filename):
         console.print(f"[bold red]❌ File not found:[/] {args.filename}")
         return
 
-    if args.command == "compile":
-        if not args.filename.endswith(".b"):
-            console.print("[bold red]❌ Compile only supports .b files[/]")
+    if args.command == "bench":
+        from bf16module.utilities.bench.bf16bench import BF16bench
+        BF16bench.init_headless()
+        color = resolve_color(args.color)
+        try:
+            runtime.program, meta = load_program(args.filename, compiler, args.optimize, cache, args.debug)
+        except Exception as e:
+            console.print(Panel(str(e), title="💥 Load Error", style="red"))
             return
+        if meta.get("color_mode") is not None:
+            color = resolve_color(meta["color_mode"], base_dir=os.path.dirname(args.filename))
+
+        runtime.reset()
+        apply_meta(runtime, meta)
+        install_input(runtime, args.keys or [0])
+        if runtime.engine == "native":
+            prepare_native(runtime)
+        if args.debug and runtime.engine == "compiled":
+            log_bounds(runtime.program)
+        surface = BF16bench.offscreen_surface(WINDOW_SIZE) if args.render else None
+        rewind = None
+        if args.rewind:
+            from bf16module.runtime.bf16rewind import BF16rewind
+            rewind = BF16rewind(runtime, capacity=args.frames)
+        stats = BF16bench.run(runtime, args.frames, color, surface, rewind)
+        if rewind is not None:
+            held = rewind.stats()
+            while rewind.rewind():
+                pass
+            stats["rewind"] = dict(rewind.stats(), frames=held["frames"], keyframes=held["keyframes"],
+                                   bytes=held["bytes"])
+        stats["program"] = args.filename
+        stats["optimize"] = args.optimize
+
+        table = Table(title=f"⏱️ Bench: {args.filename}", box=box.ROUNDED)
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", justify="right", style="green")
+        table.add_row("Engine", f"{stats['engine']} (-O{args.optimize})")
+        table.add_row("Frames", f"{stats['frames']}" + (" (program ended)" if stats["program_end"] else ""))
+        table.add_row("Ticks", f"{stats['ticks']:,}")
+        table.add_row("Wall time", f"{stats['seconds']:.3f} s")
+        table.add_row("Instructions/s", f"{stats['ips']:,.0f}")
+        table.add_row("Frames/s", f"{stats['fps']:,.1f}")
+        table.add_row("Ticks/frame", f"{stats['ticks_per_frame']:,.1f}")
+        table.add_row("Changed cells/frame", f"{stats['changed_cells_per_frame']:.1f} / 256")
+        if args.render:
+            table.add_row("Render/frame", f"{stats['render_ms_per_frame']:.3f} ms ({stats['renderer']})")
+        if rewind is not None:
+            rewind_stats = stats["rewind"]
+            table.add_row("Snapshot/frame", f"{rewind_stats['capture_ms']:.3f} ms")
+            table.add_row("Restore/frame", f"{rewind_stats['restore_ms']:.3f} ms")
+            table.add_row("Rewind buffer", f"{rewind_stats['frames']} frames in {rewind_stats['keyframes']} keyframes, "
+                                           f"{rewind_stats['bytes'] / 1024:,.0f} KiB")
+        console.print(table)
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(stats, f, indent=2)
+        return
+
+    if args.command == "profile":
+        from bf16module.utilities.bench.bf16bench import BF16bench
+        from bf16module.utilities.profile.bf16profiler import BF16profiler
+        BF16bench.init_headless()
+        color = resolve_color(args.color)
+        source = source_map = None
         try:
-            with open(args.filename, "rb") as f:
-                source = f.read()
-            compiler.compile(source)
-            bin_filename = args.output or args.filename.rsplit(".", 1)[0] + ".bf16c"
-            if args.use_v2_compile:
-                compiler.write_bin_v2(bin_filename, color_mode=args.color, app_name=args.appname)
+            if args.filename.endswith((".b", ".bf16")):
+                with open(args.filename, "rb") as f:
+                    source = f.read()
+                runtime.program = compiler.compile(source, optimize=args.optimize, source_map=True)
+                source_map = compiler.source_map
+                meta = {}
             else:
-                compiler.write_bin(bin_filename)
-            console.print(Panel.fit(
-                f"✅ Compiled [bold cyan]{args.filename}[/] → [green]{bin_filename}[/]",
-                title="Compile Success", box=box.ROUNDED, style="green"))
+                runtime.program, meta = load_program(args.filename, compiler, args.optimize)
         except Exception as e:
-            console.print(Panel(str(e), title="💥 Compile Failed", style="red"))
+            console.print(Panel(str(e), title="💥 Load Error", style="red"))
+            return
+        if meta.get("color_mode") is not None:
+            color = resolve_color(meta["color_mode"], base_dir=os.path.dirname(args.filename))
+
+        runtime.reset()
+        apply_meta(runtime, meta)
+        install_input(runtime, args.keys or [0])
+        console.print(f"🔬 [bold blue]Profiling[/] '{args.filename}' for up to {args.frames} frames ({runtime.engine})")
+        profiler = BF16profiler.run(runtime, args.frames, color, source_map, source)
+        total = profiler.total or 1
+
+        table = Table(title=f"🔥 Hot loops ({runtime.frames} frames, {runtime.tick:,} ticks)", box=box.ROUNDED)
+        for column in ("Loop", "Entries", "Iterations", "Inclusive", "%", "Source"):
+            table.add_column(column, justify="left" if column in ("Loop", "Source") else "right")
+        for row in profiler.loop_report(args.top):
+            table.add_row(row["location"], f"{row['entries']:,}", f"{row['iterations']:,}", f"{row['inclusive']:,}",
+                          f"{row['inclusive'] * 100 / total:.1f}", profiler.source_line(row["line"], 40))
+        console.print(table)
+
+        table = Table(title="🔥 Hot instructions", box=box.ROUNDED)
+        for column in ("Op", "At", "Count", "%"):
+            table.add_column(column, justify="right" if column in ("Count", "%") else "left")
+        for row in profiler.instructions(args.top):
+            table.add_row(row["op"], row["location"], f"{row['count']:,}", f"{row['count'] * 100 / total:.1f}")
+        console.print(table)
+
+        if source_map is not None:
+            table = Table(title="🔥 Hot source lines", box=box.ROUNDED)
+            for column in ("Line", "Count", "%", "Source"):
+                table.add_column(column, justify="right" if column in ("Line", "Count", "%") else "left")
+            for row in profiler.line_report(args.top):
+                table.add_row(str(row["line"]), f"{row['count']:,}", f"{row['count'] * 100 / total:.1f}", row["source"])
+            console.print(table)
+
+        if args.collapsed:
+            profiler.write_collapsed(args.collapsed)
+            console.print(f"📄 Collapsed stacks written to [green]{args.collapsed}[/]")
         return
 
-    if args.command == "run":
+    if args.command == "export":
+        from bf16module.utilities.bench.bf16bench import BF16bench
+        from bf16module.utilities.export.bf16export import BF16exporter, format_for
+        BF16bench.init_headless()
+        color = resolve_color(args.color)
+        try:
+            runtime.program, meta = load_program(args.filename, compiler, args.optimize, cache, args.debug)
+            recording = None
+            if args.replay:
+                from bf16module.utilities.input.bf16replay import BF16recording
+                recording = BF16recording.load(args.replay)
+        except Exception as e:
+            console.print(Panel(str(e), title="💥 Load Error", style="red"))
+            return
+        if meta.get("color_mode") is not None:
+            color = resolve_color(meta["color_mode"], base_dir=os.path.dirname(args.filename))
+        runtime.reset()
+        apply_meta(runtime, meta)
+        install_input(runtime, args.keys or [0])
+        if recording is not None:
+            from bf16module.utilities.input.bf16replay import BF16replay
+            BF16replay(runtime, recording)
+
+        try:
+            exporter = BF16exporter(args.output, args.format or format_for(args.output), color.table,
+                                    scale=args.scale, fps=args.fps, audio_path=args.audio)
+        except ValueError as e:
+            console.print(f"[bold red]❌ {e}[/]")
+            return
+        width, height = exporter.size
+        console.print(f"🎬 [bold blue]Exporting[/] '{args.filename}' → [green]{args.output}[/] "
+                      f"({exporter.fmt}, {width}x{height} @ {args.fps} FPS)")
+        exporter.start()
+        program_size = len(runtime.program)
+        start = time.perf_counter()
         try:
-            color = getattr(BF16color, args.color.lower())
-            if not callable(color):
-                raise AttributeError
-        except AttributeError:
-            available = [m for m in dir(BF16color) if not m.startswith("_")]
-            console.print(f"[bold red]❌ Unknown color mode:[/] {args.color}")
-            console.print(f"[yellow]Available modes:[/] {', '.join(available)}")
-            color = BF16color.rgb332
+            while runtime.frames < args.frames and runtime.cursor < program_size:
+                drawn = runtime.frames
+                runtime.run_program(None, color)
+                if runtime.frames != drawn:
+                    exporter.add_frame(runtime.memory[:256], runtime.memory[runtime.address])
+        finally:
+            run_time = time.perf_counter() - start
+            try:
+                result = exporter.close()
+            except RuntimeError as e:
+                console.print(Panel(str(e), title="💥 Export Failed", style="red"))
+                return
+        total = time.perf_counter() - start
+
+        console.print(Panel.fit(
+            f"✅ {result['frames']} frames → [green]{args.output}[/]"
+            + (f", {result['notes']} note changes → [green]{args.audio}[/]" if args.audio else "") + "\n"
+            f"⏱️ interpreter {run_time:.2f} s ({runtime.tick / run_time if run_time else 0:,.0f} instructions/s, "
+            f"{exporter.blocked:.2f} s waiting on the encoder), total {total:.2f} s"
+            + (f"\n🎞️ ffmpeg -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r {args.fps} -i {args.output} out.mp4"
+               if exporter.fmt == "raw" else ""),
+            title="Export Done", box=box.ROUNDED, style="green"))
+        return
+
+    if args.command == "replay":
+        from bf16module.utilities.bench.bf16bench import BF16bench
+        from bf16module.utilities.input.bf16replay import BF16recording, BF16replay
+        BF16bench.init_headless()
+        color = resolve_color(args.color)
+        try:
+            recording = BF16recording.load(args.recording)
+            runtime.program, meta = load_program(args.filename, compiler, args.optimize, cache, args.debug)
+        except Exception as e:
+            console.print(Panel(str(e), title="💥 Load Error", style="red"))
+            return
+        runtime.reset()
+        apply_meta(runtime, meta)
+        replay = BF16replay(runtime, recording)
+        stats = BF16bench.run(runtime, replay.frames, color)
+        stats.update(program=args.filename, recording=args.recording, verified=replay.verified,
+                     mismatches=replay.mismatches, desyncs=replay.desyncs, ok=replay.ok)
+
+        table = Table(title=f"🎞️ Replay: {args.recording}", box=box.ROUNDED)
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", justify="right", style="green")
+        table.add_row("Frames verified", f"{replay.verified} / {replay.frames}")
+        table.add_row("Inputs replayed", f"{replay.position} / {len(recording.inputs)}")
+        table.add_row("Hash mismatches", str(len(replay.mismatches)) +
+                      (f" (first at frame {replay.mismatches[0]})" if replay.mismatches else ""))
+        table.add_row("Input desyncs", str(replay.desyncs))
+        table.add_row("Ticks", f"{stats['ticks']:,}")
+        table.add_row("Wall time", f"{stats['seconds']:.3f} s")
+        table.add_row("Instructions/s", f"{stats['ips']:,.0f}")
+        table.add_row("Frames/s", f"{stats['fps']:,.1f}")
+        console.print(table)
+        if replay.ok:
+            console.print("[bold green]✅ Replay matches the recording[/]")
+        else:
+            console.print("[bold red]❌ Replay diverged from the recording[/]")
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(stats, f, indent=2)
+        return
+
+    if args.command == "run":
+        color = resolve_color(args.color)
 
         pygame.init()
         screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
         pygame.display.set_caption("BF16")
         clock = pygame.time.Clock()
-        
+
         try:
-            if args.filename.endswith((".b", ".bf16")):
-                console.print(f"🧠 [bold blue]Compiling source[/] '{args.filename}'")
-                with open(args.filename, "rb") as f:
-                    source = f.read()
-                runtime.program = compiler.compile(source)
-            elif args.filename.endswith((".bin", ".bf16c")):
-                console.print(f"📦 [bold magenta]Loading binary[/] '{args.filename}'")
-                if compiler.is_v2_bin(args.filename):
-                    runtime.program, color_mode, app_name = compiler.read_bin_v2(args.filename)
-                    console.print(f"📘 App: [green]{app_name}[/], Color: [cyan]{color_mode}[/]")
-                    pygame.display.set_caption(f"BF16 - {app_name} | v2 compile runtime")
-                    try:
-                        color = getattr(BF16color, color_mode.lower())
-                    except AttributeError:
-                        color = BF16color.rgb332
-                else:
-                    runtime.program = compiler.read_bin(args.filename)
-            else:
-                console.print(f"[bold red]❌ Unsupported file type:[/] {args.filename}")
-                return
+            runtime.program, meta = load_program(args.filename, compiler, args.optimize, cache, args.debug)
         except Exception as e:
             console.print(Panel(str(e), title="💥 Load Error", style="red"))
             return
+        if meta.get("version") is not None:
+            app_name = meta.get("app_name") or os.path.basename(args.filename)
+            pygame.display.set_caption(f"BF16 - {app_name} | v{meta['version']} binary")
+        if meta.get("color_mode") is not None:
+            color = resolve_color(meta["color_mode"], base_dir=os.path.dirname(args.filename))
+
+        if args.prewarm_audio:
+            from bf16module.utilities.sound.bf16audio import BF16audio
+            BF16audio.prewarm("bass")
 
         runtime.reset()
+        apply_meta(runtime, meta)
+        try:
+            keymap = None
+            if args.keymap:
+                from bf16module.utilities.input.bf16input import BF16input
+                keymap = BF16input.parse_keymap(args.keymap)
+        except ValueError as e:
+            console.print(f"[bold red]❌ {e}[/]")
+            return
+        keys = install_input(runtime, args.keys, keymap)
+        if args.debug and runtime.engine == "compiled":
+            log_bounds(runtime.program)
+        worker = None
+        scheduler = None
+        recorder = None
+        rewind = None
+        checkpoint = args.checkpoint or os.path.splitext(args.filename)[0] + ".bf16s"
+        if args.worker and (args.record or args.rewind or args.resume):
+            console.print("[bold red]❌ --record, --rewind and --resume cannot be combined with --worker[/]")
+            return
+        if args.record and args.rewind:
+            console.print("[bold red]❌ --record cannot be combined with --rewind[/]")
+            return
+        if args.resume or args.rewind:
+            from bf16module.runtime.bf16rewind import BF16rewind
+        if args.resume:
+            try:
+                BF16rewind.load_checkpoint(runtime, checkpoint)
+            except (OSError, ValueError) as e:
+                console.print(Panel(str(e), title="💥 Checkpoint Error", style="red"))
+                return
+            runtime.redraw(screen, color)
+            console.log(f"💾 Resumed from [green]{checkpoint}[/] at frame {runtime.frames}")
+        if args.record:
+            from bf16module.utilities.input.bf16replay import BF16recorder
+            recorder = BF16recorder(runtime, meta={"source": os.path.basename(args.filename)})
+        if args.rewind:
+            rewind = BF16rewind(runtime, capacity=max(int(args.rewind * args.target_fps), 1))
+            rewind.capture()
+        if args.worker:
+            from bf16module.runtime.bf16worker import BF16worker
+            worker = BF16worker(runtime, color, capacity=args.frame_buffer, policy=args.frame_policy,
+                                source=keys.read)
+            worker.start()
+        elif args.scheduler or args.budget is not None or args.time_slice is not None:
+            from bf16module.runtime.bf16scheduler import BF16scheduler
+            try:
+                scheduler = BF16scheduler(runtime, target_fps=args.target_fps, budget=args.budget,
+                                          time_slice=args.time_slice / 1000 if args.time_slice is not None else None)
+            except ValueError as e:
+                console.print(f"[bold red]❌ {e}[/]")
+                return
+
         running = True
         while running:
             if PROGRAM_END:
@@ -145,18 +732,83 @@ def main():
                 break
             
             for event in pygame.event.get():
+                if keys.handle_event(event):
+                    continue
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.VIDEOEXPOSE and runtime.graphic_engine is not None:
+                    runtime.graphic_engine.invalidate()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5 and worker is None:
+                    from bf16module.runtime.bf16rewind import BF16rewind
+                    BF16rewind.save_checkpoint(runtime, checkpoint)
+                    console.log(f"💾 Checkpoint saved to [green]{checkpoint}[/] at frame {runtime.frames}")
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9 and worker is None:
+                    if recorder is not None:
+                        console.log("[yellow]Checkpoints cannot be loaded while recording[/]")
+                        continue
+                    from bf16module.runtime.bf16rewind import BF16rewind
+                    try:
+                        BF16rewind.load_checkpoint(runtime, checkpoint)
+                    except (OSError, ValueError) as e:
+                        console.log(f"[bold red]❌ {e}[/]")
+                        continue
+                    runtime.redraw(screen, color)
+                    console.log(f"💾 Checkpoint loaded from [green]{checkpoint}[/] at frame {runtime.frames}")
 
-            runtime.emit_event("tick")
-            runtime.run_program_threaded(screen, color=color)
-
-            if args.showfps:
-                runtime.draw_fps(screen, clock)
+            pressed = pygame.key.get_pressed() if rewind is not None else None
+            if pressed is not None and pressed[pygame.K_BACKSPACE]:
+                if rewind.rewind():
+                    runtime.redraw(screen, color)
+            elif pressed is not None and pressed[pygame.K_TAB]:
+                rewind.fast_forward(FAST_FORWARD_FRAMES, color)
+                runtime.redraw(screen, color)
+                runtime.update_note(runtime.memory[runtime.address])
+            elif scheduler is not None:
+                runtime.emit_event("tick")
+                if scheduler.run(screen, color, frame_work=clock.get_rawtime() / 1000) and rewind is not None:
+                    rewind.capture()
+            elif worker is None:
+                runtime.emit_event("tick")
+                drawn = runtime.frames
+                runtime.run_program_threaded(screen, color=color)
+                if rewind is not None and runtime.frames != drawn:
+                    rewind.capture()
+            else:
+                frame = worker.get()
+                if frame is not None:
+                    runtime.emit_event("tick")
+                    runtime.present(screen, frame.cells, frame.note, color, frame.index)
+                elif worker.done:
+                    if worker.error is not None:
+                        raise worker.error
+                    runtime.emit_event("program_end")
 
-            runtime.graphic_engine.update()
-            clock.tick(60)
+            if runtime.graphic_engine is not None:
+                if args.showfps:
+                    runtime.draw_fps(screen, clock)
+                runtime.graphic_engine.update()
+            clock.tick(args.target_fps)
 
+        if worker is not None:
+            worker.stop()
+            if worker.dropped:
+                console.log(f"[dim]Worker dropped {worker.dropped} frames ({args.frame_policy})[/]")
+        if recorder is not None:
+            recorder.save(args.record)
+            console.log(f"🎞️ Recorded {len(recorder.recording.inputs)} inputs over "
+                        f"{len(recorder.recording.hashes)} frames to [green]{args.record}[/]")
+        if args.debug:
+            stats = keys.stats()
+            console.log(f"[dim]Input: {stats['reads']:,} reads, {stats['changes']} key changes, latency "
+                        f"{stats['latency_ms']:.2f} ms mean, {stats['latency_max_ms']:.2f} ms max (event to ',' read)[/]")
+            console.log(f"[dim]Changed cells: {runtime.stats()['changed_cells_per_frame']:.1f}/256 per frame[/]")
+        if rewind is not None and args.debug:
+            stats = rewind.stats()
+            console.log(f"[dim]Rewind: {stats['frames']} frames held in {stats['bytes'] / 1024:,.0f} KiB, "
+                        f"snapshot {stats['capture_ms']:.3f} ms/frame, restore {stats['restore_ms']:.3f} ms[/]")
+        if scheduler is not None and args.debug:
+            console.log(f"[dim]Scheduler: {scheduler.pauses} paused frames, "
+                        f"{scheduler.ips:,.0f} instructions/s, last budget {runtime.budget:,}[/]")
         pygame.quit()
 
 if __name__ == "__main__":
@@ -165,6 +817,9 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         console.print("\n[bold yellow]👋 Program interrupted by user.[/]")
         sys.exit(0)
-    except pygame.error as e:
+    except Exception as e:
+        pygame = sys.modules.get("pygame")  # only loaded by commands that use it
+        if pygame is None or not isinstance(e, pygame.error):
+            raise
         console.print(f"[bold red]💥 Pygame error:[/] {e}")
         sys.exit(1)
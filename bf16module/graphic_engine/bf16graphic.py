@@ -1,17 +1,86 @@
 import pygame
+from collections import OrderedDict
+
+# Whether the font cache is registered to clear on pygame.quit(); pygame drops its quit callbacks once they run.
+_quit_registered = False
+
+
+def _clear_on_quit():
+    global _quit_registered
+    _quit_registered = False
+    BF16graphic.clear_text_cache()
+
 
 class BF16graphic:
     WIDTH = 16
     HEIGHT = 16
     PIXEL_SCALE = 32  # 16 * 32 = 512
+    FONT_NAME = "Arial"
+    TEXT_CACHE_LIMIT = 256  # rendered text surfaces kept
 
-    def __init__(self, screen: pygame.Surface):
+    # Fonts keyed by (name, size), loaded once: SysFont scans the system fonts on every call.
+    _fonts: dict[tuple[str, int], pygame.font.Font] = {}
+    # Rendered text keyed by (text, size, colour, background, font name), least recently used first.
+    _text_cache: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+    _text_hits = 0
+    _text_misses = 0
+
+    def __init__(self, screen: pygame.Surface, dirty_rects: bool = False):
+        """
+        With dirty_rects, update() only pushes the regions passed to invalidate()
+        or invalidate_cells() since the last update, instead of flipping the whole window.
+        """
         self.screen = screen
+        self.dirty_rects = dirty_rects
+        self._dirty: list[pygame.Rect] | None = None  # None: the whole screen
 
     def clear(self):
         self.screen.fill((0, 0, 0))
+        self.invalidate()
         self.update()
 
+    def invalidate(self, rect: pygame.Rect | None = None):
+        """Mark a screen region (default: everything) to be pushed on the next update()."""
+        if not self.dirty_rects:
+            return
+        if rect is None:
+            self._dirty = None
+        elif self._dirty is not None:
+            self._dirty.append(pygame.Rect(rect))
+
+    def invalidate_cells(self, cells: list[int]):
+        """Mark framebuffer cells (indices 0-255) dirty, merged into as few rectangles as possible."""
+        if not self.dirty_rects or self._dirty is None:
+            return
+        scale = self.PIXEL_SCALE
+        for x, y, w, h in self.merge_cells(cells):
+            self._dirty.append(pygame.Rect(x * scale, y * scale, w * scale, h * scale))
+
+    @classmethod
+    def merge_cells(cls, cells: list[int]) -> list[tuple[int, int, int, int]]:
+        """
+        Merge sorted cell indices into (x, y, w, h) rectangles in cell units:
+        horizontal runs per row first, then runs with the same span on consecutive rows.
+        """
+        runs = []
+        for index in cells:
+            y, x = divmod(index, cls.WIDTH)
+            if runs and runs[-1][1] == y and runs[-1][0] + runs[-1][2] == x:
+                runs[-1][2] += 1
+            else:
+                runs.append([x, y, 1])
+
+        rects = []
+        open_rects: dict[tuple[int, int], list[int]] = {}
+        for x, y, w in runs:
+            rect = open_rects.get((x, w))
+            if rect is not None and rect[1] + rect[3] == y:
+                rect[3] += 1
+            else:
+                rect = open_rects[(x, w)] = [x, y, w, 1]
+                rects.append(rect)
+        return [tuple(rect) for rect in rects]
+
     def draw_grid(self, color=(40, 40, 40)):
         for x in range(self.WIDTH):
             pygame.draw.line(
@@ -31,16 +100,63 @@ class BF16graphic:
     def draw_box(self, x, y, width, height, color=(255, 255, 255)):
         pygame.draw.rect(self.screen, color, (x, y, width, height))
 
-    def draw_text(self, text: str, x: int, y: int, color=(255, 255, 255), font_size=18):
-        font = pygame.font.SysFont("Arial", font_size)
-        text_surface = font.render(text, True, color)
-        self.screen.blit(text_surface, (x, y))
+    @staticmethod
+    def font(size: int, name: str | None = None) -> pygame.font.Font:
+        """The font registry: each (name, size) is looked up and loaded once."""
+        global _quit_registered
+        if not pygame.font.get_init():
+            BF16graphic.clear_text_cache()
+            pygame.font.init()
+        key = (name or BF16graphic.FONT_NAME, size)
+        font = BF16graphic._fonts.get(key)
+        if font is None:
+            if not _quit_registered:
+                # Fonts do not survive pygame.quit(); start over after it.
+                pygame.register_quit(_clear_on_quit)
+                _quit_registered = True
+            font = BF16graphic._fonts[key] = pygame.font.SysFont(key[0], size)
+        return font
+
+    @staticmethod
+    def render_text(text: str, size: int = 18, color=(255, 255, 255), background=None,
+                    name: str | None = None) -> pygame.Surface:
+        """Rendered text from the LRU cache, so text that does not change costs only a blit."""
+        key = (text, size, tuple(color), tuple(background) if background is not None else None, name)
+        cache = BF16graphic._text_cache
+        surface = cache.get(key)
+        if surface is not None:
+            cache.move_to_end(key)
+            BF16graphic._text_hits += 1
+            return surface
+        surface = cache[key] = BF16graphic.font(size, name).render(text, True, color, background)
+        BF16graphic._text_misses += 1
+        while len(cache) > BF16graphic.TEXT_CACHE_LIMIT:
+            cache.popitem(last=False)
+        return surface
+
+    @staticmethod
+    def clear_text_cache():
+        """Drop all fonts and rendered text."""
+        BF16graphic._fonts.clear()
+        BF16graphic._text_cache.clear()
+
+    @staticmethod
+    def text_cache_stats() -> dict:
+        return {"entries": len(BF16graphic._text_cache), "fonts": len(BF16graphic._fonts),
+                "hits": BF16graphic._text_hits, "misses": BF16graphic._text_misses}
+
+    def draw_text(self, text: str, x: int, y: int, color=(255, 255, 255), font_size=18, background=None) -> pygame.Rect:
+        return self.screen.blit(self.render_text(text, font_size, color, background), (x, y))
 
     def draw_line(self, x1, y1, x2, y2, color=(255, 255, 255), width=1):
         pygame.draw.line(self.screen, color, (x1, y1), (x2, y2), width)
 
     def update(self):
-        pygame.display.flip()
+        if not self.dirty_rects or self._dirty is None:
+            pygame.display.flip()
+        elif self._dirty:
+            pygame.display.update(self._dirty)
+        self._dirty = []
 
     class THREED:
         def draw_cube(self, screen, x, y, z, size, color=(255, 255, 255)):
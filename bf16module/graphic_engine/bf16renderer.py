@@ -0,0 +1,47 @@
+import pygame
+import numpy as np
+from typing import Callable
+
+
+class BF16renderer:
+    """
+    Vectorized framebuffer renderer. Views memory[0:256] as a 16x16 uint8 array,
+    maps it through a colour lookup table in one step, writes it into a 16x16
+    surface with pygame.surfarray and scales that onto the screen in one go.
+    """
+    WIDTH = 16
+    HEIGHT = 16
+
+    def __init__(self, screen: pygame.Surface):
+        self.screen = screen
+        self.frame = pygame.Surface((self.WIDTH, self.HEIGHT), 0, screen)
+        self._luts: dict[Callable, np.ndarray] = {}
+
+    @staticmethod
+    def build_lut(color: Callable[[int], tuple[int, int, int]]) -> np.ndarray:
+        """Evaluate a colour function for all 256 values into a (256, 3) uint8 table."""
+        table = np.array([color(val) for val in range(256)], dtype=np.float64)
+        return np.clip(table, 0, 255).astype(np.uint8)
+
+    def lut(self, color: Callable[[int], tuple[int, int, int]]) -> np.ndarray:
+        """Lookup table for a colour: a BF16palette's own table, else built once and cached."""
+        table = getattr(color, "table", None)
+        if table is not None:
+            return table
+        table = self._luts.get(color)
+        if table is None:
+            table = self._luts[color] = self.build_lut(color)
+        return table
+
+    @staticmethod
+    def cells(memory) -> np.ndarray:
+        """The 256 framebuffer cells as a flat uint8 array (zero-copy for bytearray tapes)."""
+        if isinstance(memory, list):
+            return np.array(memory[:256], dtype=np.uint8)
+        return np.frombuffer(memory, dtype=np.uint8, count=256)
+
+    def draw(self, memory, color: Callable[[int], tuple[int, int, int]]):
+        pixels = self.lut(color)[self.cells(memory).reshape(self.HEIGHT, self.WIDTH)]
+        # surfarray indexes surfaces as [x][y], the tape is row-major [y][x]
+        pygame.surfarray.blit_array(self.frame, pixels.transpose(1, 0, 2))
+        pygame.transform.scale(self.frame, self.screen.get_size(), self.screen)
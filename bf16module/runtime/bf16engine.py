@@ -0,0 +1,424 @@
+from typing import Callable
+
+from bf16module.utilities.error.bf16error import BF16error
+from bf16module.utilities.compile.bf16compile import (
+    BF16compile, OP_ADD_AT, OP_MULADD, OP_CLEAR, OP_SCAN_RIGHT, OP_SCAN_LEFT, unpack_offset_arg,
+)
+
+_OPTIMIZED_OPS = (OP_ADD_AT, OP_MULADD, OP_CLEAR, OP_SCAN_RIGHT, OP_SCAN_LEFT)
+
+# CPython refuses more than 20 statically nested blocks per function, so
+# loops nested deeper than this are hoisted into their own functions.
+MAX_NESTING = 12
+
+
+def scan_right(memory, address: int, step: int, last: int) -> int:
+    """Pointer after `while m[p]: p += step`, stopping at the tape end."""
+    window = 64 * step
+    while address <= last:
+        # Search growing strided slices at C speed instead of stepping in Python.
+        chunk = memory[address:min(address + window, last + 1):step]
+        try:
+            return address + chunk.index(0) * step
+        except ValueError:
+            address += len(chunk) * step
+            window *= 8
+    return last
+
+
+def scan_left(memory, address: int, step: int) -> int:
+    """Pointer after `while m[p]: p -= step`, stopping at the tape start."""
+    window = 64 * step
+    while address >= 0:
+        stop = address - window
+        chunk = memory[address:stop if stop >= 0 else None:-step]
+        try:
+            return address - chunk.index(0) * step
+        except ValueError:
+            address -= len(chunk) * step
+            window *= 8
+    return 0
+
+
+class _Loop:
+    __slots__ = ("idx", "close", "body")
+
+    def __init__(self, idx: int):
+        self.idx = idx
+        self.close = idx
+        self.body: list = []
+
+
+class _Op:
+    __slots__ = ("idx", "op", "arg")
+
+    def __init__(self, idx: int, op: int, arg: int):
+        self.idx = idx
+        self.op = op
+        self.arg = arg
+
+
+class _Source:
+    """Line buffer for the generated module, one buffer per function."""
+
+    def __init__(self):
+        self.functions: list[list[str]] = []
+        self.stack: list[list[str]] = []
+        self.level = 0
+        self.pending_ticks = 0
+
+    def begin(self, header: str):
+        self.stack.append((self.level, [header]))
+        self.level = 1
+
+    def end(self):
+        level, lines = self.stack.pop()
+        self.functions.append(lines)
+        self.level = level
+
+    def line(self, text: str):
+        self.stack[-1][1].append("    " * self.level + text)
+
+    def tick(self, count: int = 1):
+        self.pending_ticks += count
+
+    def flush(self):
+        if self.pending_ticks:
+            self.line(f"t += {self.pending_ticks}")
+            self.pending_ticks = 0
+
+    def render(self) -> str:
+        return "\n".join("\n".join(lines) for lines in self.functions) + "\n"
+
+
+class BF16engine:
+    """
+    Translates a compiled BF16 program into specialized Python source once.
+    Memory, pointer and tick counter live in locals; the generated code is a
+    generator that yields True on every '.' so the runtime can draw the frame.
+    With budget=True it also checks rt.tick_limit at every loop back-edge and
+    yields False there once the limit is reached, parked on the loop's ']'.
+    With profile=True every instruction also counts its executions in rt.profile.
+
+    Pointer clamping is elided where BF16compile.analyze_bounds proves it cannot
+    fire: a balanced loop, or a straight-line block, checks the pointer range it
+    touches once on entry and runs an unchecked copy when that range is on the
+    tape, falling back to the checked copy near the tape edges.
+    """
+
+    def __init__(self, program: list[int], memory_size: int, track_stats: bool = False,
+                 hooks: frozenset[str] = frozenset(), budget: bool = False, profile: bool = False):
+        self.program = program
+        self.memory_size = memory_size
+        self.track_stats = track_stats
+        # Event hooks (loop_entered, input_read) are only emitted into the code when subscribed
+        self.hooks = hooks
+        self.budget = budget
+        self.profile = profile
+        self.options = (memory_size, track_stats, hooks, budget, profile)
+        # Runtime state held in locals between yields: memory, pointer, ticks and,
+        # with track_stats, checksum (s), nonzero count (z) and highest address (h),
+        # with budget, the tick limit (l), with profile, the execution counters (c).
+        self._state = "m, p, t, s, z, h" if track_stats else "m, p, t"
+        if budget:
+            self._state += ", l"
+        if profile:
+            self._state += ", c"
+        self.tree = self._parse()
+        self.bounds = BF16compile.analyze_bounds(program)
+        self._unchecked = False  # emitting inside a range-checked loop or block
+        self._guards = True      # False inside the checked fallback copies, so code size stays linear
+        self._entries: dict[int, Callable] = {}
+
+    def start(self, runtime):
+        """Return a frame generator that resumes execution at runtime.cursor."""
+        cursor = runtime.cursor
+        entry = self._entries.get(cursor)
+        if entry is None:
+            entry = self._entries[cursor] = self._build(cursor)
+        return entry(runtime)
+
+    def source(self, cursor: int = 0) -> str:
+        """Return the generated Python source for an entry point (for debugging)."""
+        return self._generate(cursor)
+
+    # === Parsing ===
+
+    def _parse(self) -> list:
+        root: list = []
+        stack: list[_Loop] = []
+        body = root
+        program = self.program
+        for idx in range(0, len(program) - 1, 2):
+            op = program[idx]
+            if op == ord('['):
+                loop = _Loop(idx)
+                body.append(loop)
+                stack.append(loop)
+                body = loop.body
+            elif op == ord(']'):
+                if not stack:
+                    raise BF16error(f"unmatched ] at program index {idx}")
+                loop = stack.pop()
+                loop.close = idx
+                body = stack[-1].body if stack else root
+            elif op in b'><+-.,?' or op in _OPTIMIZED_OPS:
+                body.append(_Op(idx, op, program[idx + 1]))
+            else:
+                raise BF16error(f"unsupported opcode {op} at program index {idx}")
+        if stack:
+            raise BF16error(f"unmatched [ at program index {stack[-1].idx}")
+        return root
+
+    def _path(self, cursor: int) -> list[_Loop]:
+        """Loops (outermost first) whose body contains `cursor`."""
+        path = []
+        nodes = self.tree
+        while True:
+            for node in nodes:
+                if isinstance(node, _Loop) and node.idx < cursor <= node.close:
+                    path.append(node)
+                    nodes = node.body
+                    break
+            else:
+                return path
+
+    @staticmethod
+    def _has_yield(nodes: list) -> bool:
+        for node in nodes:
+            if isinstance(node, _Loop):
+                if BF16engine._has_yield(node.body):
+                    return True
+            elif node.op == ord('.'):
+                return True
+        return False
+
+    # === Code generation ===
+
+    def _build(self, cursor: int) -> Callable:
+        namespace = {"print": print, "scan_right": scan_right, "scan_left": scan_left}
+        code = compile(self._generate(cursor), f"<bf16 program @{cursor}>", "exec")
+        exec(code, namespace)
+        return namespace["_bf16_entry"]
+
+    def _generate(self, cursor: int) -> str:
+        if cursor % 2 or not 0 <= cursor <= len(self.program):
+            raise BF16error(f"cannot resume at program index {cursor}")
+
+        src = _Source()
+        src.begin("def _bf16_entry(rt):")
+        src.line(self._load())
+        src.line("if False: yield  # always a generator, even without '.'")
+
+        # Resuming inside loops: finish the interrupted iteration of each
+        # enclosing loop (innermost first), then keep looping as usual.
+        pos = cursor
+        for loop in reversed(self._path(cursor)):
+            self._emit_body(src, [n for n in loop.body if n.idx >= pos], 1)
+            self._emit_count(src, loop.close)
+            src.tick(1)  # ']'
+            self._emit_while(src, loop, 1, entered=False)
+            pos = loop.close + 2
+        self._emit_body(src, [n for n in self.tree if n.idx >= pos], 1)
+
+        src.flush()
+        src.line(self._store(len(self.program)))
+        src.end()
+        return src.render()
+
+    def _load(self) -> str:
+        line = "m = rt.memory; p = rt.address; t = rt.tick"
+        if self.track_stats:
+            line += "; s = rt.checksum; z = rt.nonzero; h = rt.max_address"
+        if self.budget:
+            line += "; l = rt.tick_limit"
+        if self.profile:
+            line += "; c = rt.profile"
+        return line
+
+    def _store(self, cursor: int) -> str:
+        line = f"rt.address = p; rt.tick = t; rt.cursor = {cursor}"
+        if self.track_stats:
+            line += "; rt.checksum = s; rt.nonzero = z; rt.max_address = h"
+        return line
+
+    def _emit_write(self, src: _Source, index: str, value: Callable[[str], str]):
+        """Emit m[index] = value(old cell expression), keeping statistics if enabled."""
+        if not self.track_stats:
+            src.line(f"m[{index}] = {value(f'm[{index}]')}")
+            return
+        src.line(f"o = m[{index}]; n = {value('o')}; m[{index}] = n")
+        src.line("s += n - o; z += (n != 0) - (o != 0)")
+
+    def _emit_count(self, src: _Source, idx: int):
+        if self.profile:
+            src.line(f"c[{idx}] += 1")
+
+    def _emit_high_water(self, src: _Source, index: str):
+        if self.track_stats:
+            src.line(f"if {index} > h: h = {index}")
+
+    def _guard(self, lo: int, hi: int) -> str | bool:
+        """Condition under which offsets lo..hi from p are all on the tape (True: always, False: never)."""
+        last = self.memory_size - 1
+        if hi > last or -lo > last:
+            return False
+        parts = ([f"p >= {-lo}"] if lo < 0 else []) + ([f"p <= {last - hi}"] if hi > 0 else [])
+        return " and ".join(parts) or True
+
+    def _emit_guarded(self, src: _Source, lo: int, hi: int, emit: Callable[[], None]):
+        """Emit code once unchecked behind a range check and once checked as the fallback."""
+        guard = self._guard(lo, hi) if self._guards and not self._unchecked else False
+        if guard is True or self._unchecked:
+            unchecked, self._unchecked = self._unchecked, True
+            emit()
+            self._unchecked = unchecked
+            return
+        if guard is False:
+            emit()
+            return
+        # Both copies start with the same pending ticks, so the guard adds no 't +=' of its own.
+        pending = src.pending_ticks
+        src.line(f"if {guard}:")
+        src.level += 1
+        self._unchecked = True
+        emit()
+        src.flush()
+        self._unchecked = False
+        src.level -= 1
+        src.line("else:")
+        src.level += 1
+        src.pending_ticks = pending
+        self._guards = False
+        emit()
+        src.flush()
+        self._guards = True
+        src.level -= 1
+
+    def _emit_body(self, src: _Source, nodes: list, depth: int):
+        blocks = self.bounds["blocks"]
+        i = 0
+        while i < len(nodes):
+            node = nodes[i]
+            if isinstance(node, _Loop):
+                self._emit_count(src, node.idx)
+                src.tick(1)  # '['
+                self._emit_while(src, node, depth)
+            elif node.idx in blocks and not self._unchecked and self._guards:
+                end, lo, hi = blocks[node.idx]
+                j = i
+                while j < len(nodes) and isinstance(nodes[j], _Op) and nodes[j].idx <= end:
+                    j += 1
+                run = nodes[i:j]
+                self._emit_guarded(src, lo, hi, lambda: [self._emit_op(src, op) for op in run])
+                i = j
+                continue
+            else:
+                self._emit_op(src, node)
+            i += 1
+
+    def _emit_while(self, src: _Source, loop: _Loop, depth: int, entered: bool = True):
+        if entered and "loop_entered" in self.hooks:
+            # Like the interpreter, hooks see the tick count before '[' itself is counted.
+            src.pending_ticks -= 1
+            src.flush()
+            src.line("if m[p]:")
+            src.line("    " + self._store(loop.idx) + f"; rt.emit_event('loop_entered', {loop.idx})")
+            src.tick(1)
+        src.flush()
+        bounds = self.bounds["loops"].get(loop.idx)
+        if bounds is None:
+            self._emit_loop(src, loop, depth)
+        else:
+            self._emit_guarded(src, *bounds, lambda: self._emit_loop(src, loop, depth))
+
+    def _emit_loop(self, src: _Source, loop: _Loop, depth: int):
+        if depth >= MAX_NESTING:
+            name = f"_bf16_loop_{loop.idx}" + ("u" if self._unchecked else "")
+            call = f"{name}(rt, {self._state})"
+            if self.budget or self._has_yield(loop.body):
+                call = "yield from " + call
+            src.line(f"{self._state} = {call}")
+            src.begin(f"def {name}(rt, {self._state}):")
+            src.line("while m[p]:")
+            src.level += 1
+            self._emit_body(src, loop.body, 2)
+            self._emit_back_edge(src, loop)
+            src.level -= 1
+            src.line(f"return {self._state}")
+            src.end()
+            return
+
+        src.line("while m[p]:")
+        src.level += 1
+        self._emit_body(src, loop.body, depth + 1)
+        self._emit_back_edge(src, loop)
+        src.level -= 1
+
+    def _emit_back_edge(self, src: _Source, loop: _Loop):
+        """End of a loop body: the ']' tick, preceded by the budget check if enabled."""
+        src.flush()
+        if self.budget:
+            # Pause on the ']' before it is counted, exactly where the interpreter stops.
+            src.line("if t >= l and m[p]:")
+            src.line(f"    {self._store(loop.close)}; yield False; {self._load()}")
+        self._emit_count(src, loop.close)
+        src.tick(1)  # ']'
+        src.flush()
+
+    def _emit_op(self, src: _Source, node: _Op):
+        op, arg = node.op, node.arg
+        last = self.memory_size - 1
+        self._emit_count(src, node.idx)
+        if op == ord('>'):
+            src.line(f"p += {arg}")
+            if not self._unchecked:
+                src.line(f"if p > {last}: p = {last}")
+            self._emit_high_water(src, "p")
+        elif op == ord('<'):
+            src.line(f"p -= {arg}")
+            if not self._unchecked:
+                src.line("if p < 0: p = 0")
+        elif op == ord('+'):
+            self._emit_write(src, "p", lambda old: f"({old} + {arg}) & 255")
+        elif op == ord('-'):
+            self._emit_write(src, "p", lambda old: f"({old} - {arg}) & 255")
+        elif op == OP_CLEAR:
+            self._emit_write(src, "p", lambda old: "0")
+        elif op == OP_ADD_AT or op == OP_MULADD:
+            offset, value = unpack_offset_arg(arg)
+            target = f"p + {offset}" if offset > 0 else f"p - {-offset}"
+            if self._unchecked and not (self.track_stats and offset > 0):
+                index = target
+            else:
+                index = "q"
+                src.line(f"q = {target}")
+                if offset > 0:
+                    if not self._unchecked:
+                        src.line(f"if q > {last}: q = {last}")
+                    self._emit_high_water(src, "q")
+                elif not self._unchecked:
+                    src.line("if q < 0: q = 0")
+            amount = value if op == OP_ADD_AT else f"m[p] * {value}"
+            self._emit_write(src, index, lambda old: f"({old} + {amount}) & 255")
+        elif op == OP_SCAN_RIGHT:
+            src.line(f"p = scan_right(m, p, {arg}, {last})")
+            self._emit_high_water(src, "p")
+        elif op == OP_SCAN_LEFT:
+            src.line(f"p = scan_left(m, p, {arg})")
+        elif op == ord(','):
+            # Input sources (recorders, replays) tag reads with the tick, so keep it current.
+            src.flush()
+            src.line("rt.tick = t")
+            self._emit_write(src, "p", lambda old: "rt.last_key_state = rt.read_input()")
+            if "input_read" in self.hooks:
+                src.line("rt.emit_event('input_read', rt.last_key_state)")
+        elif op == ord('?'):
+            src.line("print('🧠 memory[' + str(p) + '] = ' + str(m[p]))")
+        elif op == ord('.'):
+            src.flush()
+            src.line(self._store(node.idx + 2))
+            src.line("yield True")
+            src.line(self._load())
+            return
+        src.tick(1)
@@ -0,0 +1,56 @@
+from typing import Callable
+
+
+class BF16events:
+    """
+    Event bus indexed by event name. Handlers run in priority order (higher
+    first, then registration order); emitting an event nobody listens to is a
+    single dict lookup. Each event can be switched off without unregistering.
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, list[tuple[int, int, Callable]]] = {}
+        self._disabled: set[str] = set()
+        self._order = 0
+
+    def register(self, event_name: str, callback: Callable, priority: int = 0):
+        self._order += 1
+        handlers = self._handlers.setdefault(event_name, [])
+        handlers.append((-priority, self._order, callback))
+        handlers.sort(key=lambda h: (h[0], h[1]))
+
+    def unregister(self, event_name: str, callback: Callable) -> bool:
+        """Remove a callback; returns False if it was not registered."""
+        handlers = self._handlers.get(event_name)
+        if not handlers:
+            return False
+        for i, (_, _, registered) in enumerate(handlers):
+            if registered == callback:
+                del handlers[i]
+                if not handlers:
+                    del self._handlers[event_name]
+                return True
+        return False
+
+    def set_enabled(self, event_name: str, enabled: bool = True):
+        if enabled:
+            self._disabled.discard(event_name)
+        else:
+            self._disabled.add(event_name)
+
+    def enabled(self, event_name: str) -> bool:
+        """True if the event has handlers and is not disabled."""
+        return event_name in self._handlers and event_name not in self._disabled
+
+    def enabled_among(self, event_names) -> frozenset[str]:
+        return frozenset(name for name in event_names if self.enabled(name))
+
+    def emit(self, event_name: str, *args, **kwargs):
+        handlers = self._handlers.get(event_name)
+        if not handlers or event_name in self._disabled:
+            return
+        for _, _, callback in tuple(handlers):
+            try:
+                callback(*args, **kwargs)
+            except Exception as e:
+                print(f"[event error] {event_name}: {e}")
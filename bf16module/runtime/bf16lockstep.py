@@ -0,0 +1,237 @@
+import numpy as np
+from typing import Callable
+
+from bf16module.utilities.options.bf16options import MEMORY_SIZE
+from bf16module.utilities.compile.bf16compile import (
+    OP_ADD_AT, OP_MULADD, OP_CLEAR, OP_SCAN_RIGHT, OP_SCAN_LEFT, unpack_offset_arg,
+)
+
+
+def _scan(memory: np.ndarray, base: np.ndarray, pointers: np.ndarray, step: int, last: int) -> np.ndarray:
+    """
+    Vectorized `while m[p]: p += step` for every row, with the interpreter's clamping:
+    a scan that finds no zero before the tape end stops at the end. Rows are searched
+    in growing windows, so long scans cost a few gathers instead of one per cell.
+    """
+    pointers = pointers.copy()
+    pending = np.flatnonzero(memory[base + pointers])
+    edge = last if step > 0 else 0
+    width = 16
+    while pending.size:
+        cols = np.clip(pointers[pending, None] + step * np.arange(1, width + 1), 0, last)
+        zero = memory[base[pending, None] + cols] == 0
+        found = zero.any(axis=1)
+        hit = pending[found]
+        pointers[hit] = cols[found, zero[found].argmax(axis=1)]
+        ends = cols[:, -1]
+        at_edge = ~found & (ends == edge)
+        pointers[pending[at_edge]] = edge
+        still = ~found & ~at_edge
+        pointers[pending[still]] = ends[still]
+        pending = pending[still]
+        width *= 4
+    return pointers
+
+
+class BF16lockstep:
+    """
+    Runs one compiled program on many tapes at once. Memory is a 2-D uint8 matrix
+    (instances x tape) with per-instance pointer, program counter, tick and frame
+    vectors, and every instruction is executed for a whole group of instances as
+    one NumPy operation.
+
+    Instances sharing a program counter form a group. When a '[' or ']' sends a
+    group two ways, the part that leaves the loop waits at its target and the
+    part that loops runs on; the group with the lowest program counter always
+    runs next, so waiting instances are rejoined as soon as the loopers exit.
+    Each run_frame() advances every instance to its next '.' (or program end)
+    and parks it there, so all instances stay on the same frame.
+
+    Instructions and ticks match BF16Runtime ('.' is not counted, the pointer
+    is clamped to the tape, '?' is counted but prints nothing). ',' reads
+    keys[i, frame] (the last column repeats) unless read_input is replaced by a
+    callable taking the instance indices and returning their key states.
+    """
+
+    def __init__(self, program: list[int], instances: int, memory_size: int = MEMORY_SIZE,
+                 keys: np.ndarray | list | None = None):
+        if instances < 1:
+            raise ValueError("Need at least one instance")
+        if memory_size < 256:
+            raise ValueError("Memory size must be at least 256 cells (the 16x16 framebuffer)")
+        self.program = program
+        self.instances = instances
+        self.memory_size = memory_size
+        self.memory = np.zeros((instances, memory_size), dtype=np.uint8)
+        self.pc = np.zeros(instances, dtype=np.int64)
+        self.pointer = np.zeros(instances, dtype=np.int64)
+        self.ticks = np.zeros(instances, dtype=np.int64)
+        self.frames = np.zeros(instances, dtype=np.int64)
+        self.last_key_state = np.zeros(instances, dtype=np.uint8)
+        self.keys = np.zeros((instances, 1), dtype=np.uint8) if keys is None else self._key_table(keys)
+        self.read_input: Callable[[np.ndarray], np.ndarray] = self._read_keys
+        self.steps = 0   # group instructions executed (NumPy operations, not per instance)
+        self.splits = 0  # times a group diverged at '[' or ']'
+
+    def _key_table(self, keys) -> np.ndarray:
+        if isinstance(keys, np.ndarray):
+            table = keys.astype(np.uint8).reshape(self.instances, -1)
+        else:
+            if len(keys) != self.instances:
+                raise ValueError(f"Got {len(keys)} key sequences for {self.instances} instances")
+            width = max(max((len(sequence) for sequence in keys), default=1), 1)
+            table = np.zeros((self.instances, width), dtype=np.uint8)
+            for i, sequence in enumerate(keys):
+                if len(sequence):
+                    table[i, :len(sequence)] = sequence
+                    table[i, len(sequence):] = sequence[-1]
+        if table.shape[1] == 0:
+            raise ValueError("Key table needs at least one column")
+        return table
+
+    def _read_keys(self, rows: np.ndarray) -> np.ndarray:
+        return self.keys[rows, np.minimum(self.frames[rows], self.keys.shape[1] - 1)]
+
+    @property
+    def done(self) -> np.ndarray:
+        """Instances that reached program end."""
+        return self.pc >= len(self.program)
+
+    def framebuffers(self) -> np.ndarray:
+        """The 256 framebuffer cells of every instance (instances x 256 copy)."""
+        return self.memory[:, :256].copy()
+
+    def run(self, frames: int, on_frame: Callable[["BF16lockstep", np.ndarray], None] | None = None) -> int:
+        """
+        Run up to `frames` frames (stops early when every instance has ended).
+        on_frame receives this object and the instances that drew in that frame.
+        Returns the number of frames run.
+        """
+        for count in range(frames):
+            drawn = self.run_frame()
+            if drawn is None:
+                return count
+            if on_frame is not None:
+                on_frame(self, drawn)
+        return frames
+
+    def run_frame(self) -> np.ndarray | None:
+        """
+        Advance every running instance to its next '.' or to program end. Returns the
+        indices of the instances that drew a frame, or None if all had already ended.
+        """
+        program = self.program
+        size = len(program)
+        live = np.flatnonzero(self.pc < size)
+        if not live.size:
+            return None
+        drawn_before = self.frames[live].copy()
+        pcs = self.pc[live]
+        waiting: dict[int, np.ndarray] = {int(value): live[pcs == value] for value in np.unique(pcs)}
+        while waiting:
+            cur = min(waiting)
+            self._run_group(cur, waiting.pop(cur), waiting)
+        return live[self.frames[live] != drawn_before]
+
+    def _run_group(self, cur: int, rows: np.ndarray, waiting: dict[int, np.ndarray]):
+        """Run one group until it draws, ends, or is overtaken by a waiting group with a lower pc."""
+        program = self.program
+        size = len(program)
+        memory = self.memory.reshape(-1)
+        last = self.memory_size - 1
+        base = rows * self.memory_size
+        pointers = self.pointer[rows]
+        steps = 0  # instructions run by every row of the group since its ticks were last stored
+        executed = 0
+        overtaken = False
+
+        while True:
+            if cur in waiting:
+                # Rows parked here by an earlier split rejoin the group.
+                self.ticks[rows] += steps
+                steps = 0
+                joined = waiting.pop(cur)
+                rows = np.concatenate((rows, joined))
+                base = rows * self.memory_size
+                pointers = np.concatenate((pointers, self.pointer[joined]))
+            if cur >= size:
+                break
+            cmd = program[cur]
+            arg = program[cur + 1]
+            executed += 1
+
+            if cmd == 62:  # '>'
+                pointers = np.minimum(pointers + arg, last)
+                cur += 2
+            elif cmd == 60:  # '<'
+                pointers = np.maximum(pointers - arg, 0)
+                cur += 2
+            elif cmd == 43:  # '+'
+                memory[base + pointers] += np.uint8(arg % 256)
+                cur += 2
+            elif cmd == 45:  # '-'
+                memory[base + pointers] -= np.uint8(arg % 256)
+                cur += 2
+            elif cmd == 91 or cmd == 93:  # '[' / ']'
+                steps += 1
+                zero = memory[base + pointers] == 0
+                if cmd == 91:
+                    skip, enter = cur + arg + 2, cur + 2
+                else:
+                    skip, enter = cur + 2, cur - arg + 2
+                if not zero.any():
+                    cur = enter
+                elif zero.all():
+                    cur = skip
+                    if waiting and min(waiting) < cur:
+                        overtaken = True  # jumped past a waiting group: let it catch up first
+                        break
+                else:
+                    # Diverged: the rows leaving the loop wait at `skip`, the rest loop on.
+                    self.splits += 1
+                    self.ticks[rows] += steps
+                    steps = 0
+                    leaving = rows[zero]
+                    self.pointer[leaving] = pointers[zero]
+                    self.pc[leaving] = skip
+                    waiting[skip] = np.concatenate((waiting[skip], leaving)) if skip in waiting else leaving
+                    staying = ~zero
+                    rows, base, pointers = rows[staying], base[staying], pointers[staying]
+                    cur = enter
+                continue
+            elif cmd == 46:  # '.'
+                cur += 2
+                self.frames[rows] += 1
+                break
+            elif cmd == 44:  # ','
+                values = np.asarray(self.read_input(rows), dtype=np.uint8)
+                memory[base + pointers] = values
+                self.last_key_state[rows] = values
+                cur += 2
+            elif cmd == OP_CLEAR:
+                memory[base + pointers] = 0
+                cur += 2
+            elif cmd == OP_ADD_AT or cmd == OP_MULADD:
+                offset, value = unpack_offset_arg(arg)
+                target = base + np.clip(pointers + offset, 0, last)
+                if cmd == OP_MULADD:
+                    memory[target] += memory[base + pointers] * np.uint8(value)
+                else:
+                    memory[target] += np.uint8(value)
+                cur += 2
+            elif cmd == OP_SCAN_RIGHT:
+                pointers = _scan(memory, base, pointers, arg, last)
+                cur += 2
+            elif cmd == OP_SCAN_LEFT:
+                pointers = _scan(memory, base, pointers, -arg, last)
+                cur += 2
+            else:  # '?' and unknown instructions only cost a tick here
+                cur += 2
+            steps += 1
+
+        self.ticks[rows] += steps
+        self.pointer[rows] = pointers
+        self.pc[rows] = cur
+        self.steps += executed
+        if overtaken:
+            waiting[cur] = np.concatenate((waiting[cur], rows)) if cur in waiting else rows
@@ -0,0 +1,204 @@
+import os
+import shutil
+import ctypes
+import hashlib
+import threading
+import subprocess
+from functools import lru_cache
+
+from bf16module.utilities.error.bf16error import BF16error
+from bf16module.utilities.compile.bf16cache import CACHE_DIR
+from bf16module.utilities.compile.bf16compile import (
+    OP_ADD_AT, OP_MULADD, OP_CLEAR, OP_SCAN_RIGHT, OP_SCAN_LEFT, unpack_offset_arg,
+)
+
+NATIVE_VERSION = 1
+CFLAGS = ("-O1", "-shared", "-fPIC")
+# Why bf16_run() returned
+STATUS_END, STATUS_FRAME, STATUS_INPUT, STATUS_PAUSE, STATUS_DEBUG = range(5)
+NO_LIMIT = (1 << 63) - 1
+
+_HEADER = """#include <stdint.h>
+typedef struct {{ int64_t pc, p, t, limit; }} bf16_state;
+#define LAST {last}
+#define YIELD(pc_, status) do {{ s->pc = (pc_); s->p = p; s->t = t; return (status); }} while (0)
+int bf16_run(bf16_state *s, uint8_t *m) {{
+    int64_t p = s->p, t = s->t;
+    const int64_t limit = s->limit;
+"""
+
+
+class BF16state(ctypes.Structure):
+    """Resumable machine state shared with bf16_run(): program index, pointer, ticks, tick limit."""
+    _fields_ = [("pc", ctypes.c_int64), ("p", ctypes.c_int64), ("t", ctypes.c_int64), ("limit", ctypes.c_int64)]
+
+
+@lru_cache(maxsize=None)
+def find_compiler() -> tuple[str, str] | None:
+    """(path, version line) of the C compiler named by $CC, or cc/gcc/clang; None if there is none."""
+    for name in filter(None, (os.environ.get("CC"), "cc", "gcc", "clang")):
+        path = shutil.which(name)
+        if path is None:
+            continue
+        try:
+            version = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        return path, version.partition("\n")[0]
+    return None
+
+
+class BF16native:
+    """
+    Translates a compiled program into one C function and runs it from a shared
+    object built with the system C compiler. Objects are cached by a hash of the
+    generated source and the compiler, so a program is only built once; a cold
+    build can run in a background thread while the host keeps using the Python
+    engine (see build() and ready).
+
+    bf16_run() executes on the runtime's tape in place and returns at every '.'
+    (STATUS_FRAME), before every ',' and '?' (the host reads input or prints, then
+    resumes after them), at budget pauses on a ']' back edge and at program end.
+    The program index, pointer and ticks travel in a BF16state, so drawing, input
+    and scheduling stay in the Python host loop. Execution resumes at any index
+    in resume_points; everything matches the interpreter, including pointer
+    clamping and tick counts.
+    """
+
+    def __init__(self, program: list[int], memory_size: int, directory: str | None = None):
+        self.program = program
+        self.memory_size = memory_size
+        self.resume_points: set[int] = set()
+        self.source = self._generate()
+        compiler = find_compiler()
+        if compiler is None:
+            raise BF16error("no C compiler found (set CC or install cc)")
+        self.directory = os.path.join(directory or os.environ.get("BF16_CACHE_DIR") or CACHE_DIR, "native")
+        digest = hashlib.sha256(f"bf16n:{NATIVE_VERSION}:{compiler[1]}:{' '.join(CFLAGS)}\n".encode())
+        digest.update(self.source.encode())
+        self.path = os.path.join(self.directory, digest.hexdigest() + ".so")
+        self.built = False  # True if this process compiled the object instead of finding it cached
+        self.error: str | None = None
+        self.run = None
+        self._cc = compiler[0]
+        self._thread: threading.Thread | None = None
+        if os.path.exists(self.path):
+            self._load()
+
+    @property
+    def ready(self) -> bool:
+        return self.run is not None
+
+    def build(self, wait: bool = True):
+        """Build and load the shared object, in a background thread unless wait. Raises BF16error when waiting fails."""
+        if not self.ready and not self.error and self._thread is None:
+            self._thread = threading.Thread(target=self._build_and_load, name="bf16-native-build", daemon=True)
+            self._thread.start()
+        if wait:
+            if self._thread is not None:
+                self._thread.join()
+            if self.error:
+                raise BF16error(self.error)
+
+    def _build_and_load(self):
+        try:
+            self._build(self._cc)
+            self._load()
+        except BF16error as e:
+            self.error = str(e)
+
+    def _load(self):
+        try:
+            library = ctypes.CDLL(self.path)
+        except OSError as e:
+            raise BF16error(f"cannot load {self.path}: {e}")
+        run = library.bf16_run
+        run.argtypes = (ctypes.POINTER(BF16state), ctypes.c_void_p)
+        run.restype = ctypes.c_int
+        self.run = run
+
+    def _build(self, cc: str):
+        os.makedirs(self.directory, exist_ok=True)
+        stem = f"{self.path}.{os.getpid()}"
+        with open(stem + ".c", "w") as f:
+            f.write(self.source)
+        try:
+            result = subprocess.run([cc, *CFLAGS, "-o", stem + ".tmp", stem + ".c"], capture_output=True, text=True)
+            if result.returncode != 0:
+                last = (result.stderr.strip().splitlines() or ['exit status %d' % result.returncode])[-1]
+                raise BF16error(f"C compiler failed: {last}")
+            # Rename into place so concurrent processes never load half a file.
+            os.replace(stem + ".tmp", self.path)
+            self.built = True
+        except OSError as e:
+            raise BF16error(f"cannot build native code: {e}")
+        finally:
+            for leftover in (stem + ".c", stem + ".tmp"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    def _label(self, lines: list[str], cursor: int):
+        """Mark a place execution can resume at (the first place wins if two share an index)."""
+        if cursor not in self.resume_points:
+            self.resume_points.add(cursor)
+            lines.append(f"L{cursor}:;")
+
+    def _generate(self) -> str:
+        program = self.program
+        size = len(program)
+        body: list[str] = []
+        stack: list[int] = []
+        self._label(body, 0)
+        for idx in range(0, size, 2):
+            op = program[idx]
+            arg = program[idx + 1]
+            if op == 62:    # '>'
+                body.append(f"p += {arg}; if (p > LAST) p = LAST; t++;")
+            elif op == 60:  # '<'
+                body.append(f"p -= {arg}; if (p < 0) p = 0; t++;")
+            elif op == 43:  # '+'
+                body.append(f"m[p] += {arg % 256}; t++;")
+            elif op == 45:  # '-'
+                body.append(f"m[p] -= {arg % 256}; t++;")
+            elif op == 91:  # '['
+                stack.append(idx)
+                body.append("t++; while (m[p]) {")
+            elif op == 93:  # ']'
+                if not stack:
+                    raise BF16error(f"unmatched ] at program index {idx}")
+                stack.pop()
+                body.append(f"if (t >= limit && m[p]) YIELD({idx}, {STATUS_PAUSE});")
+                self._label(body, idx)
+                body.append("t++; }")
+            elif op == 46:  # '.'
+                body.append(f"YIELD({idx + 2}, {STATUS_FRAME});")
+                self._label(body, idx + 2)
+            elif op == 44 or op == 63:  # ',' and '?' run in the host, which resumes after them
+                body.append(f"YIELD({idx}, {STATUS_INPUT if op == 44 else STATUS_DEBUG});")
+                self._label(body, idx + 2)
+            elif op == OP_CLEAR:
+                body.append("m[p] = 0; t++;")
+            elif op == OP_ADD_AT or op == OP_MULADD:
+                offset, value = unpack_offset_arg(arg)
+                clamp = "if (q > LAST) q = LAST;" if offset > 0 else "if (q < 0) q = 0;"
+                amount = f"m[p] * {value % 256}" if op == OP_MULADD else f"{value % 256}"
+                body.append(f"{{ int64_t q = p + {offset}; {clamp} m[q] += (uint8_t)({amount}); }} t++;")
+            elif op == OP_SCAN_RIGHT:
+                body.append(f"while (m[p]) {{ if (p + {arg} > LAST) {{ p = LAST; break; }} p += {arg}; }} t++;")
+            elif op == OP_SCAN_LEFT:
+                body.append(f"while (m[p]) {{ if (p < {arg}) {{ p = 0; break; }} p -= {arg}; }} t++;")
+            else:
+                raise BF16error(f"unsupported opcode {op} at program index {idx}")
+        if stack:
+            raise BF16error(f"unmatched [ at program index {stack[-1]}")
+
+        lines = [_HEADER.format(last=self.memory_size - 1), "    switch (s->pc) {"]
+        lines += [f"    case {cursor}: goto L{cursor};" for cursor in sorted(self.resume_points)]
+        lines += ["    default: return -1;", "    }"]
+        lines += ["    " + line for line in body]
+        lines += [f"    YIELD({size}, {STATUS_END});", "}", ""]
+        return "\n".join(lines)
+
+    def buffer(self, memory: bytearray) -> ctypes.Array:
+        """Zero-copy view of a bytearray tape for bf16_run()."""
+        return (ctypes.c_uint8 * self.memory_size).from_buffer(memory)
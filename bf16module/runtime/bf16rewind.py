@@ -0,0 +1,154 @@
+import time
+import zlib
+from collections import deque
+from typing import Callable
+
+from bf16module.runtime.bf16runtime import BF16Runtime
+
+CHECKPOINT_MAGIC = b'BF16S'
+
+
+def _xor(a: bytes, b: bytes) -> bytes:
+    """Byte-wise XOR of two equal-length strings (one big-int operation, no Python loop)."""
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+class BF16rewind:
+    """
+    Ring buffer of runtime snapshots, one per frame. Every keyframe_interval-th
+    snapshot is stored whole; the ones in between are stored as the zlib'd XOR
+    against their keyframe, which is almost all zeros because a frame touches
+    few cells. Memory stays bounded by capacity: when it is exceeded the oldest
+    keyframe is dropped together with its deltas.
+
+    Any held frame restores in one delta decode, so rewinding, seeking and
+    resuming are instant. Capture and restore times are measured (see stats()).
+    """
+
+    def __init__(self, runtime: BF16Runtime, capacity: int = 600, keyframe_interval: int = 60):
+        if capacity < 1:
+            raise ValueError("Rewind capacity must be at least 1 frame")
+        if keyframe_interval < 1:
+            raise ValueError("Keyframe interval must be at least 1")
+        self.runtime = runtime
+        self.capacity = capacity
+        self.keyframe_interval = min(keyframe_interval, capacity)
+        # [keyframe, deltas for the following states, frame number of every state]
+        self._groups: deque[list] = deque()
+        self._count = 0
+        self.captures = 0
+        self.capture_time = 0.0
+        self.restores = 0
+        self.restore_time = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def oldest(self) -> int | None:
+        """Frame number of the oldest held state."""
+        return self._groups[0][2][0] if self._groups else None
+
+    @property
+    def newest(self) -> int | None:
+        return self._groups[-1][2][-1] if self._groups else None
+
+    @property
+    def size(self) -> int:
+        """Bytes held by keyframes and deltas."""
+        return sum(len(keyframe) + sum(map(len, deltas)) for keyframe, deltas, _ in self._groups)
+
+    def capture(self):
+        """Store the runtime's current state; call once after every frame."""
+        start = time.perf_counter()
+        state = self.runtime.snapshot()
+        group = self._groups[-1] if self._groups else None
+        if group is None or len(group[2]) >= self.keyframe_interval or len(group[0]) != len(state):
+            self._groups.append([state, [], [self.runtime.frames]])
+        else:
+            group[1].append(zlib.compress(_xor(state, group[0]), 1))
+            group[2].append(self.runtime.frames)
+        self._count += 1
+        while self._count > self.capacity and len(self._groups) > 1:
+            self._count -= len(self._groups.popleft()[2])
+        self.captures += 1
+        self.capture_time += time.perf_counter() - start
+
+    def _state(self, group: list, index: int) -> bytes:
+        keyframe, deltas, _ = group
+        return keyframe if index == 0 else _xor(zlib.decompress(deltas[index - 1]), keyframe)
+
+    def _restore_at(self, group_index: int, index: int):
+        """Restore a held state and drop everything newer, so capturing continues from it."""
+        start = time.perf_counter()
+        group = self._groups[group_index]
+        self.runtime.restore(self._state(group, index))
+        while len(self._groups) > group_index + 1:
+            self._count -= len(self._groups.pop()[2])
+        self._count -= len(group[2]) - index - 1
+        del group[1][index:]
+        del group[2][index + 1:]
+        self.restores += 1
+        self.restore_time += time.perf_counter() - start
+
+    def rewind(self, frames: int = 1) -> int:
+        """Step back up to `frames` held states (the oldest is kept). Returns how many were stepped."""
+        steps = min(frames, self._count - 1)
+        if steps <= 0:
+            return 0
+        target = self._count - 1 - steps
+        for group_index, group in enumerate(self._groups):
+            if target < len(group[2]):
+                self._restore_at(group_index, target)
+                break
+            target -= len(group[2])
+        return steps
+
+    def seek(self, frame: int) -> bool:
+        """Restore the newest held state at or before `frame`. False if the buffer does not reach back that far."""
+        for group_index in range(len(self._groups) - 1, -1, -1):
+            numbers = self._groups[group_index][2]
+            if numbers[0] <= frame:
+                index = max(i for i, number in enumerate(numbers) if number <= frame)
+                self._restore_at(group_index, index)
+                return True
+        return False
+
+    def fast_forward(self, frames: int, color: Callable[[int], tuple[int, int, int]]) -> int:
+        """Run up to `frames` frames headless, capturing each one. Returns the frames run."""
+        runtime = self.runtime
+        program_size = len(runtime.program)
+        target = runtime.frames + frames
+        while runtime.frames < target and runtime.cursor < program_size:
+            drawn = runtime.frames
+            runtime.run_program(None, color)
+            if runtime.frames != drawn:
+                self.capture()
+        return frames - (target - runtime.frames)
+
+    def stats(self) -> dict:
+        return {"frames": self._count, "keyframes": len(self._groups), "bytes": self.size,
+                "captures": self.captures, "restores": self.restores,
+                "capture_ms": self.capture_time * 1000 / self.captures if self.captures else 0.0,
+                "restore_ms": self.restore_time * 1000 / self.restores if self.restores else 0.0}
+
+    # === Checkpoints ===
+
+    @staticmethod
+    def save_checkpoint(runtime: BF16Runtime, filename: str):
+        """Write the runtime's current state to a file, to resume from later."""
+        with open(filename, "wb") as f:
+            f.write(CHECKPOINT_MAGIC + zlib.compress(runtime.snapshot(), 6))
+
+    @staticmethod
+    def load_checkpoint(runtime: BF16Runtime, filename: str):
+        """Restore a save_checkpoint() file. Raises ValueError for other files, programs or tape sizes."""
+        with open(filename, "rb") as f:
+            data = f.read()
+        if not data.startswith(CHECKPOINT_MAGIC):
+            raise ValueError(f"Not a BF16 checkpoint: {filename}")
+        try:
+            state = zlib.decompress(data[len(CHECKPOINT_MAGIC):])
+        except zlib.error:
+            raise ValueError(f"Corrupt BF16 checkpoint: {filename}")
+        runtime.restore(state)
@@ -1,102 +1,359 @@
+import time
+import zlib
+import struct
 import pygame
 import threading
 from itertools import product
 from typing import Callable
 
-from bf16module.utilities.sound.bf16audio import BF16audio
 from bf16module.utilities.input.bf16input import BF16input
 from bf16module.graphic_engine.bf16graphic import BF16graphic
+from bf16module.graphic_engine.bf16renderer import BF16renderer
+from bf16module.utilities.error.bf16error import BF16error
+from bf16module.runtime.bf16engine import BF16engine, scan_right, scan_left
+from bf16module.runtime.bf16events import BF16events
+from bf16module.runtime.bf16native import BF16native, BF16state, NO_LIMIT, STATUS_END, STATUS_FRAME, STATUS_INPUT, STATUS_DEBUG
+from bf16module.utilities.compile.bf16compile import (
+    OP_ADD_AT, OP_MULADD, OP_CLEAR, OP_SCAN_RIGHT, OP_SCAN_LEFT, unpack_offset_arg,
+)
+from bf16module.utilities.options.bf16options import MEMORY_SIZE, ENGINES, RENDERERS, TAPES
 
-MEMORY_SIZE = 30000
 PIXEL_SCALE = 512 // 16
+# Above this many changed cells a dirty-rect frame is redrawn and flipped whole
+DIRTY_CELL_LIMIT = 128
+# Save state: magic, version, program size and CRC, memory size, cursor, address, tick,
+# frames, max_address, current_note, last_key_state; then display_image and the tape
+SNAPSHOT_MAGIC = b'BF1S'
+_SNAPSHOT = struct.Struct('<4sBIIIIIQIIBB')
+# Opt-in hook points that the engines only build in while something is subscribed
+ENGINE_HOOKS = ("loop_entered", "input_read")
 
 class BF16Runtime:
-    def __init__(self):
+    def __init__(self, engine: str = "interpreter", renderer: str = "surfarray", tape: str = "list",
+                 memory_size: int = MEMORY_SIZE, track_stats: bool = False, dirty_rects: bool = False):
+        """
+        tape selects the memory backend: "list" of ints or a compact "bytearray"
+        (1 byte per cell, zero-copy NumPy views). track_stats keeps checksum,
+        nonzero and max_address up to date on every write so hooks never scan the tape.
+        dirty_rects redraws only the cells that changed since the previous frame and
+        pushes just those regions to the window. The native engine runs on the
+        tape's buffer, so it always uses a bytearray tape.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unknown renderer '{renderer}', expected one of {RENDERERS}")
+        if tape not in TAPES:
+            raise ValueError(f"Unknown tape '{tape}', expected one of {TAPES}")
+        if memory_size < 256:
+            raise ValueError("Memory size must be at least 256 cells (the 16x16 framebuffer)")
         self.graphic_engine = None
         self.program: list[int] = []
-        self.memory: list[int] = [0] * MEMORY_SIZE
+        self.tape = "bytearray" if engine == "native" else tape
+        self.memory_size = memory_size
+        self.track_stats = track_stats
+        self.memory: list[int] | bytearray = self._new_tape()
+        self.checksum = 0
+        self.nonzero = 0
+        self.max_address = 0
         self.display_image: list[list[int]] = [[0] * 16 for _ in range(16)]
+        self.changed_cells = 0        # cells that differed from the previous frame
+        self.changed_cells_total = 0
         self.cursor = 0
         self.address = 0
         self.tick = 0
+        self.frames = 0
         self.current_note = 0
         self.last_key_state = 0
-        self.hook_event: list[dict[str, Callable]] = []
+        self.read_input: Callable[[], int] = BF16input.get_key_state
+        self.events = BF16events()
+        # False while frames are produced for someone else to show (BF16worker): present()
+        # then emits frame_rendered for each frame when it reaches the screen.
+        self.frame_events = True
+        # Scheduler mode: when set, run_program also returns after roughly this many
+        # instructions (at the next loop back-edge) without drawing, and resumes there.
+        self.budget: int | None = None
+        self.tick_limit = 0
+        # Profiling mode: executions per program index (see start_profile)
+        self.profile: list[int] | None = None
+        self.engine = engine
+        self._compiled: BF16engine | None = None
+        self._frames = None
+        self._frames_cursor = 0
+        self._native: BF16native | None = None
+        self._native_state = BF16state()
+        self.renderer = renderer
+        self._frame_renderer: BF16renderer | None = None
+        self.render_time = 0.0
+        self.dirty_rects = dirty_rects
+        self._drawn: tuple | None = None  # (screen, color) the whole screen was last drawn with
+        self._presented = bytes(256)      # last frame drawn by present()
+        self._overlay: pygame.Rect | None = None
+        self._crc: tuple | None = None  # (program, CRC32) checked by snapshot()/restore()
 
     def reset(self):
         """Reset runtime memory and state."""
-        self.memory = [0] * MEMORY_SIZE
+        self.memory = self._new_tape()
+        self.checksum = 0
+        self.nonzero = 0
+        self.max_address = 0
         self.cursor = 0
         self.address = 0
         self.tick = 0
+        self.frames = 0
+        self.changed_cells = 0
+        self.changed_cells_total = 0
+        self.render_time = 0.0
         self.current_note = 0
         self.last_key_state = 0
+        self._frames = None
 
-    def register_event(self, event_name: str, callback: Callable):
-        """Register a callback for a named event."""
-        self.hook_event.append({event_name: callback})
+    def _new_tape(self) -> list[int] | bytearray:
+        if self.tape == "bytearray":
+            return bytearray(self.memory_size)
+        return [0] * self.memory_size
+
+    def recount_stats(self):
+        """Recompute checksum/nonzero from the tape, e.g. after memory was replaced from outside."""
+        memory = self.memory
+        self.checksum = sum(memory)
+        self.nonzero = len(memory) - memory.count(0)
+        highest = len(memory) - 1
+        while highest > self.max_address and not memory[highest]:
+            highest -= 1
+        self.max_address = max(self.max_address, highest, self.address)
+
+    def start_profile(self) -> list[int]:
+        """Count executions of every instruction from now on; returns the (live) counter list."""
+        self.profile = [0] * len(self.program)
+        return self.profile
+
+    def stop_profile(self) -> list[int] | None:
+        profile, self.profile = self.profile, None
+        return profile
+
+    def _program_crc(self) -> int:
+        """CRC32 of the program as little-endian 32-bit words, so snapshots move between machines."""
+        if self._crc is None or self._crc[0] is not self.program:
+            self._crc = (self.program, zlib.crc32(struct.pack(f"<{len(self.program)}I", *self.program)))
+        return self._crc[1]
+
+    def snapshot(self) -> bytes:
+        """Serialize the execution state (tape, registers, frame/audio/input state) to bytes."""
+        header = _SNAPSHOT.pack(SNAPSHOT_MAGIC, 1, len(self.program), self._program_crc(), self.memory_size,
+                                self.cursor, self.address, self.tick, self.frames, self.max_address,
+                                self.current_note, self.last_key_state)
+        image = bytes(cell for row in self.display_image for cell in row)
+        return header + image + bytes(self.memory)
+
+    def restore(self, data: bytes):
+        """Restore a snapshot() taken from the same program and tape size. Raises ValueError otherwise."""
+        if len(data) < _SNAPSHOT.size or data[:4] != SNAPSHOT_MAGIC:
+            raise ValueError("Not a BF16 snapshot")
+        (_, version, program_size, crc, memory_size, cursor, address, tick, frames,
+         max_address, current_note, last_key_state) = _SNAPSHOT.unpack_from(data)
+        if version != 1:
+            raise ValueError(f"Unsupported snapshot version {version}")
+        if program_size != len(self.program) or crc != self._program_crc():
+            raise ValueError("Snapshot was taken from a different program")
+        if memory_size != self.memory_size or len(data) != _SNAPSHOT.size + 256 + memory_size:
+            raise ValueError(f"Snapshot tape has {memory_size} cells, runtime has {self.memory_size}")
+
+        offset = _SNAPSHOT.size
+        for i in range(16):
+            self.display_image[i][:] = data[offset + i * 16:offset + i * 16 + 16]
+        tape = data[offset + 256:]
+        self.memory[:] = tape if self.tape == "bytearray" else list(tape)
+        self.cursor = cursor
+        self.address = address
+        self.tick = tick
+        self.frames = frames
+        self.max_address = max_address
+        self.current_note = current_note
+        self.last_key_state = last_key_state
+        self._frames = None  # the compiled engine holds pointer/ticks in locals: restart at the cursor
+        self._drawn = None   # the window still shows the old frame: next frame is a full redraw
+        if self.track_stats:
+            self.checksum = sum(tape)
+            self.nonzero = memory_size - tape.count(0)
+
+    def load_memory(self, image: bytes, offset: int = 0):
+        """Copy an initial memory image (e.g. from a v3 binary) onto the tape at offset."""
+        if offset < 0 or offset + len(image) > self.memory_size:
+            raise ValueError(f"Memory image of {len(image)} bytes does not fit a {self.memory_size}-cell tape")
+        self.memory[offset:offset + len(image)] = image if self.tape == "bytearray" else list(image)
+        self.recount_stats()
+
+    def stats(self) -> dict:
+        """
+        Tape statistics: checksum (sum of cells), nonzero cells and highest address touched,
+        plus framebuffer cells changed in the last frame and on average per frame.
+        """
+        if not self.track_stats:
+            self.recount_stats()
+        return {"checksum": self.checksum, "nonzero": self.nonzero, "max_address": self.max_address,
+                "changed_cells": self.changed_cells,
+                "changed_cells_per_frame": self.changed_cells_total / self.frames if self.frames else 0.0}
+
+    def _track_write(self, address: int, old: int):
+        new = self.memory[address]
+        self.checksum += new - old
+        self.nonzero += (new != 0) - (old != 0)
+        if address > self.max_address:
+            self.max_address = address
+
+    def register_event(self, event_name: str, callback: Callable, priority: int = 0):
+        """
+        Register a callback for a named event. Higher priority runs first.
+        Events: tick, program_end, frame_rendered(frame), note_changed(note),
+        and the opt-in engine hooks loop_entered(program_index), input_read(value).
+        """
+        self.events.register(event_name, callback, priority)
+
+    def unregister_event(self, event_name: str, callback: Callable) -> bool:
+        """Remove a previously registered callback."""
+        return self.events.unregister(event_name, callback)
+
+    def set_event_enabled(self, event_name: str, enabled: bool = True):
+        """Switch an event on or off without unregistering its callbacks."""
+        self.events.set_enabled(event_name, enabled)
 
     def emit_event(self, event_name: str, *args, **kwargs):
         """Trigger all callbacks registered for an event."""
-        for hook in self.hook_event:
-            if event_name in hook:
-                try:
-                    hook[event_name](*args, **kwargs)
-                except Exception as e:
-                    print(f"[event error] {event_name}: {e}")
+        self.events.emit(event_name, *args, **kwargs)
 
-    def run_program(self, screen: pygame.Surface, color: Callable[[int], tuple[int, int, int]]):
-        """Run a single frame of the program until next draw ('.') or end."""
+    def run_program(self, screen: pygame.Surface | None, color: Callable[[int], tuple[int, int, int]]):
+        """
+        Run a single frame of the program until next draw ('.') or end.
+        With screen=None the runtime is headless: frames only update display_image.
+        With a budget set, it may also return early with no frame drawn (compare
+        self.frames); the next call continues where it stopped.
+        """
 
         if self.cursor >= len(self.program):
             self.emit_event("program_end")
 
-        if self.graphic_engine is None:
-            self.graphic_engine = BF16graphic(screen)
-        graphic_engine = self.graphic_engine
+        if self.graphic_engine is None and screen is not None:
+            self.graphic_engine = BF16graphic(screen, dirty_rects=self.dirty_rects)
+        # Headless means headless even once present() has made a graphic engine: a worker
+        # thread must never draw onto the display surface the host loop is drawing to.
+        graphic_engine = self.graphic_engine if screen is not None else None
 
+        if self.engine == "native":
+            try:
+                result = self._run_native()
+                if result is not None:
+                    if result:
+                        self._draw_frame(graphic_engine, color)
+                    return
+            except BF16error as e:
+                print(f"⚠️ Native engine unavailable ({e}), falling back to compiled engine")
+                self.engine = "compiled"
+
+        if self.engine == "compiled":
+            try:
+                result = self._run_compiled()
+                if result is not None:
+                    if result:
+                        self._draw_frame(graphic_engine, color)
+                    return
+            except BF16error as e:
+                print(f"⚠️ Compiled engine unavailable ({e}), falling back to interpreter")
+                self.engine = "interpreter"
+
+        track = self.track_stats
+        hook_loop = self.events.enabled("loop_entered")
+        hook_input = self.events.enabled("input_read")
+        last = self.memory_size - 1
+        limit = self.tick + self.budget if self.budget is not None else None
+        prof = self.profile
         while self.cursor < len(self.program):
             cmd = self.program[self.cursor]
+            if prof is not None:
+                prof[self.cursor] += 1
             self.cursor += 1
 
             if cmd == ord('>'):
                 self.address += self.program[self.cursor]; self.cursor += 1
-                self.address = min(self.address, MEMORY_SIZE - 1)
+                self.address = min(self.address, last)
+                if track and self.address > self.max_address:
+                    self.max_address = self.address
 
             elif cmd == ord('<'):
                 self.address -= self.program[self.cursor]; self.cursor += 1
                 self.address = max(self.address, 0)
 
             elif cmd == ord('+'):
-                self.memory[self.address] = (self.memory[self.address] + self.program[self.cursor]) % 256
+                old = self.memory[self.address]
+                self.memory[self.address] = (old + self.program[self.cursor]) % 256
                 self.cursor += 1
+                if track:
+                    self._track_write(self.address, old)
 
             elif cmd == ord('-'):
-                self.memory[self.address] = (self.memory[self.address] - self.program[self.cursor]) % 256
+                old = self.memory[self.address]
+                self.memory[self.address] = (old - self.program[self.cursor]) % 256
                 self.cursor += 1
+                if track:
+                    self._track_write(self.address, old)
 
             elif cmd == ord('['):
                 if self.memory[self.address] == 0:
                     self.cursor += self.program[self.cursor]
+                elif hook_loop:
+                    self.emit_event("loop_entered", self.cursor - 1)
                 self.cursor += 1
 
             elif cmd == ord(']'):
                 if self.memory[self.address] != 0:
+                    if limit is not None and self.tick >= limit:
+                        self.cursor -= 1
+                        if prof is not None:
+                            prof[self.cursor] -= 1  # counted again when it runs
+                        return  # Budget used up: resume at this ']' on the next call
                     self.cursor -= self.program[self.cursor]
                 self.cursor += 1
 
-            elif cmd == ord('.'):
+            elif cmd == OP_CLEAR:
+                self.cursor += 1
+                old = self.memory[self.address]
+                self.memory[self.address] = 0
+                if track:
+                    self._track_write(self.address, old)
+
+            elif cmd == OP_ADD_AT or cmd == OP_MULADD:
+                offset, value = unpack_offset_arg(self.program[self.cursor]); self.cursor += 1
+                target = min(max(self.address + offset, 0), last)
+                if cmd == OP_MULADD:
+                    value *= self.memory[self.address]
+                old = self.memory[target]
+                self.memory[target] = (old + value) % 256
+                if track:
+                    self._track_write(target, old)
+
+            elif cmd == OP_SCAN_RIGHT:
+                self.address = scan_right(self.memory, self.address, self.program[self.cursor], last)
+                self.cursor += 1
+                if track and self.address > self.max_address:
+                    self.max_address = self.address
+
+            elif cmd == OP_SCAN_LEFT:
+                self.address = scan_left(self.memory, self.address, self.program[self.cursor])
                 self.cursor += 1
-                for i, j in product(range(16), repeat=2):
 
-                    val = self.memory[i * 16 + j]
-                    graphic_engine.draw_box(x=j * PIXEL_SCALE, y=i * PIXEL_SCALE, width=PIXEL_SCALE, height=PIXEL_SCALE, color=color(val))
-                    self.display_image[i][j] = val
+            elif cmd == ord('.'):
+                self.cursor += 1
+                self._draw_frame(graphic_engine, color)
                 return  # Return control to caller
 
             elif cmd == ord(','):
                 self.cursor += 1
-                self.memory[self.address] = self.last_key_state = BF16input.get_key_state()
+                old = self.memory[self.address]
+                self.memory[self.address] = self.last_key_state = self.read_input()
+                if track:
+                    self._track_write(self.address, old)
+                if hook_input:
+                    self.emit_event("input_read", self.last_key_state)
 
             elif cmd == ord('?'):
                 self.cursor += 1
@@ -107,20 +364,195 @@ class BF16Runtime:
 
             self.tick += 1
 
+    def _run_compiled(self) -> bool | None:
+        """
+        Advance the generated-code engine to the next '.' (returns True), to a budget
+        pause (returns False) or to program end (returns None).
+        """
+        if self.cursor >= len(self.program):
+            return None
+        compiled = self._compiled
+        hooks = self.events.enabled_among(ENGINE_HOOKS)
+        budget = self.budget is not None
+        profile = self.profile is not None
+        if compiled is None or compiled.program is not self.program \
+                or compiled.options != (self.memory_size, self.track_stats, hooks, budget, profile):
+            # New program, or options/subscriptions changed: regenerate and resume at the cursor.
+            self._compiled = BF16engine(self.program, self.memory_size, track_stats=self.track_stats,
+                                        hooks=hooks, budget=budget, profile=profile)
+            self._frames = None
+        if self._frames is None or self._frames_cursor != self.cursor:
+            # Fresh start, or the cursor was moved from outside: resume there.
+            self._frames = self._compiled.start(self)
+        if budget:
+            self.tick_limit = self.tick + self.budget
+        try:
+            result = next(self._frames)
+        except StopIteration:
+            self._frames = None
+            return None
+        self._frames_cursor = self.cursor
+        return result
+
+    def native_engine(self, wait: bool = False) -> BF16native:
+        """
+        The native engine for the current program, building it on first use: in the
+        background, or before returning with wait (raises BF16error if that fails).
+        """
+        native = self._native
+        if native is None or native.program is not self.program or native.memory_size != self.memory_size:
+            native = self._native = BF16native(self.program, self.memory_size)
+        native.build(wait=wait)
+        return native
+
+    def _run_native(self) -> bool | None:
+        """
+        Advance the native engine like _run_compiled. Until its shared object is
+        built, and for what it does not build in (track_stats, profiling,
+        loop_entered hooks, a list tape, a cursor that is not a resume point), the
+        call runs on the compiled engine instead.
+        """
+        if self.cursor >= len(self.program):
+            return None
+        native = self.native_engine()
+        if native.error:
+            raise BF16error(native.error)
+        if self.track_stats or self.profile is not None or self.events.enabled("loop_entered") \
+                or not native.ready or not isinstance(self.memory, bytearray) or self.cursor not in native.resume_points:
+            return self._run_compiled()
+        self._frames = None  # the compiled engine's locals are stale once native code moves on
+        state = self._native_state
+        state.pc, state.p, state.t = self.cursor, self.address, self.tick
+        state.limit = self.tick + self.budget if self.budget is not None else NO_LIMIT
+        memory = native.buffer(self.memory)
+        hook_input = self.events.enabled("input_read")
+        while True:
+            status = native.run(state, memory)
+            self.cursor, self.address, self.tick = state.pc, state.p, state.t
+            if status == STATUS_INPUT:
+                self.memory[self.address] = self.last_key_state = self.read_input()
+                if hook_input:
+                    self.emit_event("input_read", self.last_key_state)
+            elif status == STATUS_DEBUG:
+                print(f"🧠 memory[{self.address}] = {self.memory[self.address]}")
+            else:
+                break
+            # ',' and '?' ran here: count them and resume after them.
+            self.cursor += 2
+            self.tick += 1
+            state.pc, state.t = self.cursor, self.tick
+        if status == STATUS_END:
+            return None
+        return status == STATUS_FRAME
+
+    def _draw_frame(self, graphic_engine: BF16graphic | None, color: Callable[[int], tuple[int, int, int]]):
+        """Draw the 16x16 framebuffer (memory[0:256]) and remember it in display_image."""
+        self.frames += 1
+        changed = self._diff_display_image(self.memory)
+        if graphic_engine is not None:
+            self._draw_cells(graphic_engine, self.memory, color, changed)
+        if self.frame_events:
+            self.emit_event("frame_rendered", self.frames)
+
+    def _diff_display_image(self, cells) -> list[int]:
+        """Copy the framebuffer into display_image and return the indices of the cells that changed."""
+        changed = []
+        for i in range(16):
+            row = cells[i * 16:i * 16 + 16]
+            if not isinstance(row, list):
+                row = list(row)
+            previous = self.display_image[i]
+            if row != previous:
+                base = i * 16
+                changed.extend(base + j for j in range(16) if row[j] != previous[j])
+                previous[:] = row
+        self.changed_cells = len(changed)
+        self.changed_cells_total += len(changed)
+        return changed
+
+    def _draw_cells(self, graphic_engine: BF16graphic, cells, color: Callable[[int], tuple[int, int, int]],
+                    changed: list[int] | None = None):
+        """
+        Draw 256 framebuffer cells (the tape or a snapshot of it) to the screen. In dirty-rect
+        mode only the `changed` cells are redrawn while screen and colours stay the same.
+        """
+        start = time.perf_counter()
+        if self.dirty_rects and changed is not None and self._drawn == (graphic_engine.screen, color) \
+                and len(changed) <= DIRTY_CELL_LIMIT:
+            if self._overlay is not None:
+                # Repaint the cells under last frame's FPS text as well.
+                changed = sorted(set(changed).union(self._cells_under(self._overlay)))
+                self._overlay = None
+            for index in changed:
+                i, j = divmod(index, 16)
+                graphic_engine.draw_box(x=j * PIXEL_SCALE, y=i * PIXEL_SCALE, width=PIXEL_SCALE, height=PIXEL_SCALE, color=color(cells[index]))
+            graphic_engine.invalidate_cells(changed)
+        elif self.renderer == "surfarray":
+            if self._frame_renderer is None or self._frame_renderer.screen is not graphic_engine.screen:
+                self._frame_renderer = BF16renderer(graphic_engine.screen)
+            self._frame_renderer.draw(cells, color)
+        else:
+            for i, j in product(range(16), repeat=2):
+                val = cells[i * 16 + j]
+                graphic_engine.draw_box(x=j * PIXEL_SCALE, y=i * PIXEL_SCALE, width=PIXEL_SCALE, height=PIXEL_SCALE, color=color(val))
+        if self.dirty_rects and (changed is None or self._drawn != (graphic_engine.screen, color)
+                                 or len(changed) > DIRTY_CELL_LIMIT):
+            graphic_engine.invalidate()
+            self._drawn = (graphic_engine.screen, color)
+            self._overlay = None
+        self.render_time += time.perf_counter() - start
+
+    @staticmethod
+    def _cells_under(rect: pygame.Rect) -> list[int]:
+        """Framebuffer cells covered by a screen rectangle."""
+        columns = range(max(rect.left // PIXEL_SCALE, 0), min((rect.right - 1) // PIXEL_SCALE, 15) + 1)
+        rows = range(max(rect.top // PIXEL_SCALE, 0), min((rect.bottom - 1) // PIXEL_SCALE, 15) + 1)
+        return [i * 16 + j for i in rows for j in columns]
+
+    def present(self, screen: pygame.Surface, cells: bytes, note: int, color: Callable[[int], tuple[int, int, int]],
+                index: int):
+        """
+        Draw a frame produced elsewhere (e.g. by BF16worker) and update audio. Dirty cells are
+        found against the previously presented frame, since display_image belongs to the producer.
+        frame_rendered receives the frame's own index (BF16frame.index), not the producer's
+        frames counter, which may already be further ahead.
+        """
+        if self.graphic_engine is None:
+            self.graphic_engine = BF16graphic(screen, dirty_rects=self.dirty_rects)
+        changed = None
+        if self.dirty_rects:
+            previous, self._presented = self._presented, bytes(cells)
+            changed = [i for i in range(256) if cells[i] != previous[i]]
+        self._draw_cells(self.graphic_engine, cells, color, changed)
+        self.emit_event("frame_rendered", index)
+        self.update_note(note)
+
+    def redraw(self, screen: pygame.Surface, color: Callable[[int], tuple[int, int, int]]):
+        """Draw the whole last frame again, e.g. after restore() or frames run headless."""
+        if self.graphic_engine is None:
+            self.graphic_engine = BF16graphic(screen, dirty_rects=self.dirty_rects)
+        self._draw_cells(self.graphic_engine, [cell for row in self.display_image for cell in row], color)
+
+    def update_note(self, value: int):
+        """Play the bass note when the audio cell changed since the last frame."""
+        if value != self.current_note:
+            from bf16module.utilities.sound.bf16audio import BF16audio  # audio loads with the first note
+            self.current_note = value
+            BF16audio.play_bass_note(self.current_note)
+            self.emit_event("note_changed", value)
+
     def run_program_threaded(self, screen: pygame.Surface, color: Callable[[int], tuple[int, int, int]]):
         """Run the program in a thread and update audio if needed."""
         thread = threading.Thread(target=self.run_program, args=(screen, color))
         thread.start()
         thread.join()
 
-        new_value = self.memory[self.address]
-        if new_value != self.current_note:
-            self.current_note = new_value
-            BF16audio.play_bass_note(self.current_note)
+        self.update_note(self.memory[self.address])
 
     def draw_fps(self, screen: pygame.Surface, clock: pygame.time.Clock):
         """Draw the current FPS on screen."""
-        font = pygame.font.SysFont("Arial", 18)
-        fps = int(clock.get_fps())
-        fps_text = font.render(f"FPS: {fps}", True, (255, 255, 255), (0, 0, 0))
-        screen.blit(fps_text, (10, 10))
+        fps_text = BF16graphic.render_text(f"FPS: {int(clock.get_fps())}", 18, (255, 255, 255), (0, 0, 0))
+        rect = screen.blit(fps_text, (10, 10))
+        if self.dirty_rects and self.graphic_engine is not None:
+            self.graphic_engine.invalidate(rect)
+            self._overlay = rect if self._overlay is None else self._overlay.union(rect)
@@ -0,0 +1,91 @@
+import time
+import pygame
+from typing import Callable
+
+from bf16module.runtime.bf16runtime import BF16Runtime
+
+MIN_BUDGET = 1_000
+MAX_BUDGET = 50_000_000
+
+
+class BF16scheduler:
+    """
+    Time-sliced driver for BF16Runtime. Each host frame gets a slice of
+    instructions; a program that computes for longer than that between two '.'
+    is paused at a loop back-edge and continued on the next host frame, so the
+    event loop, audio and window stay responsive.
+
+    budget fixes the slice at that many instructions. Otherwise the slice is a
+    wall-clock budget (time_slice seconds, or target_fps' frame period minus
+    the host's own measured work) converted to instructions with the measured
+    instruction rate, so it follows the speed of the program and machine.
+    """
+
+    def __init__(self, runtime: BF16Runtime, target_fps: int = 60, budget: int | None = None,
+                 time_slice: float | None = None):
+        if budget is not None and budget < 1:
+            raise ValueError("Instruction budget must be at least 1")
+        if time_slice is not None and time_slice <= 0:
+            raise ValueError("Time slice must be positive")
+        self.runtime = runtime
+        self.target_fps = target_fps
+        self.budget = budget
+        self.time_slice = time_slice
+        self.ips = 1_000_000.0  # running estimate of instructions per second
+        self.host_time = 0.0    # running estimate of the host's per-frame work outside the program
+        self.pauses = 0
+        self.last_slice = 0.0
+
+    def slice_seconds(self) -> float:
+        """Wall-clock time the program may use this host frame."""
+        if self.time_slice is not None:
+            return self.time_slice
+        period = 1.0 / self.target_fps
+        # Leave 10% of the frame as headroom for timer jitter.
+        return max(period * 0.9 - self.host_time, period * 0.1)
+
+    def run(self, screen: pygame.Surface | None, color: Callable[[int], tuple[int, int, int]],
+            frame_work: float | None = None) -> bool:
+        """
+        Run the program for one host frame: until it draws a frame, ends or uses
+        up its slice. frame_work is the host's measured work time for the previous
+        frame (e.g. clock.get_rawtime() / 1000), used to size the slice.
+        Returns True if a frame was drawn.
+        """
+        runtime = self.runtime
+        program_size = len(runtime.program)
+        frames = runtime.frames
+        start = time.perf_counter()
+
+        if frame_work is not None:
+            host = max(frame_work - self.last_slice, 0.0)
+            self.host_time += (host - self.host_time) * 0.2
+
+        if self.budget is not None:
+            runtime.budget = self.budget
+            runtime.run_program(screen, color)
+        else:
+            deadline = start + self.slice_seconds()
+            now = start
+            while True:
+                runtime.budget = max(MIN_BUDGET, min(int(self.ips * (deadline - now)), MAX_BUDGET))
+                ticks = runtime.tick
+                runtime.run_program(screen, color)
+                elapsed = time.perf_counter() - now
+                now += elapsed
+                if elapsed > 0 and runtime.tick > ticks:
+                    self.ips += ((runtime.tick - ticks) / elapsed - self.ips) * 0.5
+                if runtime.frames != frames or runtime.cursor >= program_size or now >= deadline:
+                    break
+
+        self.last_slice = time.perf_counter() - start
+        drawn = runtime.frames != frames
+        if drawn:
+            runtime.update_note(runtime.memory[runtime.address])
+        elif runtime.cursor < program_size:
+            self.pauses += 1
+        return drawn
+
+    def stats(self) -> dict:
+        return {"pauses": self.pauses, "ips": self.ips, "budget": self.runtime.budget,
+                "slice_ms": self.last_slice * 1000, "host_ms": self.host_time * 1000}
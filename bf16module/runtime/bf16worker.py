@@ -0,0 +1,127 @@
+import threading
+from collections import deque
+from typing import Callable
+
+from bf16module.runtime.bf16runtime import BF16Runtime
+from bf16module.utilities.options.bf16options import POLICIES
+
+
+class BF16frame:
+    """A finished frame: snapshot of the 256 framebuffer cells plus the audio note."""
+    __slots__ = ("index", "tick", "cells", "note")
+
+    def __init__(self, index: int, tick: int, cells: bytes, note: int):
+        self.index = index
+        self.tick = tick
+        self.cells = cells
+        self.note = note
+
+
+class BF16worker:
+    """
+    Long-lived interpreter thread that runs the program headless ahead of the
+    display and pushes finished frames into a bounded ring buffer. The host loop
+    only takes frames out and presents them.
+
+    Policies when the buffer is full:
+      block        the worker waits for the host (playback stays at display speed)
+      drop_oldest  the oldest queued frame is discarded (program runs uncapped)
+      drop_newest  the new frame is discarded (program runs uncapped)
+
+    Input: ',' executes on the worker thread and must not pump pygame events there.
+    It reads `key_state`, which the host loop sets from its own event handling each
+    display frame, or calls `source` (e.g. BF16input.read, whose state the host
+    updates from events) if given. Input is therefore sampled when the worker
+    executes ',', up to `capacity` frames ahead of what is on screen; keep capacity
+    small (1-2) for interactive programs.
+
+    The runtime does not emit frame_rendered while the worker runs; the host's
+    present(..., frame.index) emits it when a frame is shown.
+    """
+
+    def __init__(self, runtime: BF16Runtime, color: Callable[[int], tuple[int, int, int]],
+                 capacity: int = 2, policy: str = "block", source: Callable[[], int] | None = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown frame policy '{policy}', expected one of {POLICIES}")
+        if capacity < 1:
+            raise ValueError("Frame buffer capacity must be at least 1")
+        self.runtime = runtime
+        self.color = color
+        self.capacity = capacity
+        self.policy = policy
+        self.key_state = 0
+        self.source = source
+        self.dropped = 0
+        self.finished = False
+        self.error: BaseException | None = None
+        self._buffer: deque[BF16frame] = deque()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self.runtime.read_input = self.source or (lambda: self.key_state)
+        self.runtime.frame_events = False  # the host's present() emits frame_rendered
+        self._thread = threading.Thread(target=self._run, name="bf16-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 1.0):
+        """Ask the worker to stop after its current frame. The thread is a daemon, so a
+        frame that is still computing after timeout does not keep the process alive."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get(self, timeout: float | None = 0) -> BF16frame | None:
+        """Take the oldest finished frame, waiting up to timeout seconds (None = forever)."""
+        with self._cond:
+            if not self._buffer and timeout != 0:
+                self._cond.wait_for(lambda: self._buffer or self.finished, timeout)
+            if not self._buffer:
+                return None
+            frame = self._buffer.popleft()
+            self._cond.notify_all()
+            return frame
+
+    def __len__(self):
+        return len(self._buffer)
+
+    @property
+    def done(self) -> bool:
+        """True once the program ended (or failed) and every frame was taken."""
+        return self.finished and not self._buffer
+
+    def _run(self):
+        runtime = self.runtime
+        try:
+            while not self._stop and runtime.cursor < len(runtime.program):
+                frames = runtime.frames
+                runtime.run_program(None, self.color)
+                if runtime.frames != frames:
+                    self._push(BF16frame(runtime.frames, runtime.tick,
+                                         bytes(runtime.memory[:256]), runtime.memory[runtime.address]))
+        except BaseException as e:
+            self.error = e
+        finally:
+            runtime.frame_events = True
+            with self._cond:
+                self.finished = True
+                self._cond.notify_all()
+
+    def _push(self, frame: BF16frame):
+        with self._cond:
+            if len(self._buffer) >= self.capacity:
+                if self.policy == "block":
+                    self._cond.wait_for(lambda: len(self._buffer) < self.capacity or self._stop)
+                    if self._stop:
+                        return
+                elif self.policy == "drop_oldest":
+                    self._buffer.popleft()
+                    self.dropped += 1
+                else:
+                    self.dropped += 1
+                    return
+            self._buffer.append(frame)
+            self._cond.notify_all()
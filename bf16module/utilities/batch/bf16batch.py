@@ -0,0 +1,195 @@
+import os
+import csv
+import time
+import hashlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable
+
+from bf16module.runtime.bf16runtime import BF16Runtime, MEMORY_SIZE
+from bf16module.runtime.bf16lockstep import BF16lockstep
+from bf16module.utilities.colors.bf16color import BF16color
+from bf16module.utilities.compile.bf16compile import BF16compile
+from bf16module.utilities.compile.bf16cache import BF16cache
+from bf16module.utilities.error.bf16error import BF16error
+
+PROGRAM_EXTENSIONS = (".b", ".bf16", ".bin", ".bf16c")
+CSV_FIELDS = ("program", "input", "engine", "optimize", "frames", "ticks", "checksum", "frames_hash",
+              "seconds", "ips", "program_end", "error")
+
+
+class BF16batch:
+    """
+    Runs many programs (or one program under many input sequences) headless for a
+    fixed number of frames, one BF16Runtime per job, spread over a process pool.
+    Every job hashes each framebuffer so runs can be compared across engines,
+    optimization levels and commits.
+    """
+
+    @staticmethod
+    def find_programs(paths: list[str]) -> list[str]:
+        """Expand directories to the programs directly inside them, sorted by name."""
+        programs = []
+        for path in paths:
+            if os.path.isdir(path):
+                programs.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                       if name.endswith(PROGRAM_EXTENSIONS)))
+            else:
+                programs.append(path)
+        return programs
+
+    @staticmethod
+    def jobs(programs: list[str], frames: int, inputs: dict[str, list[int]] | None = None, **options) -> list[dict]:
+        """
+        One job per program and input sequence. An input sequence lists the key state
+        that ',' reads during each frame (the last value repeats); without inputs every
+        ',' reads 0. options: engine, tape, memory_size, optimize, cache.
+        """
+        sequences = inputs or {"none": []}
+        return [dict(options, program=program, frames=frames, input=name, keys=list(keys))
+                for program in programs for name, keys in sequences.items()]
+
+    @staticmethod
+    def load_program(job: dict) -> list[int]:
+        compiler = BF16compile()
+        filename = job["program"]
+        optimize = job.get("optimize", 0)
+        if filename.endswith((".b", ".bf16")):
+            with open(filename, "rb") as f:
+                source = f.read()
+            if job.get("cache", True):
+                return BF16cache().compile(compiler, source, optimize)[0]
+            return compiler.compile(source, optimize=optimize)
+        version = compiler.bin_version(filename)
+        if version == 3:
+            return compiler.read_bin_v3(filename)[0]
+        if version == 2:
+            return compiler.read_bin_v2(filename)[0]
+        return compiler.read_bin(filename)
+
+    @staticmethod
+    def run_job(job: dict) -> dict:
+        """Run one job in the current process. Failures are reported in the result, not raised."""
+        result = {"program": job["program"], "input": job.get("input", "none"),
+                  "engine": job.get("engine", "interpreter"), "optimize": job.get("optimize", 0),
+                  "frames": 0, "ticks": 0, "checksum": 0, "frames_hash": "", "frame_hashes": [],
+                  "seconds": 0.0, "ips": 0.0, "program_end": False, "error": ""}
+        try:
+            runtime = BF16Runtime(engine=result["engine"], tape=job.get("tape", "list"),
+                                  memory_size=job.get("memory_size", MEMORY_SIZE))
+            runtime.program = BF16batch.load_program(job)
+            runtime.reset()
+            keys = job.get("keys") or [0]
+            runtime.read_input = lambda: keys[min(runtime.frames, len(keys) - 1)]
+            if runtime.engine == "native":
+                try:
+                    runtime.native_engine(wait=True)  # build outside the timed loop
+                except BF16error:
+                    pass  # run_program reports it and falls back to the compiled engine
+
+            frames = job["frames"]
+            digest = hashlib.blake2b(digest_size=16)
+            frame_hashes = result["frame_hashes"]
+            program_size = len(runtime.program)
+            start = time.perf_counter()
+            while runtime.frames < frames and runtime.cursor < program_size:
+                drawn = runtime.frames
+                runtime.run_program(None, BF16color.rgb332)
+                if runtime.frames != drawn:
+                    cells = bytes(runtime.memory[:256])
+                    frame_hashes.append(hashlib.blake2b(cells, digest_size=8).hexdigest())
+                    digest.update(cells)
+            elapsed = time.perf_counter() - start
+
+            result.update(engine=runtime.engine, frames=runtime.frames, ticks=runtime.tick,
+                          checksum=sum(runtime.memory), frames_hash=digest.hexdigest(), seconds=elapsed,
+                          ips=runtime.tick / elapsed if elapsed else 0.0,
+                          program_end=runtime.cursor >= program_size)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    @staticmethod
+    def run(jobs: list[dict], workers: int | None = None,
+            progress: Callable[[dict], None] | None = None) -> list[dict]:
+        """
+        Run jobs on `workers` processes (default: one per core, 1 runs inline).
+        Results come back in job order; progress is called as each job finishes.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(jobs) <= 1:
+            results = []
+            for job in jobs:
+                results.append(BF16batch.run_job(job))
+                if progress:
+                    progress(results[-1])
+            return results
+
+        results: list[dict | None] = [None] * len(jobs)
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = {pool.submit(BF16batch.run_job, job): i for i, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if progress:
+                    progress(results[futures[future]])
+        return results
+
+    @staticmethod
+    def run_lockstep(jobs: list[dict], progress: Callable[[dict], None] | None = None) -> list[dict]:
+        """
+        Run all jobs of the same program (and -O level, tape size and frame count) together
+        in this process on BF16lockstep, one instance per input sequence. Results have the
+        same fields as run_job; a group's wall time is split evenly over its runs.
+        """
+        groups: dict[tuple, list[int]] = {}
+        for i, job in enumerate(jobs):
+            key = (job["program"], job.get("optimize", 0), job.get("memory_size", MEMORY_SIZE), job["frames"],
+                   job.get("cache", True))
+            groups.setdefault(key, []).append(i)
+
+        results: list[dict | None] = [None] * len(jobs)
+        for indices in groups.values():
+            group = [jobs[i] for i in indices]
+            first = group[0]
+            base = {"program": first["program"], "engine": "lockstep", "optimize": first.get("optimize", 0),
+                    "frames": 0, "ticks": 0, "checksum": 0, "frames_hash": "", "frame_hashes": [],
+                    "seconds": 0.0, "ips": 0.0, "program_end": False, "error": ""}
+            try:
+                program = BF16batch.load_program(first)
+                vector = BF16lockstep(program, len(group), first.get("memory_size", MEMORY_SIZE),
+                                      keys=[job.get("keys") or [0] for job in group])
+                digests = [hashlib.blake2b(digest_size=16) for _ in group]
+                frame_hashes: list[list[str]] = [[] for _ in group]
+
+                def on_frame(vector: BF16lockstep, drawn):
+                    cells = vector.memory[:, :256]
+                    for row in drawn:
+                        frame = cells[row].tobytes()
+                        frame_hashes[row].append(hashlib.blake2b(frame, digest_size=8).hexdigest())
+                        digests[row].update(frame)
+
+                start = time.perf_counter()
+                vector.run(first["frames"], on_frame)
+                elapsed = (time.perf_counter() - start) / len(group)
+                checksums = vector.memory.sum(axis=1, dtype=np.int64)
+                for row, i in enumerate(indices):
+                    ticks = int(vector.ticks[row])
+                    results[i] = dict(base, input=jobs[i].get("input", "none"), frames=int(vector.frames[row]),
+                                      ticks=ticks, checksum=int(checksums[row]), frames_hash=digests[row].hexdigest(),
+                                      frame_hashes=frame_hashes[row], seconds=elapsed,
+                                      ips=ticks / elapsed if elapsed else 0.0, program_end=bool(vector.done[row]))
+            except Exception as e:
+                for i in indices:
+                    results[i] = dict(base, input=jobs[i].get("input", "none"), error=f"{type(e).__name__}: {e}")
+            if progress:
+                for i in indices:
+                    progress(results[i])
+        return results
+
+    @staticmethod
+    def write_csv(results: list[dict], filename: str):
+        """One row per run; per-frame hashes are only in the JSON report."""
+        with open(filename, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
@@ -0,0 +1,65 @@
+import os
+import time
+import pygame
+from typing import Callable
+
+from bf16module.runtime.bf16runtime import BF16Runtime
+from bf16module.runtime.bf16rewind import BF16rewind
+
+
+class BF16bench:
+    """
+    Drives a BF16Runtime headless and uncapped to measure interpreter throughput.
+    """
+
+    @staticmethod
+    def init_headless():
+        """Initialise pygame without opening a window, so ',' can still poll keys."""
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.display.init()
+
+    @staticmethod
+    def offscreen_surface(size: int = 512) -> pygame.Surface:
+        """Surface to render frames into when drawing cost should be included."""
+        return pygame.Surface((size, size))
+
+    @staticmethod
+    def run(runtime: BF16Runtime, frames: int, color: Callable[[int], tuple[int, int, int]],
+            surface: pygame.Surface | None = None, rewind: BF16rewind | None = None) -> dict:
+        """
+        Run up to `frames` frames (or until program end) as fast as possible.
+        Returns frames, ticks, seconds, instructions/frames per second, ticks per frame,
+        render time per frame and framebuffer cells changed per frame.
+        With a rewind buffer every frame is captured into it (and counted in the time).
+        """
+        program_size = len(runtime.program)
+        start_frames = runtime.frames
+        start_tick = runtime.tick
+        start_render = runtime.render_time
+        start_changed = runtime.changed_cells_total
+
+        start = time.perf_counter()
+        while runtime.frames - start_frames < frames and runtime.cursor < program_size:
+            drawn = runtime.frames
+            runtime.run_program(surface, color)
+            if rewind is not None and runtime.frames != drawn:
+                rewind.capture()
+        elapsed = time.perf_counter() - start
+
+        frame_count = runtime.frames - start_frames
+        ticks = runtime.tick - start_tick
+        render_time = runtime.render_time - start_render
+        changed = runtime.changed_cells_total - start_changed
+        return {
+            "engine": runtime.engine,
+            "renderer": runtime.renderer if surface is not None else None,
+            "frames": frame_count,
+            "ticks": ticks,
+            "seconds": elapsed,
+            "ips": ticks / elapsed if elapsed else 0.0,
+            "fps": frame_count / elapsed if elapsed else 0.0,
+            "ticks_per_frame": ticks / frame_count if frame_count else float(ticks),
+            "render_ms_per_frame": render_time * 1000 / frame_count if frame_count else 0.0,
+            "changed_cells_per_frame": changed / frame_count if frame_count else 0.0,
+            "program_end": runtime.cursor >= program_size,
+        }
@@ -1,3 +1,5 @@
+import colorsys
+
 class BF16color:
     @staticmethod
     def rgb332(val):
@@ -35,7 +37,6 @@ class BF16color:
     @staticmethod
     def rainbow(val):
         """Maps value to a visible color in a rainbow spectrum using HSV."""
-        import colorsys
         h = (val % 256) / 256.0
         r, g, b = colorsys.hsv_to_rgb(h, 1.0, 1.0)
         return (int(r * 255), int(g * 255), int(b * 255))
@@ -83,7 +84,7 @@ class BF16color:
         """Maps value to purple-like colors."""
         r = min(255, val * 1)
         g = 0
-        b = min(255, val * 1.5)
+        b = min(255, int(val * 1.5))
         return (r, g, b)
     
     @staticmethod
@@ -0,0 +1,104 @@
+import os
+import numpy as np
+from typing import Callable
+
+from bf16module.utilities.colors.bf16color import BF16color
+
+
+class BF16palette:
+    """
+    A colour mode precomputed into a 256x3 uint8 lookup table.
+    Instances are callable like the BF16color functions, so they can be passed
+    anywhere a colour function is expected, but cost one list index per cell.
+    """
+    _registry: dict[str, "BF16palette"] = {}
+
+    def __init__(self, name: str, table: np.ndarray):
+        self.name = name
+        self.table = table
+        self.colors = [tuple(int(c) for c in row) for row in table]
+
+    def __call__(self, val: int) -> tuple[int, int, int]:
+        return self.colors[val & 0xFF]
+
+    def __repr__(self):
+        return f"BF16palette({self.name!r})"
+
+    @staticmethod
+    def modes() -> list[str]:
+        """Names of the built-in BF16color modes."""
+        return [m for m in dir(BF16color) if not m.startswith("_") and callable(getattr(BF16color, m))]
+
+    @classmethod
+    def from_function(cls, name: str, color: Callable[[int], tuple[int, int, int]]) -> "BF16palette":
+        table = np.array([color(val) for val in range(256)], dtype=np.float64)
+        return cls(name, np.clip(table, 0, 255).astype(np.uint8))
+
+    @classmethod
+    def from_file(cls, filename: str) -> "BF16palette":
+        """
+        Load a palette file: JASC-PAL text, GIMP .gpl text or raw RGB triplets
+        (.act / binary .pal). Missing entries are black, extra entries are ignored.
+        """
+        with open(filename, "rb") as f:
+            data = f.read()
+
+        if data.startswith(b"JASC-PAL"):
+            fields = data.decode("ascii").split()
+            count = int(fields[2])
+            rows = np.array(fields[3:3 + count * 3], dtype=np.int64).reshape(-1, 3)
+        elif data.startswith(b"GIMP Palette"):
+            rows = []
+            for line in data.decode("utf-8").splitlines()[1:]:
+                parts = line.split()
+                if len(parts) >= 3 and all(p.isdigit() for p in parts[:3]):
+                    rows.append([int(p) for p in parts[:3]])
+            rows = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        elif len(data) >= 3:
+            # Raw triplets; Adobe .act files may carry a 4-byte trailer after 768 bytes.
+            size = min(768, len(data) - len(data) % 3)
+            rows = np.frombuffer(data[:size], dtype=np.uint8).reshape(-1, 3)
+        else:
+            raise ValueError(f"Unrecognized palette file: {filename}")
+
+        if not len(rows):
+            raise ValueError(f"Palette file has no colours: {filename}")
+        table = np.zeros((256, 3), dtype=np.uint8)
+        rows = np.clip(rows[:256], 0, 255)
+        table[:len(rows)] = rows
+        return cls(os.path.splitext(os.path.basename(filename))[0], table)
+
+    @classmethod
+    def get(cls, name: str, base_dir: str | None = None) -> "BF16palette":
+        """
+        Return the cached palette for a BF16color mode name or a palette file path.
+        Relative file paths are also looked up in base_dir (e.g. next to a .bf16c).
+        Raises ValueError for unknown names.
+        """
+        key = name.lower()
+        palette = cls._registry.get(key)
+        if palette is not None:
+            return palette
+
+        if key in cls.modes():
+            palette = cls.from_function(key, getattr(BF16color, key))
+            cls._registry[key] = palette
+            return palette
+
+        candidates = [name]
+        if base_dir and not os.path.isabs(name):
+            candidates.append(os.path.join(base_dir, name))
+        for path in candidates:
+            if os.path.isfile(path):
+                path_key = os.path.abspath(path)
+                palette = cls._registry.get(path_key)
+                if palette is None:
+                    palette = cls._registry[path_key] = cls.from_file(path)
+                return palette
+
+        raise ValueError(f"Unknown color mode or palette file: {name}")
+
+    @classmethod
+    def preload(cls) -> list["BF16palette"]:
+        """Build the tables for every built-in mode up front."""
+        return [cls.get(mode) for mode in cls.modes()]
@@ -0,0 +1,107 @@
+import os
+import hashlib
+
+from bf16module.utilities.compile.bf16compile import BF16compile, COMPILER_VERSION
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "bf16")
+CACHE_LIMIT_BYTES = 64 * 1024 * 1024
+
+
+class BF16cache:
+    """
+    Content-addressed cache of compiled programs. Entries are v3 binaries named by
+    a hash of the source bytes, COMPILER_VERSION and the optimization level, so an
+    edited source or a newer compiler never reuses a stale program. Least recently
+    used entries (by mtime, refreshed on every hit) are evicted once the directory
+    grows past max_bytes.
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = CACHE_LIMIT_BYTES):
+        self.directory = directory or os.environ.get("BF16_CACHE_DIR") or CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(source: bytes, optimize: int = 0) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"bf16c:{COMPILER_VERSION}:O{optimize}:".encode("ascii"))
+        digest.update(source)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".bf16c")
+
+    def compile(self, compiler: BF16compile, source: bytes, optimize: int = 0) -> tuple[list[int], bool]:
+        """Compile through the cache. Returns (program, hit)."""
+        path = self.path(self.key(source, optimize))
+        try:
+            program, _, _ = compiler.read_bin_v3(path)
+            os.utime(path)
+            self.hits += 1
+            return program, True
+        except (OSError, ValueError):
+            pass
+
+        self.misses += 1
+        program = compiler.compile(source, optimize=optimize)
+        if not compiler.bracket_errors:
+            self.store(compiler, path, optimize)
+        return program, False
+
+    def store(self, compiler: BF16compile, path: str, optimize: int):
+        """Write the compiler's current program; a cache that cannot be written is skipped."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary name first so a concurrent reader never sees half a file.
+            partial = f"{path}.{os.getpid()}.tmp"
+            compiler.write_bin_v3(partial, meta={"optimize": optimize, "compiler_version": COMPILER_VERSION})
+            os.replace(partial, path)
+            self.evict()
+        except OSError:
+            pass
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every cached program, oldest first."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(".bf16c"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits max_bytes. Returns files removed."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        self.max_bytes, limit = 0, self.max_bytes
+        try:
+            return self.evict()
+        finally:
+            self.max_bytes = limit
@@ -1,38 +1,198 @@
+import sys
+import json
+import bisect
+import mmap
+import zlib
+import array
 import struct
 
+OPTIMIZE_LEVELS = (0, 1, 2)
+# Bump whenever compile() output changes for the same source, so cached programs are rebuilt.
+COMPILER_VERSION = 1
+
+# Opcodes produced by the optimizer (-O1 / -O2), alongside the plain ><+-.,[]?
+OP_ADD_AT = ord('@')      # m[p + offset] += value          arg: pack_offset_arg(offset, value)
+OP_MULADD = ord('*')      # m[p + offset] += m[p] * factor  arg: pack_offset_arg(offset, factor)
+OP_CLEAR = ord('0')       # m[p] = 0
+OP_SCAN_RIGHT = ord('}')  # while m[p]: p += arg
+OP_SCAN_LEFT = ord('{')   # while m[p]: p -= arg
+
+# Straight-line blocks get their own range check only when it replaces at least this many
+# per-instruction checks (analyze_bounds)
+BLOCK_MIN_CHECKS = 3
+
+def pack_offset_arg(offset: int, value: int) -> int:
+    """Pack a signed 8-bit pointer offset and an 8-bit value into one 16-bit argument."""
+    return ((value & 0xFF) << 8) | (offset & 0xFF)
+
+def unpack_offset_arg(arg: int) -> tuple[int, int]:
+    """Inverse of pack_offset_arg: returns (offset, value)."""
+    offset = arg & 0xFF
+    return (offset - 0x100 if offset & 0x80 else offset), arg >> 8
+
 class BF16compile:
     def __init__(self):
         self.program = []
         self.program_size = 0
+        self.bracket_errors = 0
+        self.source_map: list[tuple[int, int, int]] | None = None
+        self.unoptimized_size = 0  # instructions the last compile() had before optimization
 
-    def compile(self, source: bytes) -> list[int]:
-        self.program = []
-        self.program_size = 0
-        bracket_stack = []
-        i = 0
+    def compile(self, source: bytes, optimize: int = 0, source_map: bool = False) -> list[int]:
+        """
+        Compile BF16 source to the flat [opcode, arg, ...] program.
+        optimize=1 folds +/- runs into pointer-relative adds, optimize=2 also
+        rewrites clear, scan and copy/multiply loops into dedicated opcodes.
+        Optimized programs assume the pointer never leans on the tape edges: fused
+        ops clamp only the cell they touch, not each '<'/'>' they replace, so a
+        program that runs the pointer into an edge can differ from -O0 there.
+        self.unoptimized_size is the instruction count at -O0 (the parsed program).
+        With source_map, self.source_map holds (byte offset, line, column) of the
+        source each instruction came from, one entry per instruction (program index // 2).
+        """
+        ir = self._parse(source)
+        self.unoptimized_size = len(ir)
+        if optimize >= 2:
+            ir = self._rewrite_idioms(ir)
+        if optimize >= 1:
+            ir = self._fold_offsets(ir)
+        self.source_map = self._source_map(source, ir) if source_map else None
+        return self._emit(ir)
+
+    @staticmethod
+    def _source_map(source: bytes, ir: list) -> list[tuple[int, int, int]]:
+        """(offset, line, column) for each IR entry; lines and columns are 1-based."""
+        line_starts = [0]
+        start = source.find(b'\n')
+        while start != -1:
+            line_starts.append(start + 1)
+            start = source.find(b'\n', start + 1)
+        entries = []
+        for _, _, pos in ir:
+            line = bisect.bisect_right(line_starts, pos)
+            entries.append((pos, line, pos - line_starts[line - 1] + 1))
+        return entries
 
+    # === Pipeline ===
+
+    @staticmethod
+    def _parse(source: bytes) -> list[tuple[int, int, int]]:
+        """Tokenize source into (opcode, arg, source offset), run-length encoding ><+-."""
+        ir = []
+        i = 0
         while i < len(source):
             ch = source[i]
-            if ch in b'.?,[':
-                self.program.append(ch)
-                self.program.append(0)
-                if ch == ord('['):
-                    bracket_stack.append(len(self.program) - 2)
-                self.program_size += 2
+            if ch in b'.?,[]':
+                ir.append((ch, 0, i))
                 i += 1
             elif ch in b'><+-':
-                self.program.append(ch)
-                count = 1
                 j = i + 1
                 while j < len(source) and source[j] == ch:
-                    count += 1
                     j += 1
-                self.program.append(count)
-                self.program_size += 2
+                ir.append((ch, j - i, i))
                 i = j
-            elif ch == ord(']'):
-                self.program.append(ch)
-                self.program.append(0)
+            else:
+                i += 1  # skip unrecognized characters/comments
+        return ir
+
+    @staticmethod
+    def _run_effect(run) -> tuple[dict[int, int], int]:
+        """Net cell deltas (by pointer offset) and net pointer move of a ><+- run."""
+        offset = 0
+        deltas: dict[int, int] = {}
+        for op, arg, _ in run:
+            if op == ord('>'):
+                offset += arg
+            elif op == ord('<'):
+                offset -= arg
+            elif op == ord('+'):
+                deltas[offset] = deltas.get(offset, 0) + arg
+            else:
+                deltas[offset] = deltas.get(offset, 0) - arg
+        return {o: d & 0xFF for o, d in deltas.items() if d & 0xFF}, offset
+
+    def _rewrite_idioms(self, ir: list) -> list:
+        """Replace [-], [>], [<] and [->+>++<<]-style loops with single opcodes."""
+        out = []
+        i = 0
+        while i < len(ir):
+            op, _, pos = ir[i]
+            if op == ord('['):
+                j = i + 1
+                while j < len(ir) and ir[j][0] in b'><+-':
+                    j += 1
+                if j < len(ir) and ir[j][0] == ord(']'):
+                    replacement = self._match_idiom(ir[i + 1:j], pos)
+                    if replacement is not None:
+                        out.extend(replacement)
+                        i = j + 1
+                        continue
+            out.append(ir[i])
+            i += 1
+        return out
+
+    def _match_idiom(self, body, pos):
+        deltas, move = self._run_effect(body)
+        if move == 0 and deltas.get(0) in (1, 0xFF):
+            if not all(-128 <= o <= 127 for o in deltas):
+                return None
+            # Loop runs m[p] times when counting down, 256 - m[p] times counting up.
+            sign = 1 if deltas[0] == 0xFF else -1
+            ops = [(OP_MULADD, pack_offset_arg(o, sign * d), pos) for o, d in deltas.items() if o]
+            ops.append((OP_CLEAR, 0, pos))
+            return ops
+        if not deltas and 0 < abs(move) <= 0xFFFF:
+            return [(OP_SCAN_RIGHT if move > 0 else OP_SCAN_LEFT, abs(move), pos)]
+        return None
+
+    def _fold_offsets(self, ir: list) -> list:
+        """Turn ><+- runs into offset adds plus one net pointer move."""
+        out = []
+        i = 0
+        while i < len(ir):
+            if ir[i][0] not in b'><+-':
+                out.append(ir[i])
+                i += 1
+                continue
+            j = i
+            while j < len(ir) and ir[j][0] in b'><+-':
+                j += 1
+            run = ir[i:j]
+            folded = self._fold_run(run)
+            out.extend(folded if folded is not None and len(folded) < len(run) else run)
+            i = j
+        return out
+
+    def _fold_run(self, run):
+        deltas, move = self._run_effect(run)
+        if not all(-128 <= o <= 127 for o in deltas):
+            return None
+        pos = run[0][2]
+        ops = []
+        for offset, delta in deltas.items():
+            if offset:
+                ops.append((OP_ADD_AT, pack_offset_arg(offset, delta), pos))
+            elif delta <= 0x80:
+                ops.append((ord('+'), delta, pos))
+            else:
+                ops.append((ord('-'), 0x100 - delta, pos))
+        if move:
+            ops.append((ord('>') if move > 0 else ord('<'), abs(move), pos))
+        return ops
+
+    def _emit(self, ir: list) -> list[int]:
+        """Lay out the IR as [opcode, arg] pairs and resolve bracket distances."""
+        self.program = []
+        self.program_size = 0
+        self.bracket_errors = 0
+        bracket_stack = []
+
+        for op, arg, pos in ir:
+            self.program.append(op)
+            self.program.append(arg)
+            if op == ord('['):
+                bracket_stack.append(len(self.program) - 2)
+            elif op == ord(']'):
                 if bracket_stack:
                     open_idx = bracket_stack.pop()
                     close_idx = len(self.program) - 2
@@ -40,51 +200,162 @@ class BF16compile:
                     self.program[open_idx + 1] = dist
                     self.program[close_idx + 1] = dist
                 else:
-                    print('Error: unmatched ] at byte', i)
-                self.program_size += 2
-                i += 1
-            else:
-                i += 1  # skip unrecognized characters/comments
+                    print('Error: unmatched ] at byte', pos)
+                    self.bracket_errors += 1
+            self.program_size += 2
 
         if bracket_stack:
             print('Error: unmatched [ at', bracket_stack)
+            self.bracket_errors += len(bracket_stack)
 
         return self.program
 
+    # === Analysis ===
+
+    @staticmethod
+    def _pointer_effect(op: int, arg: int, offset: int) -> tuple[int, int | None]:
+        """Pointer offset after a straight-line op and the checked offset it reaches (None if unchecked)."""
+        if op == ord('>'):
+            return offset + arg, offset + arg
+        if op == ord('<'):
+            return offset - arg, offset - arg
+        if op == OP_ADD_AT or op == OP_MULADD:
+            return offset, offset + unpack_offset_arg(arg)[0]
+        return offset, None
+
+    @staticmethod
+    def analyze_bounds(program: list[int]) -> dict:
+        """
+        Pointer-range analysis for bounds-check elimination. '>' and '<' clamp the
+        pointer to the tape and pointer-relative adds clamp their target, but a
+        check can only fire if the pointer actually gets near an edge:
+
+          loops   for each '[' index, (lo, hi) when the body, nested loops included,
+                  has zero net pointer movement and no scans, else None. Entered with
+                  lo <= -p and p + hi <= last, every iteration stays on the tape.
+          blocks  straight-line runs (no brackets or scans) with BLOCK_MIN_CHECKS
+                  or more checks: first index -> (last index, lo, hi), checked
+                  once per run.
+          guarded the '[' indices of analyzable loops not inside another one, i.e.
+                  where the single range check goes.
+
+        Plus totals: loops, balanced, block_guards (blocks outside guarded loops),
+        checks (checking instructions in the program) and unchecked (those
+        covered by a loop or block range check).
+        """
+        loops: dict[int, tuple[int, int] | None] = {}
+        blocks: dict[int, tuple[int, int, int]] = {}
+        frames: list[list] = []  # open loops: [open index, offset, lo, hi, analyzable]
+        block = None             # [first index, last index, offset, lo, hi, checks]
+        size = len(program) - len(program) % 2
+
+        def end_block():
+            if block is not None and block[5] >= BLOCK_MIN_CHECKS:
+                blocks[block[0]] = (block[1], block[3], block[4])
+
+        for idx in range(0, size, 2):
+            op, arg = program[idx], program[idx + 1]
+            if op == ord('[') or op == ord(']') or op == OP_SCAN_RIGHT or op == OP_SCAN_LEFT:
+                end_block()
+                block = None
+            if op == ord('['):
+                frames.append([idx, 0, 0, 0, True])
+            elif op == ord(']'):
+                if not frames or idx - arg != frames[-1][0]:
+                    continue  # unmatched bracket: nothing to prove here
+                start, offset, lo, hi, ok = frames.pop()
+                loops[start] = (lo, hi) if ok and offset == 0 else None
+                if frames:
+                    parent = frames[-1]
+                    if loops[start] is None:
+                        parent[4] = False
+                    else:
+                        parent[2] = min(parent[2], parent[1] + lo)
+                        parent[3] = max(parent[3], parent[1] + hi)
+            elif op == OP_SCAN_RIGHT or op == OP_SCAN_LEFT:
+                if frames:
+                    frames[-1][4] = False
+            else:
+                if frames:
+                    frame = frames[-1]
+                    frame[1], reached = BF16compile._pointer_effect(op, arg, frame[1])
+                    if reached is not None:
+                        frame[2] = min(frame[2], reached)
+                        frame[3] = max(frame[3], reached)
+                if block is None:
+                    block = [idx, idx, 0, 0, 0, 0]
+                block[1] = idx
+                block[2], reached = BF16compile._pointer_effect(op, arg, block[2])
+                if reached is not None:
+                    block[3] = min(block[3], reached)
+                    block[4] = max(block[4], reached)
+                    block[5] += 1
+        end_block()
+        for frame in frames:
+            loops[frame[0]] = None  # unmatched '['
+
+        # Second pass: where the guards go and how many checks they cover.
+        guarded = []
+        checks = unchecked = block_guards = 0
+        inside = 0  # index of the ']' closing the guarded loop we are in, or 0
+        block_end = -1
+        for idx in range(0, size, 2):
+            op, arg = program[idx], program[idx + 1]
+            if not inside and op == ord('[') and loops.get(idx) is not None:
+                guarded.append(idx)
+                inside = idx + arg
+            elif not inside and idx in blocks:
+                block_end = blocks[idx][0]
+                block_guards += 1
+            if BF16compile._pointer_effect(op, arg, 0)[1] is not None:
+                checks += 1
+                if inside or idx <= block_end:
+                    unchecked += 1
+            if idx == inside:
+                inside = 0
+        return {"loops": loops, "blocks": blocks, "guarded": guarded, "block_guards": block_guards,
+                "checks": checks, "unchecked": unchecked,
+                "balanced": sum(1 for value in loops.values() if value is not None)}
+
+    def _pack_v1_code(self) -> bytes:
+        """v1/v2 code section: opcode byte + 16-bit argument per instruction, packed in one call."""
+        if self.program_size and max(self.program[1:self.program_size:2]) > 0xFFFF:
+            raise ValueError("Program has arguments above 65535 (long runs or jumps); "
+                             "write it with the v3 format instead")
+        count = self.program_size // 2
+        return struct.pack('<' + 'BH' * count, *self.program[:self.program_size])
+
+    def _unpack_v1_code(self, data: bytes):
+        """Inverse of _pack_v1_code; a trailing partial record is ignored."""
+        usable = len(data) - len(data) % 3
+        self.program = [value for record in struct.iter_unpack('<BH', data[:usable]) for value in record]
+        self.program_size = len(self.program)
+
     def write_bin(self, filename: str):
         with open(filename, 'wb') as out:
-            for idx in range(0, self.program_size, 2):
-                opcode = self.program[idx]
-                arg = self.program[idx + 1]
-                out.write(struct.pack('B', opcode))
-                out.write(struct.pack('<H', arg))
+            out.write(self._pack_v1_code())
 
     def read_bin(self, filename: str):
-        self.program = []
-        self.program_size = 0
         with open(filename, 'rb') as f:
-            while True:
-                opcode_byte = f.read(1)
-                if not opcode_byte:
-                    break
-                opcode = struct.unpack('B', opcode_byte)[0]
-                arg_bytes = f.read(2)
-                if not arg_bytes:
-                    break
-                arg = struct.unpack('<H', arg_bytes)[0]
-                self.program.append(opcode)
-                self.program.append(arg)
-                self.program_size += 2
+            self._unpack_v1_code(f.read())
         return self.program
-    
-    def is_v2_bin(self, filename: str) -> bool:
+
+    def bin_version(self, filename: str) -> int:
+        """Binary format version: 2 or 3 for files with a BF16 header, 1 for headerless files."""
         with open(filename, 'rb') as f:
-            magic = f.read(4)
-            if magic != b'BF16':
-                return False
-            version = struct.unpack('<B', f.read(1))[0]
-            return version == 2 
-    
+            header = f.read(5)
+        if len(header) < 5 or header[:4] != b'BF16':
+            return 1
+        if header[4] not in (2, 3):
+            raise ValueError(f"Unsupported BF16 binary version: {header[4]}. Expected 2 or 3.")
+        return header[4]
+
+    def is_v2_bin(self, filename: str) -> bool:
+        return self.bin_version(filename) == 2
+
+    def is_v3_bin(self, filename: str) -> bool:
+        return self.bin_version(filename) == 3
+
     def write_bin_v2(self, filename: str, color_mode: str="rgb332", app_name: str="UNNAMED BF16"):
         with open(filename, 'wb') as out:
             # Write header
@@ -100,43 +371,144 @@ class BF16compile:
             out.write(app_name.encode('utf-8'))
 
             # Write program
-            for idx in range(0, self.program_size, 2):
-                opcode = self.program[idx]
-                arg = self.program[idx + 1]
-                out.write(struct.pack('B', opcode))
-                out.write(struct.pack('<H', arg))
-                
-    def read_bin_v2(self, filename: str) -> tuple[list[int], str, str]:
-        self.program = []
-        self.program_size = 0
-        color_mode = ""
-        app_name = ""
+            out.write(self._pack_v1_code())
 
+    def read_bin_v2(self, filename: str) -> tuple[list[int], str, str]:
         with open(filename, 'rb') as f:
-            magic = f.read(4)
+            data = f.read()
+
+        if data[:4] != b'BF16':
+            raise ValueError("Invalid BF16 binary file (magic number mismatch)")
+
+        version = data[4]
+        if version != 2:
+            raise ValueError(f"Unsupported BF16 binary version: {version}. Expected 2.")
+
+        color_mode_len, app_name_len = data[5], data[6]
+        pos = 7
+        color_mode = data[pos:pos + color_mode_len].decode('utf-8')
+        pos += color_mode_len
+        app_name = data[pos:pos + app_name_len].decode('utf-8')
+        pos += app_name_len
+
+        self._unpack_v1_code(data[pos:])
+        return self.program, color_mode, app_name
+
+    # === v3 container ===
+    #
+    # header   <4sBBH   magic b'BF16', version 3, flags (reserved, 0), section count
+    # sections <4sIII   kind, offset, size in bytes, value count; one entry per section
+    # META     UTF-8 JSON object (color_mode, app_name, optimize, ...)
+    # CODE     program as little-endian uint32 values [op, arg, op, arg, ...]
+    # CODZ     same values as LEB128 varints, zlib-compressed (for distribution)
+    # MEMI     optional initial memory image, copied to memory[0:size] at load
+    # Sections start on 8-byte boundaries so CODE can be mapped and viewed in place.
+
+    def write_bin_v3(self, filename: str, color_mode: str = "rgb332", app_name: str = "UNNAMED BF16",
+                     memory_image: bytes | None = None, compress: bool = False, meta: dict | None = None):
+        metadata = {"color_mode": color_mode, "app_name": app_name}
+        metadata.update(meta or {})
+        program = self.program[:self.program_size]
+
+        sections = [(b'META', json.dumps(metadata).encode('utf-8'), 0)]
+        if compress:
+            sections.append((b'CODZ', zlib.compress(encode_varints(program), 9), len(program)))
+        else:
+            code = array.array(_U32, program)
+            if sys.byteorder == 'big':
+                code.byteswap()
+            sections.append((b'CODE', code.tobytes(), len(program)))
+        if memory_image:
+            sections.append((b'MEMI', bytes(memory_image), 0))
+
+        offset = _align(_V3_HEADER.size + _V3_SECTION.size * len(sections))
+        table = []
+        for kind, payload, count in sections:
+            table.append(_V3_SECTION.pack(kind, offset, len(payload), count))
+            offset = _align(offset + len(payload))
+
+        with open(filename, 'wb') as out:
+            out.write(_V3_HEADER.pack(b'BF16', 3, 0, len(sections)))
+            out.write(b''.join(table))
+            for kind, payload, count in sections:
+                out.write(b'\0' * (_align(out.tell()) - out.tell()))
+                out.write(payload)
+
+    def read_bin_v3(self, filename: str) -> tuple[list[int], dict, bytes | None]:
+        """Returns (program, metadata, memory_image). The code section is memory-mapped and decoded in one call."""
+        with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if len(data) < _V3_HEADER.size:
+                raise ValueError("Truncated BF16 v3 file (header)")
+            magic, version, _, section_count = _V3_HEADER.unpack_from(data, 0)
             if magic != b'BF16':
                 raise ValueError("Invalid BF16 binary file (magic number mismatch)")
+            if version != 3:
+                raise ValueError(f"Unsupported BF16 binary version: {version}. Expected 3.")
+
+            if _V3_HEADER.size + section_count * _V3_SECTION.size > len(data):
+                raise ValueError("Truncated BF16 v3 file (section table)")
+            sections = {}
+            for i in range(section_count):
+                kind, offset, size, count = _V3_SECTION.unpack_from(data, _V3_HEADER.size + i * _V3_SECTION.size)
+                if offset + size > len(data):
+                    raise ValueError(f"Truncated BF16 v3 file (section {kind!r})")
+                sections[kind] = (offset, size, count)
+
+            metadata = {}
+            if b'META' in sections:
+                offset, size, _ = sections[b'META']
+                metadata = json.loads(bytes(data[offset:offset + size]).decode('utf-8'))
+
+            if b'CODE' in sections:
+                offset, size, count = sections[b'CODE']
+                if count * 4 > size:
+                    raise ValueError(f"Corrupt BF16 v3 code section ({count} values in {size} bytes)")
+                code = array.array(_U32)
+                code.frombytes(data[offset:offset + count * 4])
+                if sys.byteorder == 'big':
+                    code.byteswap()
+                self.program = code.tolist()
+            elif b'CODZ' in sections:
+                offset, size, count = sections[b'CODZ']
+                self.program = decode_varints(zlib.decompress(data[offset:offset + size]))
+                if len(self.program) != count:
+                    raise ValueError("Corrupt BF16 v3 code section (value count mismatch)")
+            else:
+                raise ValueError("BF16 v3 file has no code section")
+            self.program_size = len(self.program)
+
+            memory_image = None
+            if b'MEMI' in sections:
+                offset, size, _ = sections[b'MEMI']
+                memory_image = bytes(data[offset:offset + size])
+
+        return self.program, metadata, memory_image
+
+
+_V3_HEADER = struct.Struct('<4sBBH')
+_V3_SECTION = struct.Struct('<4sIII')
+_U32 = 'I' if array.array('I').itemsize == 4 else 'L'
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+def encode_varints(values: list[int]) -> bytes:
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
 
-            version = struct.unpack('<B', f.read(1))[0]
-            if version != 2:
-                raise ValueError(f"Unsupported BF16 binary version: {version}. Expected 2.")
-
-            color_mode_len = struct.unpack('<B', f.read(1))[0]
-            app_name_len = struct.unpack('<B', f.read(1))[0]
-
-            color_mode = f.read(color_mode_len).decode('utf-8')
-            app_name = f.read(app_name_len).decode('utf-8')
-
-            while True:
-                opcode_byte = f.read(1)
-                if not opcode_byte:
-                    break
-                opcode = struct.unpack('B', opcode_byte)[0]
-                arg_bytes = f.read(2)
-                if not arg_bytes:
-                    break
-                arg = struct.unpack('<H', arg_bytes)[0]
-                self.program.append(opcode)
-                self.program.append(arg)
-                self.program_size += 2
-        return self.program, color_mode, app_name
\ No newline at end of file
+def decode_varints(data: bytes) -> list[int]:
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
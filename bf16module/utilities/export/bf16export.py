@@ -0,0 +1,261 @@
+import os
+import time
+import multiprocessing
+import numpy as np
+
+from bf16module.utilities.options.bf16options import FORMATS
+
+_WIDTH = 16
+_HEIGHT = 16
+
+
+def format_for(path: str) -> str:
+    """Guess the export format from the output path: .gif, .rgb/.raw, anything else is a PNG directory."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".gif":
+        return "gif"
+    if ext in (".rgb", ".raw"):
+        return "raw"
+    return "png"
+
+
+class BF16exporter:
+    """
+    Streams finished frames (the 256 framebuffer cells plus the audio cell) to an
+    encoder process. Only 257 bytes per frame cross the process boundary; palette
+    lookup, scaling and encoding happen in the encoder, so the interpreter keeps
+    its speed. Formats:
+
+      raw  packed RGB24 frames, for ffmpeg -f rawvideo -pix_fmt rgb24
+      png  numbered PNG files in a directory
+      gif  animated GIF using the palette as its 256-colour table; only the
+           changed region of each frame is stored and repeated frames extend
+           the previous frame's delay
+
+    With audio_path, bass note changes are played by an offline BF16synth into
+    a 16-bit stereo WAV at frame / fps seconds, the same points at which the
+    window plays them.
+    """
+
+    def __init__(self, path: str, fmt: str, table: np.ndarray, scale: int = 4, fps: int = 60,
+                 audio_path: str | None = None, queue_size: int = 4096):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}', expected one of {FORMATS}")
+        if scale < 1:
+            raise ValueError("Scale must be at least 1")
+        if fps < 1:
+            raise ValueError("FPS must be at least 1")
+        self.path = path
+        self.fmt = fmt
+        self.scale = scale
+        self.fps = fps
+        self.audio_path = audio_path
+        self.frames = 0
+        self.blocked = 0.0  # seconds the producer waited on a full queue
+        self._queue = multiprocessing.Queue(queue_size)
+        self._result = multiprocessing.Queue(1)
+        self._process = multiprocessing.Process(
+            target=_encode, name="bf16-export", daemon=True,
+            args=(self._queue, self._result, fmt, path, np.asarray(table, dtype=np.uint8).tobytes(),
+                  scale, fps, audio_path))
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return _WIDTH * self.scale, _HEIGHT * self.scale
+
+    def start(self):
+        self._process.start()
+
+    def add_frame(self, cells: bytes, note: int):
+        start = time.perf_counter()
+        self._queue.put(bytes(cells[:256]) + bytes((note & 0xFF,)))
+        self.blocked += time.perf_counter() - start
+        self.frames += 1
+
+    def close(self) -> dict:
+        """Flush the queue, wait for the encoder and return its summary (raises if it failed)."""
+        self._queue.put(None)
+        result = self._result.get()
+        self._process.join()
+        if "error" in result:
+            raise RuntimeError(f"Export failed: {result['error']}")
+        return result
+
+
+def _encode(frames, result, fmt: str, path: str, table: bytes, scale: int, fps: int, audio_path: str | None):
+    """Encoder process: consume frames until None, then write the trailer and the WAV track."""
+    start = time.perf_counter()
+    try:
+        palette = np.frombuffer(table, dtype=np.uint8).reshape(256, 3)
+        writer = {"raw": _RawWriter, "png": _PngWriter, "gif": _GifWriter}[fmt](path, palette, scale, fps)
+        notes = []
+        current_note = 0
+        count = 0
+        while True:
+            frame = frames.get()
+            if frame is None:
+                break
+            cells = np.frombuffer(frame, dtype=np.uint8, count=256).reshape(_HEIGHT, _WIDTH)
+            writer.write(cells)
+            if frame[256] != current_note:
+                current_note = frame[256]
+                notes.append((count, current_note))
+            count += 1
+        writer.close()
+        if audio_path:
+            _write_wav(audio_path, notes, count, fps)
+        result.put({"frames": count, "notes": len(notes), "seconds": time.perf_counter() - start})
+    except Exception as e:
+        result.put({"error": f"{type(e).__name__}: {e}"})
+        # Keep draining so the producer never blocks on a full queue.
+        while frames.get() is not None:
+            pass
+
+
+def _scaled(cells: np.ndarray, scale: int) -> np.ndarray:
+    return cells.repeat(scale, axis=0).repeat(scale, axis=1) if scale > 1 else cells
+
+
+class _RawWriter:
+    def __init__(self, path, palette, scale, fps):
+        self.file = open(path, "wb")
+        self.palette = palette
+        self.scale = scale
+
+    def write(self, cells):
+        self.file.write(self.palette[_scaled(cells, self.scale)].tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+class _PngWriter:
+    def __init__(self, path, palette, scale, fps):
+        import pygame
+        self.pygame = pygame
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.palette = palette
+        self.scale = scale
+        self.index = 0
+
+    def write(self, cells):
+        # surfarray indexes surfaces as [x][y], cells are row-major [y][x]
+        surface = self.pygame.surfarray.make_surface(self.palette[_scaled(cells, self.scale)].transpose(1, 0, 2))
+        self.pygame.image.save(surface, os.path.join(self.path, f"frame_{self.index:06d}.png"))
+        self.index += 1
+
+    def close(self):
+        pass
+
+
+class _GifWriter:
+    """Minimal GIF89a writer: global palette, LZW-compressed sub-rectangles, looping."""
+
+    def __init__(self, path, palette, scale, fps):
+        self.file = open(path, "wb")
+        self.scale = scale
+        self.fps = fps
+        self.previous: np.ndarray | None = None
+        self.pending: tuple | None = None  # (x, y, w, h, indices) waiting for its delay
+        self.frames = 0
+        self.shown = 0  # frame number at which the pending image appeared
+        width, height = _WIDTH * scale, _HEIGHT * scale
+        self.file.write(b"GIF89a" + width.to_bytes(2, "little") + height.to_bytes(2, "little")
+                        + bytes((0xF7, 0, 0)) + palette.tobytes())
+        # NETSCAPE2.0 application extension: loop forever
+        self.file.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+    def write(self, cells):
+        if self.previous is None:
+            box = (0, 0, _WIDTH, _HEIGHT)
+        else:
+            rows, cols = np.nonzero(cells != self.previous)
+            box = None if not len(rows) else (cols.min(), rows.min(), cols.max() + 1, rows.max() + 1)
+        if box is not None:
+            self._flush(self.frames)
+            x0, y0, x1, y1 = (int(v) for v in box)
+            self.pending = (x0, y0, x1 - x0, y1 - y0, _scaled(cells[y0:y1, x0:x1], self.scale))
+            self.shown = self.frames
+            self.previous = cells.copy()
+        self.frames += 1
+
+    def _flush(self, until: int):
+        if self.pending is None:
+            return
+        x, y, w, h, indices = self.pending
+        # Centisecond delays, rounded on the absolute timeline so they never drift.
+        delay = max(round(until * 100 / self.fps) - round(self.shown * 100 / self.fps), 1)
+        s = self.scale
+        self.file.write(b"\x21\xf9\x04\x04" + delay.to_bytes(2, "little") + b"\x00\x00")
+        self.file.write(b"\x2c" + b"".join((v * s).to_bytes(2, "little") for v in (x, y, w, h)) + b"\x00")
+        self.file.write(b"\x08")
+        data = _lzw(indices.tobytes())
+        for i in range(0, len(data), 255):
+            block = data[i:i + 255]
+            self.file.write(bytes((len(block),)) + block)
+        self.file.write(b"\x00")
+        self.pending = None
+
+    def close(self):
+        self._flush(self.frames)
+        self.file.write(b"\x3b")
+        self.file.close()
+
+
+def _lzw(pixels: bytes) -> bytes:
+    """GIF variant of LZW for 8-bit pixels: variable code width up to 12 bits, LSB-first."""
+    clear, end = 256, 257
+    out = bytearray()
+    bits = nbits = 0
+    width = 9
+
+    def emit(code):
+        nonlocal bits, nbits
+        bits |= code << nbits
+        nbits += width
+        while nbits >= 8:
+            out.append(bits & 0xFF)
+            bits >>= 8
+            nbits -= 8
+
+    table: dict[int, int] = {}
+    next_code = 258
+    emit(clear)
+    prefix = pixels[0] if pixels else None
+    for pixel in pixels[1:]:
+        key = prefix << 8 | pixel
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        emit(prefix)
+        if next_code < 4096:
+            table[key] = next_code
+            next_code += 1
+            if next_code > (1 << width) and width < 12:
+                width += 1
+        else:
+            emit(clear)
+            table.clear()
+            next_code = 258
+            width = 9
+        prefix = pixel
+    if prefix is not None:
+        emit(prefix)
+    emit(end)
+    if nbits:
+        out.append(bits & 0xFF)
+    return bytes(out)
+
+
+def _write_wav(path: str, notes: list[tuple[int, int]], frames: int, fps: int):
+    """Play every bass note change at its frame time on an offline synth and render a WAV as long as the video."""
+    from bf16module.utilities.sound.bf16audio import BF16audio
+    from bf16module.utilities.sound.bf16synth import BF16synth
+    rate = BF16audio.SAMPLE_RATE
+    synth = BF16synth(rate, voices=1, amplitude=BF16audio.AMPLITUDE)
+    for frame, pitch in notes:
+        synth.note_on(0, pitch - 12, "square", volume=1.0, at=int(frame * rate / fps),
+                      duration=BF16audio.BASS_DURATION, attack=0.05, release=0.05)
+    synth.write_wav(path, max(int(frames * rate / fps), 1))
@@ -1,22 +1,130 @@
+import time
 import pygame
+from typing import Callable
+
+# pygame key -> bit of the 8-bit state that ',' reads
+DEFAULT_KEYMAP = {
+    pygame.K_z: 0x80, pygame.K_x: 0x40, pygame.K_RETURN: 0x20, pygame.K_SPACE: 0x10,
+    pygame.K_UP: 0x08, pygame.K_DOWN: 0x04, pygame.K_LEFT: 0x02, pygame.K_RIGHT: 0x01,
+}
 
 class BF16input:
     """
-    Reads key state and maps it to an 8-bit input value.
-    Returns:
-        int: Bitflag representation of key states.
+    Maps key state to the 8-bit input value read by ','.
+
+    An instance keeps that value up to date from the KEYDOWN/KEYUP events the
+    host loop already takes off the queue (handle_event), or on demand from the
+    keyboard state (poll), so read() is a plain attribute read: a program that
+    polls ',' in a loop no longer pumps events or scans the keyboard each time.
+    The time from a state change to the first read() that sees it is recorded
+    as the input latency (see stats()). headless() builds a source that plays
+    a fixed sequence of states, one per frame, without a window.
+
+    get_key_state() is the original stateless reader with the default keymap.
     """
+
+    def __init__(self, keymap: dict[int, int] | None = None):
+        self.keymap = dict(DEFAULT_KEYMAP if keymap is None else keymap)
+        self.state = 0
+        self.reads = 0
+        self.changes = 0
+        self.latency_samples = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._held: set[int] = set()
+        self._changed: float | None = None  # when the state last changed, until a read sees it
+        self._script: list[int] | None = None
+        self._frame: Callable[[], int] | None = None
+
+    @classmethod
+    def headless(cls, script: list[int], frame: Callable[[], int]) -> "BF16input":
+        """A source that serves script[frame()] (the last state repeats), e.g. frame=lambda: runtime.frames."""
+        if not script:
+            raise ValueError("Headless input needs at least one key state")
+        source = cls()
+        source._script = [value & 0xFF for value in script]
+        source._frame = frame
+        return source
+
+    @staticmethod
+    def parse_keymap(spec: str) -> dict[int, int]:
+        """Parse "z=0x80,x=0x40,up=8,..." (pygame key names, bit masks) into a keymap."""
+        keymap = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            name, _, mask = item.partition("=")
+            try:
+                key = pygame.key.key_code(name.strip())
+                bit = int(mask, 0)
+            except ValueError:
+                raise ValueError(f"Bad keymap entry '{item}', expected <key name>=<bit mask>")
+            if not 0 < bit <= 0xFF:
+                raise ValueError(f"Bad keymap entry '{item}': mask must be between 1 and 0xFF")
+            keymap[key] = bit
+        if not keymap:
+            raise ValueError("Keymap is empty")
+        return keymap
+
+    def _set(self, state: int):
+        if state != self.state:
+            self.state = state
+            self.changes += 1
+            if self._changed is None:
+                self._changed = time.perf_counter()
+
+    def _update(self):
+        state = 0
+        for key in self._held:
+            state |= self.keymap[key]
+        self._set(state)
+
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        """Feed one event from the host loop. Returns True if it changed a mapped key."""
+        if event.type == pygame.KEYDOWN and event.key in self.keymap:
+            self._held.add(event.key)
+        elif event.type == pygame.KEYUP and event.key in self._held:
+            self._held.discard(event.key)
+        else:
+            return False
+        self._update()
+        return True
+
+    def poll(self, pump: bool = True):
+        """Refresh from the keyboard state instead of events (pump=False reuses the host's event pump)."""
+        if pump:
+            pygame.event.pump()
+        keys = pygame.key.get_pressed()
+        self._held = {key for key in self.keymap if keys[key]}
+        self._update()
+
+    def read(self) -> int:
+        """The current 8-bit state, for runtime.read_input."""
+        if self._script is not None:
+            self._set(self._script[min(self._frame(), len(self._script) - 1)])
+        self.reads += 1
+        if self._changed is not None:
+            latency = time.perf_counter() - self._changed
+            self._changed = None
+            self.latency_samples += 1
+            self.latency_total += latency
+            if latency > self.latency_max:
+                self.latency_max = latency
+        return self.state
+
+    def stats(self) -> dict:
+        """Reads, state changes, and the mean/max milliseconds from a change to the read that saw it."""
+        samples = self.latency_samples
+        return {"reads": self.reads, "changes": self.changes,
+                "latency_ms": self.latency_total * 1000 / samples if samples else 0.0,
+                "latency_max_ms": self.latency_max * 1000}
+
     @staticmethod
-    def get_key_state():
-        pygame.event.pump()
+    def get_key_state(pump: bool = True):
+        """pump=False reuses the event state of the host loop's own pygame.event.get()."""
+        if pump:
+            pygame.event.pump()
         keys = pygame.key.get_pressed()
         key = 0
-        if keys[pygame.K_z]: key |= 0x80
-        if keys[pygame.K_x]: key |= 0x40
-        if keys[pygame.K_RETURN]: key |= 0x20
-        if keys[pygame.K_SPACE]: key |= 0x10
-        if keys[pygame.K_UP]: key |= 0x08
-        if keys[pygame.K_DOWN]: key |= 0x04
-        if keys[pygame.K_LEFT]: key |= 0x02
-        if keys[pygame.K_RIGHT]: key |= 0x01
-        return key
\ No newline at end of file
+        for code, bit in DEFAULT_KEYMAP.items():
+            if keys[code]:
+                key |= bit
+        return key
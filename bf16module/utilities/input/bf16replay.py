@@ -0,0 +1,157 @@
+import json
+import zlib
+import struct
+import hashlib
+from typing import Callable
+
+from bf16module.runtime.bf16runtime import BF16Runtime
+from bf16module.utilities.compile.bf16compile import encode_varints, decode_varints
+
+MAGIC = b'BF16R'
+VERSION = 1
+# header: magic, version, then lengths of the JSON metadata, input varints and frame hashes
+_HEADER = struct.Struct('<5sBIII')
+HASH_SIZE = 8
+
+
+def frame_hash(cells) -> bytes:
+    """Short hash of the 256 framebuffer cells."""
+    return hashlib.blake2b(bytes(cells[:256]), digest_size=HASH_SIZE).digest()
+
+
+def program_hash(program: list[int]) -> str:
+    return hashlib.sha256(encode_varints(program)).hexdigest()
+
+
+class BF16recording:
+    """
+    An input log: the key state returned by every ',' tagged with frame and tick,
+    plus a hash of every frame drawn. Saved as a small header followed by a
+    zlib stream of JSON metadata, delta-coded varints and the frame hashes.
+    """
+
+    def __init__(self, program: str = "", inputs: list[tuple[int, int, int]] | None = None,
+                 hashes: list[bytes] | None = None, meta: dict | None = None):
+        self.program = program
+        self.inputs = inputs if inputs is not None else []  # (frame, tick, key)
+        self.hashes = hashes if hashes is not None else []  # one per frame
+        self.meta = meta or {}
+
+    def save(self, filename: str):
+        values = []
+        frame = tick = 0
+        for f, t, key in self.inputs:
+            values += (f - frame, t - tick, key)
+            frame, tick = f, t
+        meta = json.dumps(dict(self.meta, program=self.program)).encode("utf-8")
+        varints = encode_varints(values)
+        hashes = b"".join(self.hashes)
+        with open(filename, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(meta), len(varints), len(hashes)))
+            f.write(zlib.compress(meta + varints + hashes, 9))
+
+    @classmethod
+    def load(cls, filename: str) -> "BF16recording":
+        with open(filename, "rb") as f:
+            data = f.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"Not a BF16 input recording: {filename}")
+        magic, version, meta_size, varint_size, hash_size = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"Not a BF16 input recording: {filename}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported recording version {version}, expected {VERSION}")
+        body = zlib.decompress(data[_HEADER.size:])
+        if len(body) != meta_size + varint_size + hash_size:
+            raise ValueError(f"Truncated BF16 input recording: {filename}")
+
+        meta = json.loads(body[:meta_size].decode("utf-8"))
+        values = decode_varints(body[meta_size:meta_size + varint_size])
+        inputs = []
+        frame = tick = 0
+        for i in range(0, len(values) - 2, 3):
+            frame += values[i]
+            tick += values[i + 1]
+            inputs.append((frame, tick, values[i + 2]))
+        hashes = body[meta_size + varint_size:]
+        return cls(meta.pop("program", ""), inputs,
+                   [hashes[i:i + HASH_SIZE] for i in range(0, len(hashes), HASH_SIZE)], meta)
+
+
+class BF16recorder:
+    """
+    Wraps runtime.read_input to log every key state handed to ',' and hashes
+    each frame as it is drawn. Call save() when the session ends.
+    """
+
+    def __init__(self, runtime: BF16Runtime, meta: dict | None = None):
+        self.runtime = runtime
+        self.recording = BF16recording(program_hash(runtime.program), meta=meta)
+        self._source: Callable[[], int] = runtime.read_input
+        runtime.read_input = self.read_input
+        runtime.register_event("frame_rendered", self._on_frame)
+
+    def read_input(self) -> int:
+        key = self._source()
+        runtime = self.runtime
+        self.recording.inputs.append((runtime.frames, runtime.tick, key))
+        return key
+
+    def _on_frame(self, frame: int):
+        hashes = self.recording.hashes
+        if frame > len(hashes):
+            hashes.append(frame_hash(self.runtime.memory))
+
+    def save(self, filename: str):
+        self.runtime.read_input = self._source
+        self.runtime.unregister_event("frame_rendered", self._on_frame)
+        self.recording.meta["frames"] = len(self.recording.hashes)
+        self.recording.save(filename)
+
+
+class BF16replay:
+    """
+    Input source that feeds a recording back into a runtime, one logged key per ','.
+    Reads that happen in a different frame (or, for the same program, at a different
+    tick) than recorded are counted as desyncs, and every drawn frame is checked
+    against the recorded hash.
+    """
+
+    def __init__(self, runtime: BF16Runtime, recording: BF16recording):
+        self.runtime = runtime
+        self.recording = recording
+        self.check_ticks = recording.program == program_hash(runtime.program)
+        self.position = 0
+        self.desyncs = 0
+        self.mismatches: list[int] = []
+        self.verified = 0
+        runtime.read_input = self.read_input
+        runtime.register_event("frame_rendered", self._on_frame)
+
+    def read_input(self) -> int:
+        inputs = self.recording.inputs
+        if self.position >= len(inputs):
+            self.desyncs += 1
+            return inputs[-1][2] if inputs else 0
+        frame, tick, key = inputs[self.position]
+        self.position += 1
+        runtime = self.runtime
+        if frame != runtime.frames or (self.check_ticks and tick != runtime.tick):
+            self.desyncs += 1
+        return key
+
+    def _on_frame(self, frame: int):
+        hashes = self.recording.hashes
+        if frame <= len(hashes):
+            self.verified += 1
+            if frame_hash(self.runtime.memory) != hashes[frame - 1]:
+                self.mismatches.append(frame)
+
+    @property
+    def frames(self) -> int:
+        """Frames in the recording."""
+        return len(self.recording.hashes)
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches and not self.desyncs and self.verified == self.frames
@@ -0,0 +1,9 @@
+# Choices and defaults of the command-line options. Kept free of pygame and NumPy
+# imports so bf16.py can build its argument parser without loading either.
+
+MEMORY_SIZE = 30000
+ENGINES = ("interpreter", "compiled", "native")
+RENDERERS = ("surfarray", "boxes")
+TAPES = ("list", "bytearray")
+POLICIES = ("block", "drop_oldest", "drop_newest")  # worker behaviour when its frame buffer is full
+FORMATS = ("raw", "png", "gif")                     # export formats
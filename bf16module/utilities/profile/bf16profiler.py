@@ -0,0 +1,150 @@
+from typing import Callable
+
+from bf16module.runtime.bf16runtime import BF16Runtime
+
+
+class BF16profiler:
+    """
+    Turns per-instruction execution counts (BF16Runtime.profile) into hot-spot
+    reports. Loops are found statically from the bracket distances, so every
+    count can be attributed to its chain of enclosing loops without tracking a
+    call stack at run time. With a source map (BF16compile.compile(...,
+    source_map=True)) instructions and loops point back to .b source lines.
+    """
+
+    def __init__(self, program: list[int], counts: list[int],
+                 source_map: list[tuple[int, int, int]] | None = None, source: bytes | None = None):
+        self.program = program
+        self.counts = counts
+        self.source_map = source_map
+        self.lines = source.decode("utf-8", "replace").splitlines() if source is not None else None
+        self.loops = self._find_loops()
+
+    @classmethod
+    def run(cls, runtime: BF16Runtime, frames: int, color: Callable[[int], tuple[int, int, int]],
+            source_map: list[tuple[int, int, int]] | None = None, source: bytes | None = None) -> "BF16profiler":
+        """Profile up to `frames` frames (or until program end) headless."""
+        counts = runtime.start_profile()
+        program_size = len(runtime.program)
+        start_frames = runtime.frames
+        try:
+            while runtime.frames - start_frames < frames and runtime.cursor < program_size:
+                runtime.run_program(None, color)
+        finally:
+            runtime.stop_profile()
+        return cls(runtime.program, counts, source_map, source)
+
+    def _find_loops(self) -> dict[int, int]:
+        """Map '[' program index -> matching ']' index."""
+        loops = {}
+        program = self.program
+        for idx in range(0, len(program) - 1, 2):
+            if program[idx] == ord('['):
+                close = idx + program[idx + 1]
+                if close < len(program) and program[close] == ord(']'):
+                    loops[idx] = close
+        return loops
+
+    # === Locations ===
+
+    def location(self, idx: int) -> str:
+        """Source position of a program index as 'line:column', or '#index' without a source map."""
+        if self.source_map is None or idx // 2 >= len(self.source_map):
+            return f"#{idx}"
+        _, line, column = self.source_map[idx // 2]
+        return f"{line}:{column}"
+
+    def line_of(self, idx: int) -> int | None:
+        if self.source_map is None or idx // 2 >= len(self.source_map):
+            return None
+        return self.source_map[idx // 2][1]
+
+    def source_line(self, line: int | None, width: int = 60) -> str:
+        if line is None or self.lines is None or not 0 < line <= len(self.lines):
+            return ""
+        text = self.lines[line - 1].strip()
+        return text if len(text) <= width else text[:width - 1] + "…"
+
+    def _enclosing(self) -> list[list[int]]:
+        """For every instruction, the '[' indices of its enclosing loops, outermost first."""
+        stacks = []
+        stack: list[int] = []
+        program = self.program
+        for idx in range(0, len(program) - 1, 2):
+            op = program[idx]
+            if op == ord(']') and stack and self.loops.get(stack[-1]) == idx:
+                stacks.append(list(stack))
+                stack.pop()
+                continue
+            stacks.append(list(stack))
+            if op == ord('[') and idx in self.loops:
+                stack.append(idx)
+        return stacks
+
+    # === Reports ===
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def instructions(self, top: int | None = None) -> list[dict]:
+        """Instructions by execution count, hottest first."""
+        rows = [{"index": idx, "op": chr(self.program[idx]), "count": count,
+                 "location": self.location(idx), "line": self.line_of(idx)}
+                for idx, count in enumerate(self.counts) if count and idx % 2 == 0]
+        rows.sort(key=lambda row: -row["count"])
+        return rows[:top] if top else rows
+
+    def loop_report(self, top: int | None = None) -> list[dict]:
+        """
+        Loops by inclusive executions (everything run inside them), hottest first.
+        entries counts '[' executions, iterations counts ']' executions.
+        """
+        prefix = [0]
+        for count in self.counts:
+            prefix.append(prefix[-1] + count)
+        rows = []
+        for start, close in self.loops.items():
+            entries = self.counts[start]
+            if not entries:
+                continue
+            rows.append({"index": start, "close": close, "location": self.location(start),
+                         "line": self.line_of(start), "entries": entries,
+                         "iterations": self.counts[close],
+                         "inclusive": prefix[close + 1] - prefix[start]})
+        rows.sort(key=lambda row: -row["inclusive"])
+        return rows[:top] if top else rows
+
+    def line_report(self, top: int | None = None) -> list[dict]:
+        """Executions summed per source line, hottest first (needs a source map)."""
+        per_line: dict[int, int] = {}
+        for idx, count in enumerate(self.counts):
+            if count:
+                line = self.line_of(idx)
+                if line is not None:
+                    per_line[line] = per_line.get(line, 0) + count
+        rows = [{"line": line, "count": count, "source": self.source_line(line)}
+                for line, count in per_line.items()]
+        rows.sort(key=lambda row: -row["count"])
+        return rows[:top] if top else rows
+
+    def collapsed(self) -> list[str]:
+        """
+        Collapsed stacks ("main;loop@12:3;+@13:1 42") for flamegraph.pl, speedscope
+        and similar tools: enclosing loops as frames, the instruction as the leaf.
+        """
+        stacks: dict[str, int] = {}
+        for number, enclosing in enumerate(self._enclosing()):
+            idx = number * 2
+            count = self.counts[idx]
+            if not count:
+                continue
+            frames = ["main"] + [f"loop@{self.location(start)}" for start in enclosing]
+            frames.append(f"{chr(self.program[idx])}@{self.location(idx)}")
+            key = ";".join(frames)
+            stacks[key] = stacks.get(key, 0) + count
+        return [f"{key} {count}" for key, count in stacks.items()]
+
+    def write_collapsed(self, filename: str):
+        with open(filename, "w") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
@@ -1,13 +1,38 @@
 import pygame
 import numpy as np
 import threading
-from scipy import signal
+from collections import OrderedDict
+from typing import Callable
+
+from bf16module.utilities.sound.bf16synth import BF16synth, WAVEFORMS
 
 class BF16audio:
+    """
+    Notes, bass and chords are voices of one shared BF16synth streaming on a reserved
+    mixer channel (voice 0 is the bass, the rest take turns); arpeggios and sequences
+    are scheduled on its sample clock. Drum hits are filtered noise rendered once per
+    pitch into an LRU cache of Sounds and played on the other mixer channels.
+    """
     SAMPLE_RATE = 48000
     AMPLITUDE = 28000
+    VOICES = 8
+    NOTE_DURATION = 0.146  # seconds before the release (plus 0.02 s release: 0.166 s notes)
+    BASS_DURATION = 0.2    # plus 0.05 s release: 0.25 s bass notes
+    CACHE_LIMIT_BYTES = 64 * 1024 * 1024
     _INIT = False
 
+    _synth: BF16synth | None = None
+    _synth_lock = threading.Lock()
+    _voice = 0
+    _voice_lock = threading.Lock()
+
+    # Ready-made Sound objects keyed by (voice, pitch, waveform), least recently used first.
+    _sound_cache: "OrderedDict[tuple, tuple[pygame.mixer.Sound, int]]" = OrderedDict()
+    _cache_bytes = 0
+    _cache_hits = 0
+    _cache_misses = 0
+    _cache_lock = threading.Lock()
+
     @staticmethod
     def _ensure_initialized():
         if not BF16audio._INIT:
@@ -16,54 +41,108 @@ class BF16audio:
             BF16audio._INIT = True
 
     @staticmethod
-    def play_note(pitch: int, waveform: str = "sine"):
+    def _sound(key: tuple, render: Callable[[], np.ndarray]) -> pygame.mixer.Sound:
+        """Return the cached Sound for key, rendering it on a miss. Evicts LRU entries over CACHE_LIMIT_BYTES."""
+        cache = BF16audio._sound_cache
+        with BF16audio._cache_lock:
+            entry = cache.get(key)
+            if entry is not None:
+                cache.move_to_end(key)
+                BF16audio._cache_hits += 1
+                return entry[0]
+
+        samples = render()
+        sound = pygame.sndarray.make_sound(samples)
+
+        with BF16audio._cache_lock:
+            if key in cache:  # rendered concurrently by another thread
+                return cache[key][0]
+            cache[key] = (sound, samples.nbytes)
+            BF16audio._cache_bytes += samples.nbytes
+            BF16audio._cache_misses += 1
+            while BF16audio._cache_bytes > BF16audio.CACHE_LIMIT_BYTES and len(cache) > 1:
+                _, (_, size) = cache.popitem(last=False)
+                BF16audio._cache_bytes -= size
+        return sound
+
+    @staticmethod
+    def synth() -> BF16synth:
+        """The shared synthesizer for notes, bass and chords, streaming from its own thread once started."""
         BF16audio._ensure_initialized()
-        freq = 440.0 * (2.0 ** ((pitch - 69.0) / 12.0))
-        duration = 0.166
-        samples = int(BF16audio.SAMPLE_RATE * duration)
-        t = np.linspace(0, duration, samples, endpoint=False)
+        with BF16audio._synth_lock:
+            if BF16audio._synth is None:
+                mixer = pygame.mixer.get_init()
+                if mixer is None:
+                    raise pygame.error("mixer not initialized")
+                rate, _, channels = mixer
+                BF16audio._synth = BF16synth(rate, voices=BF16audio.VOICES, amplitude=BF16audio.AMPLITUDE,
+                                             channels=channels)
+                BF16audio._synth.start()
+                pygame.register_quit(BF16audio._stop_synth)
+            return BF16audio._synth
 
-        envelope = np.ones(samples)
-        attack = int(BF16audio.SAMPLE_RATE * 0.02)
-        release = int(BF16audio.SAMPLE_RATE * 0.02)
-        envelope[:attack] = np.linspace(0, 1, attack)
-        envelope[-release:] = np.linspace(1, 0, release)
-
-        if waveform == "sine":
-            wave = np.sin(2 * np.pi * freq * t)
-        elif waveform == "square":
-            wave = np.sign(np.sin(2 * np.pi * freq * t))
-        elif waveform == "triangle":
-            wave = 2 * np.abs(2 * (t * freq % 1) - 1) - 1
-        else:
-            wave = np.sin(2 * np.pi * freq * t)  # default to sine
+    @staticmethod
+    def _stop_synth():
+        with BF16audio._synth_lock:
+            if BF16audio._synth is not None:
+                BF16audio._synth.stop()
+                BF16audio._synth = None
 
-        audio = (BF16audio.AMPLITUDE * envelope * wave).astype(np.int16)
-        stereo_audio = np.column_stack((audio, audio))
-        pygame.sndarray.make_sound(stereo_audio).play()
+    @staticmethod
+    def _next_voice() -> int:
+        """Round-robin over the note voices (voice 0 is the bass); safe to call from any thread."""
+        with BF16audio._voice_lock:
+            BF16audio._voice = BF16audio._voice % (BF16audio.VOICES - 1) + 1
+            return BF16audio._voice
 
     @staticmethod
-    def play_bass_note(pitch: int):
+    def prewarm(voice: str = "bass"):
+        """Render all 256 drum hits ("drum") into the cache up front; "bass" and "note" just start the synthesizer."""
         BF16audio._ensure_initialized()
-        freq = 440.0 * (2.0 ** ((pitch - 69.0 - 12.0) / 12.0))
-        duration = 0.25
-        samples = int(BF16audio.SAMPLE_RATE * duration)
-        t = np.linspace(0, duration, samples, endpoint=False)
+        if voice != "drum":
+            BF16audio.synth()
+            return
+        for pitch in range(256):
+            BF16audio._sound(("drum", pitch, "noise"), lambda: BF16audio._render_drum_sound(pitch))
 
-        envelope = np.ones(samples)
-        attack = int(BF16audio.SAMPLE_RATE * 0.05)
-        release = int(BF16audio.SAMPLE_RATE * 0.05)
-        envelope[:attack] = np.linspace(0, 1, attack)
-        envelope[-release:] = np.linspace(1, 0, release)
+    @staticmethod
+    def cache_stats() -> dict:
+        return {
+            "sounds": len(BF16audio._sound_cache),
+            "bytes": BF16audio._cache_bytes,
+            "hits": BF16audio._cache_hits,
+            "misses": BF16audio._cache_misses,
+        }
+
+    @staticmethod
+    def clear_cache():
+        with BF16audio._cache_lock:
+            BF16audio._sound_cache.clear()
+            BF16audio._cache_bytes = 0
+
+    @staticmethod
+    def play_note(pitch: int, waveform: str = "sine", at: int | None = None):
+        """Note on the next free-running voice; at is a synth sample position (default: now)."""
+        synth = BF16audio.synth()
+        if waveform not in WAVEFORMS:
+            waveform = "sine"  # default to sine
+        synth.note_on(BF16audio._next_voice(), pitch, waveform, volume=1.0, at=at,
+                      duration=BF16audio.NOTE_DURATION, attack=0.02, release=0.02)
 
-        wave = np.sign(np.sin(2 * np.pi * freq * t))
-        audio = (BF16audio.AMPLITUDE * envelope * wave).astype(np.int16)
-        stereo_audio = np.column_stack((audio, audio))
-        pygame.sndarray.make_sound(stereo_audio).play()
+    @staticmethod
+    def play_bass_note(pitch: int):
+        """Square bass an octave down on its own voice, so a new note cuts the previous one cleanly."""
+        BF16audio.synth().note_on(0, pitch - 12, "square", volume=1.0, duration=BF16audio.BASS_DURATION,
+                                  attack=0.05, release=0.05)
 
     @staticmethod
     def play_drum_sound(pitch: int):
+        """Drum hit; the noise burst is rendered once per pitch and reused."""
         BF16audio._ensure_initialized()
+        BF16audio._sound(("drum", pitch, "noise"), lambda: BF16audio._render_drum_sound(pitch)).play()
+
+    @staticmethod
+    def _render_drum_sound(pitch: int) -> np.ndarray:
         freq = 440.0 * (2.0 ** ((pitch - 69.0) / 12.0))
         duration = 0.1
         samples = int(BF16audio.SAMPLE_RATE * duration)
@@ -83,27 +162,25 @@ class BF16audio:
         noise = np.random.uniform(-1, 1, samples)
         
         # Apply a low-pass filter effect for a more percussive sound
-        b, a = signal.butter(4, freq / (BF16audio.SAMPLE_RATE / 2), btype='low')
+        # (cutoff kept below Nyquist so every 8-bit pitch can be rendered).
+        # SciPy is only needed here, so it loads on the first drum hit.
+        from scipy import signal
+        b, a = signal.butter(4, min(freq / (BF16audio.SAMPLE_RATE / 2), 0.99), btype='low')
         filtered_noise = signal.lfilter(b, a, noise)
 
         audio = (BF16audio.AMPLITUDE * envelope * filtered_noise).astype(np.int16)
-        stereo_audio = np.column_stack((audio, audio))
-        pygame.sndarray.make_sound(stereo_audio).play()
+        return np.column_stack((audio, audio))
 
     @staticmethod
     def play_arpeggio(start_pitch: int, num_notes: int = 4, delay: float = 0.05):
-        BF16audio._ensure_initialized()
-
-        def _play():
-            for i in range(num_notes):
-                BF16audio.play_note(start_pitch + i * 4)
-                pygame.time.wait(int(delay * 1000))
-
-        threading.Thread(target=_play).start()
+        synth = BF16audio.synth()
+        start = synth.now()
+        for i in range(num_notes):
+            BF16audio.play_note(start_pitch + i * 4, at=start + synth.seconds(i * delay))
 
     @staticmethod
     def play_chord(root_pitch: int, chord_type: str = "major", duration: float = 0.5):
-        BF16audio._ensure_initialized()
+        synth = BF16audio.synth()
 
         chord_types = {
             "major": [0, 4, 7],
@@ -118,51 +195,40 @@ class BF16audio:
         if chord_type.lower() not in chord_types:
             print(f"Warning: Unknown chord '{chord_type}', using major.")
 
-        pitches = [root_pitch + i for i in intervals]
-        samples = int(BF16audio.SAMPLE_RATE * duration)
-        t = np.linspace(0, duration, samples, endpoint=False)
-        combined_wave = np.zeros(samples)
-
-        envelope = np.ones(samples)
-        attack = int(BF16audio.SAMPLE_RATE * 0.02)
-        release = int(BF16audio.SAMPLE_RATE * 0.05)
-        envelope[:attack] = np.linspace(0, 1, attack)
-        envelope[-release:] = np.linspace(1, 0, release)
-
-        for pitch in pitches:
-            freq = 440.0 * (2.0 ** ((pitch - 69.0) / 12.0))
-            combined_wave += np.sin(2 * np.pi * freq * t)
-
-        wave = BF16audio.AMPLITUDE * envelope * (combined_wave / len(pitches))
-        audio = wave.astype(np.int16)
-        stereo_audio = np.column_stack((audio, audio))
-        pygame.sndarray.make_sound(stereo_audio).play()
+        # All chord tones start on the same sample.
+        start = synth.now()
+        for interval in intervals:
+            synth.note_on(BF16audio._next_voice(), root_pitch + interval, "sine", volume=1.0 / len(intervals),
+                          at=start, duration=max(duration - 0.05, 0.0), attack=0.02, release=0.05)
 
     @staticmethod
     def play_sequence(pitches: list[int], delays: list[float]):
-        BF16audio._ensure_initialized()
-
-        def _play():
-            for pitch, d in zip(pitches, delays):
-                BF16audio.play_note(pitch)
-                pygame.time.wait(int(d * 1000))
-
-        threading.Thread(target=_play).start()
+        synth = BF16audio.synth()
+        at = synth.now()
+        for pitch, d in zip(pitches, delays):
+            BF16audio.play_note(pitch, at=at)
+            at += synth.seconds(d)
 
     @staticmethod
     def stop_all_sounds():
         BF16audio._ensure_initialized()
+        if BF16audio._synth is not None:
+            BF16audio._synth.all_off()
         pygame.mixer.stop()
 
     @staticmethod
     def set_volume(volume: float):
         """
-        Sets the global volume for all channels.
+        Sets the global volume for all channels and the synthesizer.
         volume: float between 0.0 and 1.0
         """
         BF16audio._ensure_initialized()
         if 0.0 <= volume <= 1.0:
-            for i in range(pygame.mixer.get_num_channels()):
+            # The synth's reserved channel 0 stays at full volume; its master gain applies the volume once.
+            first = 1 if BF16audio._synth is not None else 0
+            for i in range(first, pygame.mixer.get_num_channels()):
                 pygame.mixer.Channel(i).set_volume(volume)
+            if BF16audio._synth is not None:
+                BF16audio._synth.master = volume
         else:
             print("Volume must be between 0.0 and 1.0")
@@ -0,0 +1,279 @@
+import heapq
+import queue
+import time
+import wave
+import threading
+import numpy as np
+
+WAVEFORMS = ("sine", "square", "triangle", "saw", "noise")
+VOICES = 8
+BLOCK_SIZE = 1024  # samples per streamed buffer (~21 ms at 48 kHz)
+
+
+def pitch_frequency(pitch: float) -> float:
+    """MIDI-style pitch (69 = A4 = 440 Hz) to Hz."""
+    return 440.0 * (2.0 ** ((pitch - 69.0) / 12.0))
+
+
+def _sine(phase: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    return np.sin(2 * np.pi * phase)
+
+def _square(phase, rng):
+    return np.where(phase % 1.0 < 0.5, 1.0, -1.0)
+
+def _triangle(phase, rng):
+    return 2 * np.abs(2 * (phase % 1.0) - 1) - 1
+
+def _saw(phase, rng):
+    return 2 * (phase % 1.0) - 1
+
+def _noise(phase, rng):
+    return rng.uniform(-1, 1, phase.shape)
+
+_WAVE_FUNCTIONS = (_sine, _square, _triangle, _saw, _noise)
+
+
+class BF16synth:
+    """
+    Software synthesizer: a fixed set of voices (frequency, phase, waveform, volume
+    and a linear attack/release envelope each) mixed into one stream. Voices are
+    NumPy arrays and every buffer is rendered for all sounding voices at once,
+    one array expression per waveform in use.
+
+    Commands (note_on, note_off, set_waveform, set_volume) may come from any
+    thread. They go through a queue and take effect at the sample given by `at`
+    (absolute sample position, see now()), or as soon as possible without it:
+    rendering splits a buffer at every command, so scheduling is sample-accurate.
+
+    start() streams fixed-size buffers to a reserved pygame mixer channel from
+    its own thread, keeping one buffer queued behind the playing one. render()
+    and write_wav() drive the same engine offline, headless and as fast as
+    NumPy allows.
+    """
+
+    def __init__(self, rate: int = 48000, voices: int = VOICES, block_size: int = BLOCK_SIZE,
+                 amplitude: int = 28000, channels: int = 2):
+        if voices < 1:
+            raise ValueError("Need at least one voice")
+        self.rate = rate
+        self.voices = voices
+        self.block_size = block_size
+        self.amplitude = amplitude
+        self.channels = channels
+        self.master = 1.0
+        self.position = 0  # next sample to render
+        self.step = np.zeros(voices)           # cycles per sample
+        self.phase = np.zeros(voices)          # cycles
+        self.waveform = np.zeros(voices, dtype=np.int8)
+        self.volume = np.ones(voices)
+        self.level = np.zeros(voices)          # envelope level, 0..1
+        self.slope = np.zeros(voices)          # envelope change per sample
+        self.attack = np.full(voices, 0.02)    # seconds
+        self.release = np.full(voices, 0.02)
+        self.note = np.zeros(voices, dtype=np.int64)  # id of the note each voice plays
+        self.buffers = 0
+        self.underruns = 0
+        self.render_time = 0.0
+        self._rng = np.random.default_rng()
+        self._commands: queue.SimpleQueue = queue.SimpleQueue()
+        self._pending: list[tuple] = []  # heap of (at, order, command)
+        self._order = 0
+        self._notes = 0
+        self._notes_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    # === Commands ===
+
+    def now(self) -> int:
+        """Sample position the next rendered buffer starts at."""
+        return self.position
+
+    def seconds(self, seconds: float) -> int:
+        return int(round(seconds * self.rate))
+
+    def _send(self, at: int | None, *command):
+        self._commands.put((at, command))
+
+    def note_on(self, voice: int, pitch: float, waveform: str | None = None, volume: float | None = None,
+                at: int | None = None, duration: float | None = None,
+                attack: float | None = None, release: float | None = None) -> int:
+        """
+        Start a note on a voice (retriggering it from its current level, so no click).
+        With duration (seconds), the note is released that long after it starts unless
+        another note took the voice first. Returns the note id.
+        """
+        self._check_voice(voice)
+        wave_id = self._waveform_id(waveform) if waveform is not None else None
+        with self._notes_lock:
+            self._notes += 1
+            note = self._notes
+        self._send(at, "on", voice, pitch_frequency(pitch), wave_id, volume, attack, release, note, duration)
+        return note
+
+    def note_off(self, voice: int, at: int | None = None, note: int | None = None):
+        """Release a voice; with note, only if it is still playing that note."""
+        self._check_voice(voice)
+        self._send(at, "off", voice, note)
+
+    def set_waveform(self, voice: int, waveform: str, at: int | None = None):
+        self._check_voice(voice)
+        self._send(at, "waveform", voice, self._waveform_id(waveform))
+
+    def set_volume(self, voice: int, volume: float, at: int | None = None):
+        self._check_voice(voice)
+        self._send(at, "volume", voice, volume)
+
+    def all_off(self):
+        """Release every voice now."""
+        for voice in range(self.voices):
+            self._send(None, "off", voice, None)
+
+    def _check_voice(self, voice: int):
+        if not 0 <= voice < self.voices:
+            raise ValueError(f"Voice {voice} out of range 0-{self.voices - 1}")
+
+    @staticmethod
+    def _waveform_id(waveform: str) -> int:
+        try:
+            return WAVEFORMS.index(waveform)
+        except ValueError:
+            raise ValueError(f"Unknown waveform '{waveform}', expected one of {WAVEFORMS}")
+
+    def _drain(self):
+        """Move queued commands into the schedule; those without a time start now."""
+        while True:
+            try:
+                at, command = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            self._schedule(self.position if at is None else at, command)
+
+    def _schedule(self, at: int, command: tuple):
+        self._order += 1
+        heapq.heappush(self._pending, (at, self._order, command))
+
+    def _apply(self, at: int, command: tuple):
+        kind, voice = command[0], command[1]
+        if kind == "on":
+            _, _, frequency, wave_id, volume, attack, release, note, duration = command
+            self.step[voice] = frequency / self.rate
+            if wave_id is not None:
+                self.waveform[voice] = wave_id
+            if volume is not None:
+                self.volume[voice] = volume
+            if attack is not None:
+                self.attack[voice] = attack
+            if release is not None:
+                self.release[voice] = release
+            self.note[voice] = note
+            self.slope[voice] = 1.0 / max(self.attack[voice] * self.rate, 1.0)
+            if duration is not None:
+                self._schedule(at + self.seconds(duration), ("off", voice, note))
+        elif kind == "off":
+            if command[2] is None or command[2] == self.note[voice]:
+                self.slope[voice] = -1.0 / max(self.release[voice] * self.rate, 1.0)
+        elif kind == "waveform":
+            self.waveform[voice] = command[2]
+        elif kind == "volume":
+            self.volume[voice] = command[2]
+
+    # === Rendering ===
+
+    def render(self, count: int) -> np.ndarray:
+        """Render the next `count` samples as int16 (count x channels, or count for mono)."""
+        start = time.perf_counter()
+        self._drain()
+        mix = np.zeros(count)
+        done = 0
+        while done < count:
+            position = self.position + done
+            while self._pending and self._pending[0][0] <= position:
+                at, _, command = heapq.heappop(self._pending)
+                self._apply(position, command)
+            # Render up to the next scheduled command (or the end of the buffer).
+            span = count - done
+            if self._pending:
+                span = min(span, self._pending[0][0] - position)
+            self._mix(mix[done:done + span])
+            done += span
+        self.position += count
+        audio = np.clip(mix * (self.amplitude * self.master), -32768, 32767).astype(np.int16)
+        self.render_time += time.perf_counter() - start
+        if self.channels == 1:
+            return audio
+        return np.repeat(audio[:, None], self.channels, axis=1)
+
+    def _mix(self, out: np.ndarray):
+        """Add all sounding voices into out (all voices at once, one pass per waveform in use)."""
+        count = len(out)
+        active = np.flatnonzero((self.level > 0) | (self.slope > 0))
+        if not active.size or not count:
+            return
+        ramp = np.arange(1, count + 1)
+        level = np.clip(self.level[active, None] + self.slope[active, None] * ramp, 0.0, 1.0)
+        phase = self.phase[active, None] + self.step[active, None] * (ramp - 1)
+        waveforms = self.waveform[active]
+        signal = np.empty_like(phase)
+        for wave_id in np.unique(waveforms):
+            rows = waveforms == wave_id
+            signal[rows] = _WAVE_FUNCTIONS[wave_id](phase[rows], self._rng)
+        out += (signal * level * self.volume[active, None]).sum(axis=0)
+        self.level[active] = level[:, -1]
+        self.phase[active] = (phase[:, -1] + self.step[active]) % 1.0
+        # Voices that finished their release stop being rendered.
+        self.slope[active[(level[:, -1] == 0.0) & (self.slope[active] < 0)]] = 0.0
+
+    def write_wav(self, path: str, count: int):
+        """Render the next `count` samples into a 16-bit WAV file, one buffer at a time."""
+        with wave.open(path, "wb") as out:
+            out.setnchannels(self.channels)
+            out.setsampwidth(2)
+            out.setframerate(self.rate)
+            for offset in range(0, count, self.block_size):
+                out.writeframes(self.render(min(self.block_size, count - offset)).astype("<i2").tobytes())
+
+    # === Streaming ===
+
+    def start(self, channel=None):
+        """Stream to a pygame mixer channel (default: reserve channel 0) from a daemon thread."""
+        import pygame
+        if self._thread is not None:
+            return
+        if channel is None:
+            pygame.mixer.set_reserved(1)
+            channel = pygame.mixer.Channel(0)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._stream, args=(pygame, channel), name="bf16-synth", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _stream(self, pygame, channel):
+        wait = self.block_size / self.rate / 4
+        while not self._stop.is_set():
+            sound = pygame.sndarray.make_sound(self.render(self.block_size))
+            # Keep one buffer queued behind the playing one; render the next while they play.
+            while channel.get_queue() is not None and not self._stop.is_set():
+                time.sleep(wait)
+            if channel.get_busy():
+                channel.queue(sound)
+            else:
+                if self.buffers:
+                    self.underruns += 1
+                channel.play(sound)
+            self.buffers += 1
+
+    def stats(self) -> dict:
+        """Buffers streamed, underruns (buffer ran dry) and render speed relative to real time."""
+        rendered = self.position / self.rate
+        return {"buffers": self.buffers, "underruns": self.underruns, "seconds": rendered,
+                "realtime_factor": rendered / self.render_time if self.render_time else 0.0}
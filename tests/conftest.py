@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# Headless pygame, and the repository root on sys.path (the modules import as bf16module.*).
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_dir(tmp_path_factory):
+    """Keep native objects and compiled programs out of ~/.cache unless BF16_CACHE_DIR is set."""
+    if os.environ.get("BF16_CACHE_DIR"):
+        yield os.environ["BF16_CACHE_DIR"]
+        return
+    path = str(tmp_path_factory.mktemp("bf16-cache"))
+    os.environ["BF16_CACHE_DIR"] = path
+    yield path
+    del os.environ["BF16_CACHE_DIR"]
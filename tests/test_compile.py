@@ -0,0 +1,124 @@
+"""
+-O1/-O2 fuse pointer moves into ops that clamp only the cell they touch, so they
+match -O0 while the pointer stays off the tape edges and are documented (compile -h,
+README) to differ when a program runs the pointer into an edge. These tests pin both.
+"""
+import os
+
+import pytest
+
+from bf16module.runtime.bf16runtime import BF16Runtime
+from bf16module.utilities.colors.bf16color import BF16color
+from bf16module.utilities.compile.bf16compile import BF16compile, OP_ADD_AT, OP_MULADD, OP_CLEAR
+
+SNAKE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples", "snake.b")
+MEMORY_SIZE = 256
+LAST = MEMORY_SIZE - 1
+
+
+def run(source: bytes, optimize: int, start: int = 0, cells: dict[int, int] | None = None) -> BF16Runtime:
+    """Run source to its end on the interpreter, from pointer `start` with some cells preset."""
+    runtime = BF16Runtime(memory_size=MEMORY_SIZE)
+    runtime.program = BF16compile().compile(source, optimize=optimize)
+    runtime.address = start
+    for address, value in (cells or {}).items():
+        runtime.memory[address] = value
+    while runtime.cursor < len(runtime.program):
+        runtime.run_program(None, BF16color.rgb332)
+    return runtime
+
+
+@pytest.mark.parametrize("optimize", (1, 2))
+@pytest.mark.parametrize("source", (b"<+>", b">>+<<-<+>", b"+[->+>++<<]>>.<[<]", b"++[>+<-]>[-]."))
+def test_optimized_matches_unoptimized_off_the_edges(source, optimize):
+    expected = run(source, 0, start=100)
+    actual = run(source, optimize, start=100)
+    assert (actual.address, actual.memory, actual.frames) == (expected.address, expected.memory, expected.frames)
+
+
+@pytest.mark.parametrize("optimize", (1, 2))
+def test_snake_frames_match_unoptimized(optimize):
+    with open(SNAKE, "rb") as f:
+        source = f.read()
+    frames = {}
+    for level in (0, optimize):
+        runtime = BF16Runtime()
+        runtime.program = BF16compile().compile(source, optimize=level)
+        runtime.read_input = lambda: 8
+        seen = []
+        for _ in range(4):
+            runtime.run_program(None, BF16color.rgb332)
+            seen.append(bytes(runtime.memory[:256]))
+        frames[level] = seen
+    assert frames[optimize] == frames[0]
+
+
+def test_fused_add_clamps_target_not_pointer_at_left_edge():
+    program = BF16compile().compile(b"<+>", optimize=1)
+    assert program[0] == OP_ADD_AT
+    # -O0: '<' clamps to cell 0, '+' writes it, '>' moves to 1.
+    unoptimized = run(b"<+>", 0)
+    assert (unoptimized.address, unoptimized.memory[0]) == (1, 1)
+    # -O1: m[p - 1] += 1 clamps its target to cell 0 and the pointer never moves.
+    optimized = run(b"<+>", 1)
+    assert (optimized.address, optimized.memory[0]) == (0, 1)
+
+
+def test_fused_multiply_does_not_walk_pointer_back_at_right_edge():
+    program = BF16compile().compile(b"[->+<]", optimize=2)
+    assert [program[0], program[2]] == [OP_MULADD, OP_CLEAR]
+    # -O0: '>' clamps at the last cell, so '<' ends the first pass one cell to the left, where the loop exits.
+    unoptimized = run(b"[->+<]", 0, start=LAST, cells={LAST: 2})
+    assert (unoptimized.address, unoptimized.memory[LAST]) == (LAST - 1, 2)
+    # -O2: m[p + 1] += m[p] clamps onto the last cell itself, then the clear zeroes it; the pointer stays.
+    optimized = run(b"[->+<]", 2, start=LAST, cells={LAST: 2})
+    assert (optimized.address, optimized.memory[LAST]) == (LAST, 0)
+
+
+@pytest.mark.parametrize("optimize", (0, 1, 2))
+def test_unoptimized_size_from_one_compile(optimize):
+    with open(SNAKE, "rb") as f:
+        source = f.read()
+    baseline = len(BF16compile().compile(source)) // 2
+    compiler = BF16compile()
+    program = compiler.compile(source, optimize=optimize)
+    assert compiler.unoptimized_size == baseline
+    assert compiler.program_size // 2 == len(program) // 2
+
+
+def v3_file(tmp_path, name: str = "prog.bf16c") -> bytes:
+    compiler = BF16compile()
+    compiler.compile(b"+++[>++<-]>.")
+    path = tmp_path / name
+    compiler.write_bin_v3(str(path))
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize("length", (3, 12))  # inside the header, inside the section table
+def test_v3_truncated_file_is_rejected(tmp_path, length):
+    path = tmp_path / "short.bf16c"
+    path.write_bytes(v3_file(tmp_path)[:length])
+    with pytest.raises(ValueError, match="Truncated"):
+        BF16compile().read_bin_v3(str(path))
+
+
+def test_v3_code_count_beyond_section_is_rejected(tmp_path):
+    data = bytearray(v3_file(tmp_path))
+    for i in range(data[6] | data[7] << 8):
+        entry = 8 + i * 16
+        if data[entry:entry + 4] == b"CODE":
+            size = int.from_bytes(data[entry + 8:entry + 12], "little")
+            data[entry + 12:entry + 16] = (size // 4 + 1).to_bytes(4, "little")
+    path = tmp_path / "count.bf16c"
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="code section"):
+        BF16compile().read_bin_v3(str(path))
+
+
+def test_unknown_bin_version_is_rejected(tmp_path):
+    data = bytearray(v3_file(tmp_path))
+    data[4] = 7
+    path = tmp_path / "v7.bf16c"
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="version: 7"):
+        BF16compile().bin_version(str(path))
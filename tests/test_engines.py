@@ -0,0 +1,167 @@
+"""
+Every execution engine must agree with the interpreter: same frames, ticks, pointer
+(including clamping at the tape edges), tape contents and budget pauses, at every
+-O level and on both tape backends.
+"""
+import os
+import random
+import hashlib
+
+import pytest
+
+from bf16module.runtime.bf16runtime import BF16Runtime
+from bf16module.runtime.bf16lockstep import BF16lockstep
+from bf16module.runtime.bf16native import find_compiler
+from bf16module.utilities.colors.bf16color import BF16color
+from bf16module.utilities.compile.bf16compile import BF16compile, OPTIMIZE_LEVELS
+from bf16module.utilities.options.bf16options import MEMORY_SIZE, ENGINES, TAPES
+
+SNAKE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples", "snake.b")
+SEED = 1602
+PROGRAMS = 40
+MAX_TICKS = 20000
+BUDGET = 37
+
+IDIOMS = ["[-]", "[>]", "[<]", "[->+<]", "[-<<+>>]", "[->>++<<]", "[<<]", ">>>+<<<", "<<<+>>>"]
+
+
+def random_source(rng: random.Random, depth: int = 0) -> str:
+    """Short programs heavy on loops, idioms the optimizer rewrites and pointer moves."""
+    out = []
+    for _ in range(rng.randint(1, 8)):
+        r = rng.random()
+        if r < 0.15 and depth < 4:
+            out.append("[" + random_source(rng, depth + 1) + "]")
+        elif r < 0.25:
+            out.append(rng.choice(IDIOMS))
+        else:
+            out.append(rng.choice("++++-->><<<.,") * rng.randint(1, 3))
+    return "".join(out)
+
+
+def fuzz_cases() -> list[tuple]:
+    """(source, memory size, start address, keys), the same on every run."""
+    rng = random.Random(SEED)
+    cases = []
+    for _ in range(PROGRAMS):
+        source = random_source(rng) + "." + random_source(rng)
+        memory_size = rng.choice([256, 260, 300])
+        start = rng.choice([0, 1, 2, memory_size - 1, memory_size - 2, memory_size // 2])
+        keys = [rng.randint(0, 3) for _ in range(6)]
+        cases.append((source, memory_size, start, keys))
+    return cases
+
+
+def engine_params() -> list:
+    native = pytest.mark.skipif(find_compiler() is None, reason="no C compiler")
+    return [pytest.param(engine, marks=native if engine == "native" else (), id=engine) for engine in ENGINES]
+
+
+def run_runtime(program: list[int], engine: str, tape: str, memory_size: int, keys: list[int],
+                start: int = 0, budget: int | None = None, frames: int = 6,
+                max_ticks: int = MAX_TICKS) -> list[tuple]:
+    """State after every run_program() call: ticks, cursor, address, frame count, frame hash, tape."""
+    runtime = BF16Runtime(engine=engine, tape=tape, memory_size=memory_size)
+    runtime.program = program
+    runtime.read_input = lambda: keys[min(runtime.frames, len(keys) - 1)]
+    runtime.budget = budget
+    runtime.address = runtime.max_address = start
+    if engine == "native":
+        runtime.native_engine(wait=True)
+    states = []
+    while runtime.frames < frames and runtime.cursor < len(program) and runtime.tick < max_ticks:
+        runtime.run_program(None, BF16color.rgb332)
+        memory = bytes(runtime.memory)
+        states.append((runtime.tick, runtime.cursor, runtime.address, runtime.frames,
+                       hashlib.blake2b(memory[:256], digest_size=8).hexdigest(), memory))
+    assert runtime.engine == engine, f"{engine} engine fell back to {runtime.engine}"
+    return states
+
+
+def run_lockstep(program: list[int], memory_size: int, keys: list[int], start: int = 0,
+                 frames: int = 6, max_ticks: int = MAX_TICKS) -> list[tuple]:
+    """The same states from a one-instance BF16lockstep (no budget: it only stops at frames)."""
+    vector = BF16lockstep(program, 1, memory_size, keys=[keys])
+    vector.pointer[0] = start
+    states = []
+    while vector.frames[0] < frames and not vector.done[0] and vector.ticks[0] < max_ticks:
+        if vector.run_frame() is None:
+            break
+        memory = vector.memory[0].tobytes()
+        states.append((int(vector.ticks[0]), int(vector.pc[0]), int(vector.pointer[0]), int(vector.frames[0]),
+                       hashlib.blake2b(memory[:256], digest_size=8).hexdigest(), memory))
+    return states
+
+
+def terminates(program: list[int], memory_size: int, keys: list[int], start: int) -> bool:
+    """Whether the program reaches its frames or end within MAX_TICKS (runs without a budget are safe)."""
+    states = run_runtime(program, "interpreter", "list", memory_size, keys, start, budget=BUDGET)
+    return not states or states[-1][0] < MAX_TICKS
+
+
+def assert_same(expected: list[tuple], actual: list[tuple], label: str):
+    assert len(actual) == len(expected), f"{label}: {len(actual)} steps, expected {len(expected)}"
+    for step, (want, got) in enumerate(zip(expected, actual)):
+        if want != got:
+            fields = ("ticks", "cursor", "address", "frames", "frame hash")
+            diff = {name: (w, g) for name, w, g in zip(fields, want, got) if w != g}
+            cells = [i for i, (w, g) in enumerate(zip(want[5], got[5])) if w != g][:10]
+            pytest.fail(f"{label}: step {step} differs: {diff}, tape cells {cells}")
+
+
+@pytest.mark.parametrize("engine", engine_params())
+@pytest.mark.parametrize("tape", TAPES)
+@pytest.mark.parametrize("optimize", OPTIMIZE_LEVELS)
+def test_fuzz_matches_interpreter(engine, tape, optimize):
+    compiler = BF16compile()
+    for source, memory_size, start, keys in fuzz_cases():
+        program = compiler.compile(source.encode(), optimize=optimize)
+        budgets = (None, BUDGET) if terminates(program, memory_size, keys, start) else (BUDGET,)
+        for budget in budgets:
+            expected = run_runtime(program, "interpreter", "list", memory_size, keys, start, budget)
+            actual = run_runtime(program, engine, tape, memory_size, keys, start, budget)
+            assert_same(expected, actual, f"{source!r} -O{optimize} size {memory_size} start {start} budget {budget}")
+
+
+@pytest.mark.parametrize("optimize", OPTIMIZE_LEVELS)
+def test_fuzz_lockstep_matches_interpreter(optimize):
+    compiler = BF16compile()
+    for source, memory_size, start, keys in fuzz_cases():
+        program = compiler.compile(source.encode(), optimize=optimize)
+        if not terminates(program, memory_size, keys, start):
+            continue
+        expected = run_runtime(program, "interpreter", "list", memory_size, keys, start)
+        actual = run_lockstep(program, memory_size, keys, start)
+        assert_same(expected, actual, f"{source!r} -O{optimize} size {memory_size} start {start}")
+
+
+@pytest.fixture(scope="module")
+def snake_source() -> bytes:
+    with open(SNAKE, "rb") as f:
+        return f.read()
+
+
+SNAKE_FRAMES = 8
+SNAKE_KEYS = [0, 0, 8, 8, 1, 1, 4, 2]
+SNAKE_TICKS = 1 << 40  # no cap: every frame runs to its '.'
+
+
+@pytest.mark.parametrize("engine", engine_params())
+@pytest.mark.parametrize("tape", TAPES)
+@pytest.mark.parametrize("optimize", OPTIMIZE_LEVELS)
+def test_snake_matches_interpreter(snake_source, engine, tape, optimize):
+    program = BF16compile().compile(snake_source, optimize=optimize)
+    expected = run_runtime(program, "interpreter", "list", MEMORY_SIZE, SNAKE_KEYS, frames=SNAKE_FRAMES,
+                           max_ticks=SNAKE_TICKS)
+    actual = run_runtime(program, engine, tape, MEMORY_SIZE, SNAKE_KEYS, frames=SNAKE_FRAMES, max_ticks=SNAKE_TICKS)
+    assert len(expected) == SNAKE_FRAMES
+    assert_same(expected, actual, f"snake.b -O{optimize}")
+
+
+@pytest.mark.parametrize("optimize", OPTIMIZE_LEVELS)
+def test_snake_lockstep_matches_interpreter(snake_source, optimize):
+    program = BF16compile().compile(snake_source, optimize=optimize)
+    expected = run_runtime(program, "interpreter", "list", MEMORY_SIZE, SNAKE_KEYS, frames=SNAKE_FRAMES,
+                           max_ticks=SNAKE_TICKS)
+    actual = run_lockstep(program, MEMORY_SIZE, SNAKE_KEYS, frames=SNAKE_FRAMES, max_ticks=SNAKE_TICKS)
+    assert_same(expected, actual, f"snake.b -O{optimize}")
@@ -0,0 +1,45 @@
+import zlib
+
+import pytest
+
+from bf16module.runtime.bf16runtime import BF16Runtime, _SNAPSHOT
+from bf16module.utilities.colors.bf16color import BF16color
+from bf16module.utilities.compile.bf16compile import BF16compile
+
+
+def runtime_for(program: list[int]) -> BF16Runtime:
+    runtime = BF16Runtime(memory_size=512)
+    runtime.program = program
+    return runtime
+
+
+def test_program_crc_is_little_endian_words():
+    # Large arguments (v3 binaries store 32-bit operands) must survive too.
+    program = [ord('+'), 5, ord('>'), 70000, ord('.'), 0]
+    words = b"".join(value.to_bytes(4, "little") for value in program)
+    assert runtime_for(program)._program_crc() == zlib.crc32(words)
+
+
+def test_snapshot_header_carries_portable_crc():
+    program = BF16compile().compile(b"+++[>++<-]>.")
+    runtime = runtime_for(program)
+    runtime.run_program(None, BF16color.rgb332)
+    crc = _SNAPSHOT.unpack_from(runtime.snapshot())[3]
+    words = b"".join(value.to_bytes(4, "little") for value in program)
+    assert crc == zlib.crc32(words)
+
+
+def test_restore_round_trip_and_rejects_other_program():
+    program = BF16compile().compile(b"+++[>++<-]>.+.")
+    runtime = runtime_for(program)
+    runtime.run_program(None, BF16color.rgb332)
+    data = runtime.snapshot()
+    state = (runtime.cursor, runtime.address, runtime.tick, runtime.frames, bytes(runtime.memory))
+
+    fresh = runtime_for(program)
+    fresh.restore(data)
+    assert (fresh.cursor, fresh.address, fresh.tick, fresh.frames, bytes(fresh.memory)) == state
+
+    other = runtime_for(BF16compile().compile(b"+++[>++<-]>.-."))
+    with pytest.raises(ValueError, match="different program"):
+        other.restore(data)
@@ -0,0 +1,52 @@
+import os
+import sys
+import json
+import subprocess
+
+from conftest import ROOT
+
+BF16 = os.path.join(ROOT, "bf16.py")
+# Tool modules a plain `run` must not import (they load with the command or option that needs them).
+TOOLS = (
+    "bf16module.runtime.bf16worker",
+    "bf16module.runtime.bf16scheduler",
+    "bf16module.runtime.bf16rewind",
+    "bf16module.utilities.input.bf16replay",
+    "bf16module.utilities.bench.bf16bench",
+    "bf16module.utilities.profile.bf16profiler",
+    "bf16module.utilities.batch.bf16batch",
+    "bf16module.utilities.export.bf16export",
+    "bf16module.utilities.sound.bf16audio",
+    "bf16module.utilities.sound.bf16synth",
+    "scipy",
+)
+PROBE = """
+import sys, json, runpy
+sys.argv = ["bf16.py"] + sys.argv[1:]
+runpy.run_path({bf16!r}, run_name="__main__")
+print(json.dumps(sorted(name for name in {tools!r} if name in sys.modules)))
+"""
+
+
+def loaded_after(*argv: str) -> list[str]:
+    """Run bf16.py headless in a fresh interpreter and return which TOOLS it imported."""
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, "-c", PROBE.format(bf16=BF16, tools=TOOLS), *argv],
+                            capture_output=True, text=True, env=env, cwd=ROOT, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_plain_run_loads_no_tools(tmp_path):
+    program = tmp_path / "frame.b"
+    program.write_bytes(b">+<.")  # one frame, then the program ends and run returns
+    assert loaded_after("run", str(program), "--no-cache") == []
+
+
+def test_bench_loads_only_bench(tmp_path):
+    program = tmp_path / "frame.b"
+    program.write_bytes(b">+<.")
+    loaded = loaded_after("bench", str(program), "--frames", "1", "--no-cache")
+    assert "bf16module.utilities.bench.bf16bench" in loaded
+    assert not set(loaded) & {"bf16module.utilities.export.bf16export", "bf16module.utilities.profile.bf16profiler",
+                              "bf16module.utilities.sound.bf16audio", "bf16module.runtime.bf16worker"}
@@ -0,0 +1,71 @@
+import threading
+
+import pygame
+import pytest
+
+from bf16module.runtime.bf16runtime import BF16Runtime
+from bf16module.runtime.bf16worker import BF16worker
+from bf16module.utilities.colors.bf16color import BF16color
+from bf16module.utilities.compile.bf16compile import BF16compile
+
+FRAMES = 50
+# Cell 0 counts frames; the pointer rests on cell 1 (always 0), so no bass note plays.
+SOURCE = b">" + b"<+>." * FRAMES
+
+
+@pytest.fixture
+def screen():
+    pygame.display.init()
+    yield pygame.display.set_mode((256, 256))
+    pygame.display.quit()
+
+
+def present_all(runtime: BF16Runtime, screen: pygame.Surface, worker: BF16worker) -> list[int]:
+    """The host side of run --worker: present every frame the worker produces, in order."""
+    shown = []
+    while not worker.done:
+        frame = worker.get(timeout=1)
+        if frame is not None:
+            runtime.present(screen, frame.cells, frame.note, BF16color.rgb332, frame.index)
+            shown.append(frame.index)
+    assert worker.error is None
+    return shown
+
+
+def test_worker_never_draws(screen, monkeypatch):
+    runtime = BF16Runtime()
+    runtime.program = BF16compile().compile(SOURCE)
+    # A graphic engine already exists before the worker starts, as after the first present().
+    runtime.present(screen, bytes(256), 0, BF16color.rgb332, 0)
+
+    draws: dict[str, int] = {}
+    draw_cells = runtime._draw_cells
+
+    def counting_draw_cells(*args, **kwargs):
+        name = threading.current_thread().name
+        draws[name] = draws.get(name, 0) + 1
+        return draw_cells(*args, **kwargs)
+
+    monkeypatch.setattr(runtime, "_draw_cells", counting_draw_cells)
+    worker = BF16worker(runtime, BF16color.rgb332, capacity=2, policy="block")
+    worker.start()
+    shown = present_all(runtime, screen, worker)
+    worker.stop()
+
+    assert len(shown) == FRAMES
+    assert draws == {threading.main_thread().name: FRAMES}
+
+
+def test_frame_rendered_once_per_presented_frame(screen):
+    runtime = BF16Runtime()
+    runtime.program = BF16compile().compile(SOURCE)
+    seen: list[tuple[str, int]] = []
+    runtime.register_event("frame_rendered", lambda frame: seen.append((threading.current_thread().name, frame)))
+    worker = BF16worker(runtime, BF16color.rgb332, capacity=4, policy="block")
+    worker.start()
+    shown = present_all(runtime, screen, worker)
+    worker.stop()
+
+    main = threading.main_thread().name
+    assert seen == [(main, index) for index in shown]
+    assert shown == list(range(1, FRAMES + 1))